@@ -8,9 +8,15 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import EVENT_RECORDER_HOURLY_STATISTICS_GENERATED
 from homeassistant.core import HomeAssistant
 
+from .backfill import backfill_store
 from .const import PLATFORMS
-from .coordinator import EnedisDataUpdateCoordinator
+from .coordinator import EnedisDataUpdateCoordinator, migration_store
+from .crawler import crawler_store
+from .endpoints import endpoint_store
+from .helpers import rebuild_store
+from .scheduler import scheduler_store
 from .services import async_services
+from .tariffs import tariff_store
 
 type MyElectricalDataConfigEntry = ConfigEntry[EnedisDataUpdateCoordinator]
 
@@ -34,6 +40,10 @@ async def async_setup_entry(
             coordinator.async_handle_hourly_statistics,
         )
     )
+    entry.async_on_unload(lambda: coordinator.quota.release(entry.entry_id))
+    entry.async_on_unload(coordinator.backfill.async_stop)
+    entry.async_on_unload(coordinator.rebuilder.async_stop)
+    coordinator.backfill.async_start()
 
     return True
 
@@ -45,8 +55,23 @@ async def async_unload_entry(
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
+async def async_remove_entry(
+    hass: HomeAssistant, entry: MyElectricalDataConfigEntry
+) -> None:
+    """Drop the state persisted for a removed config entry."""
+    await migration_store(hass, entry.entry_id).async_remove()
+    await scheduler_store(hass, entry.entry_id).async_remove()
+    await backfill_store(hass, entry.entry_id).async_remove()
+    await crawler_store(hass, entry.entry_id).async_remove()
+    await rebuild_store(hass, entry.entry_id).async_remove()
+    await tariff_store(hass, entry.entry_id).async_remove()
+    await endpoint_store(hass, entry.entry_id).async_remove()
+
+
 async def _async_update_listener(
     hass: HomeAssistant, entry: MyElectricalDataConfigEntry
 ) -> None:
     """Handle options update."""
+    # A new token or lifetime must not be answered from the old cache
+    await entry.runtime_data.endpoints.async_clear()
     await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,354 @@
+"""Resumable history backfill for MyElectricalData."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from datetime import datetime as dt
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_TOKEN
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from myelectricaldatapy import EnedisException, LimitReached
+
+from .const import (
+    CONF_AUTH,
+    CONF_CONSUMPTION,
+    CONF_INTERVALS,
+    CONF_OFF_PRICE,
+    CONF_PDL,
+    CONF_PRICE,
+    CONF_PRODUCTION,
+    CONF_RULE_END_TIME,
+    CONF_RULE_START_TIME,
+    CONF_TEMPO,
+    CONSUMPTION_DAILY,
+    CONSUMPTION_DETAIL,
+    DOMAIN,
+    PRODUCTION_DETAIL,
+    STORAGE_VERSION,
+)
+from .helpers import (
+    async_get_last_infos,
+    async_import_sensor_statistics,
+    build_price_items,
+    build_sensor_items,
+    read_prices,
+)
+from .quota import estimate_calls, quota_budget
+from .tempo import async_subscribe_tempo
+
+if TYPE_CHECKING:
+    from .coordinator import EnedisDataUpdateCoordinator
+
+# Longest range a single API call accepts, per kind of service.
+DETAIL_WINDOW = timedelta(days=7)
+DAILY_WINDOW = timedelta(days=365)
+# Attempts at a window before it's given up on, and the delay between them.
+WINDOW_ATTEMPTS = 3
+WINDOW_RETRY = timedelta(hours=1)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def backfill_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding an entry's pending backfill jobs."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill")
+
+
+def collect_window(service: str) -> timedelta:
+    """Return the collect window used for service."""
+    return (
+        DETAIL_WINDOW
+        if service in [CONSUMPTION_DETAIL, PRODUCTION_DETAIL]
+        else DAILY_WINDOW
+    )
+
+
+def uses_tempo(entry: ConfigEntry, job: dict[str, Any]) -> bool:
+    """Tell whether a job's consumption is priced by Tempo colour."""
+    return (
+        job["service"] in [CONSUMPTION_DAILY, CONSUMPTION_DETAIL]
+        and not job.get(CONF_PRICE)
+        and bool(entry.options.get(CONF_AUTH, {}).get(CONF_TEMPO))
+    )
+
+
+def prepare_collect(
+    hass: HomeAssistant, entry: ConfigEntry, job: dict[str, Any]
+) -> tuple[list[tuple[str, str]], dict[str, Any], list[dict[str, Any]]]:
+    """Return the intervals, prices and sensor items of a backfill job."""
+    service = job["service"]
+    options = entry.options
+    pdl = entry.data[CONF_PDL]
+    mode = (
+        CONF_CONSUMPTION
+        if service in [CONSUMPTION_DAILY, CONSUMPTION_DETAIL]
+        else CONF_PRODUCTION
+    )
+    intervals = [
+        (interval[CONF_RULE_START_TIME], interval[CONF_RULE_END_TIME])
+        for interval in options.get(mode, {}).get(CONF_INTERVALS, {}).values()
+    ]
+
+    # Set price: use the job's override if given, otherwise fall back to the
+    # live value of the tariff number entities (the source of truth).
+    if price := job.get(CONF_PRICE):
+        prices: dict[str, Any] = {"standard": {CONF_PRICE: price}}
+        if len(intervals) != 0 and (off_price := job.get(CONF_OFF_PRICE)):
+            prices.update({"offpeak": {CONF_PRICE: off_price}})
+        else:
+            intervals = []
+    else:
+        prices = read_prices(
+            hass,
+            build_price_items(mode, pdl, service, intervals, uses_tempo(entry, job)),
+        )
+
+    items = build_sensor_items(mode, pdl, service, intervals, has_price=bool(prices))
+    return intervals, prices, items
+
+
+class BackfillQueue:
+    """Persistent queue of history ranges to collect for a config entry.
+
+    fetch_data only enqueues a job. Jobs are split into the longest ranges a
+    single API call accepts (7 days of load curve, a year of daily data) and
+    collected one window at a time, in the background and only with the quota
+    the scheduled refreshes leave over (see quota.QuotaBudget). When the
+    quota runs out, the queue sleeps until the next day. A window that brings
+    nothing back is retried later, and only given up on after WINDOW_ATTEMPTS
+    tries. The cursor is saved after every window, so a restart resumes
+    where it stopped. Each window is
+    imported as it comes, under the entry's write lock, and the job ends by
+    marking its statistics dirty from the earliest hour it touched, so jobs
+    queued back to back share a single deferred rebuild. Windows
+    are collected with clients from the coordinator's create_client, which
+    share one HTTP session, so a long backfill keeps reusing the same pooled
+    connections.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        coordinator: EnedisDataUpdateCoordinator,
+    ) -> None:
+        """Initialize the queue."""
+        self.hass = hass
+        self.entry = entry
+        self.coordinator = coordinator
+        self.jobs: list[dict[str, Any]] = []
+        self._store = backfill_store(hass, entry.entry_id)
+        self._task: asyncio.Task[None] | None = None
+        self._unsub_resume: CALLBACK_TYPE | None = None
+
+    @property
+    def progress(self) -> float:
+        """Return the share of queued windows already collected, in percent."""
+        total = sum(job["windows_total"] for job in self.jobs)
+        done = sum(job["windows_done"] for job in self.jobs)
+        return round(100 * done / total, 1) if total else 100.0
+
+    async def async_load(self) -> None:
+        """Restore the pending jobs."""
+        if (stored := await self._store.async_load()) is not None:
+            self.jobs = stored.get("jobs", [])
+
+    async def async_enqueue(
+        self,
+        service: str,
+        start: dt,
+        end: dt,
+        price: float | None = None,
+        off_price: float | None = None,
+    ) -> None:
+        """Queue the collection of service over [start, end) and start it.
+
+        A request identical to a job still pending is dropped, so repeated
+        service calls don't collect and rebuild the same range twice.
+        """
+        request = {
+            "service": service,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            CONF_PRICE: price,
+            CONF_OFF_PRICE: off_price,
+        }
+        if any(request.items() <= job.items() for job in self.jobs):
+            _LOGGER.debug("Backfill of %s already queued", request)
+            return
+        self.jobs.append(
+            {
+                **request,
+                "cursor": start.isoformat(),
+                "dirty_from": None,
+                "windows_done": 0,
+                "windows_total": math.ceil((end - start) / collect_window(service)),
+            }
+        )
+        await self._async_save()
+        self.coordinator.async_update_listeners()
+        self.async_start()
+
+    @callback
+    def async_start(self) -> None:
+        """Run the pending jobs in the background, unless already running."""
+        if not self.jobs or (self._task is not None and not self._task.done()):
+            return
+        self._task = self.entry.async_create_background_task(
+            self.hass, self._async_run(), f"{DOMAIN} backfill"
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop waiting for tomorrow's quota."""
+        if self._unsub_resume is not None:
+            self._unsub_resume()
+            self._unsub_resume = None
+
+    async def _async_run(self) -> None:
+        """Collect the pending jobs window after window."""
+        budget = quota_budget(self.hass, self.entry.options[CONF_AUTH][CONF_TOKEN])
+        while self.jobs:
+            job = self.jobs[0]
+            start = dt.fromisoformat(job["cursor"])
+            if start >= (end := dt.fromisoformat(job["end"])):
+                await self._async_finish(job)
+                continue
+
+            window_end = min(start + collect_window(job["service"]), end)
+            calls = estimate_calls(job["service"], start, window_end) + int(
+                uses_tempo(self.entry, job)
+                and self.coordinator.tempo_calendar.between(start, window_end) is None
+            )
+            if not budget.can_spend(calls):
+                self._async_defer()
+                return
+            try:
+                dirty_from = await self._async_collect(job, start, window_end)
+            except LimitReached as error:
+                _LOGGER.warning("Backfill paused, limit reached: %s", error)
+                self._async_defer()
+                return
+            except EnedisException as error:
+                # The client swallows 409s and timeouts alike, and reports an
+                # empty window the same way, so a window is retried a few
+                # times before it's given up on rather than skipped at once.
+                job["attempts"] = job.get("attempts", 0) + 1
+                _LOGGER.warning(
+                    "No %s data from %s to %s (attempt %s/%s): %s",
+                    job["service"],
+                    start,
+                    window_end,
+                    job["attempts"],
+                    WINDOW_ATTEMPTS,
+                    error,
+                )
+                if job["attempts"] < WINDOW_ATTEMPTS:
+                    await self._async_save()
+                    self._async_defer(dt_util.now() + WINDOW_RETRY)
+                    return
+                dirty_from = None
+            finally:
+                budget.spend(calls)
+
+            job["attempts"] = 0
+            if dirty_from is not None and (
+                job["dirty_from"] is None
+                or dirty_from < dt.fromisoformat(job["dirty_from"])
+            ):
+                job["dirty_from"] = dirty_from.isoformat()
+            job["cursor"] = window_end.isoformat()
+            job["windows_done"] += 1
+            await self._async_save()
+            self.coordinator.async_update_listeners()
+
+    async def _async_collect(
+        self, job: dict[str, Any], start: dt, end: dt
+    ) -> dt | None:
+        """Collect and import one window, return the earliest hour imported."""
+        intervals, prices, items = prepare_collect(self.hass, self.entry, job)
+        tempo = self.coordinator.tempo_calendar if uses_tempo(self.entry, job) else None
+        api = self.coordinator.create_client()
+
+        # Sums carry on from the rows just before the window, so rows already
+        # stored identically come out with the same sum and aren't imported
+        _, sum_values, sum_prices = await async_get_last_infos(
+            self.hass, items, before=start
+        )
+
+        # Set api collector
+        api.set_collects(
+            job["service"],
+            start=start,
+            end=end,
+            intervals=intervals,
+            prices=prices,
+            cum_value=sum_values,
+            cum_price=sum_prices,
+        )
+        if tempo is not None:
+            async_subscribe_tempo(api, tempo.between(start, end))
+        await api.async_update_collects()
+        if not api.has_collected:
+            raise EnedisException(f"No {job['service']} data collected")
+        if tempo is not None:
+            await tempo.async_update(api.tempo)
+        async with self.coordinator.lock:
+            dirty_from = await async_import_sensor_statistics(
+                self.hass,
+                items,
+                api.stats,
+                self.coordinator.import_queue,
+                # A price given with the job overrides the tariff history
+                None if job.get(CONF_PRICE) else self.coordinator.tariffs,
+                tempo,
+            )
+            await self.coordinator.import_queue.async_flush()
+        self.coordinator.stats_cache.invalidate([item["entity_id"] for item in items])
+        return dirty_from
+
+    async def _async_finish(self, job: dict[str, Any]) -> None:
+        """Mark the job's imports for a rebuild and drop it.
+
+        Windows land before, after or in the middle of data that's already
+        there, each with sums computed from whatever baseline was known at
+        import time, so the cumulative sum has to be rebuilt from the earliest
+        hour the job touched, leaving the untouched prefix alone.
+        """
+        if job["dirty_from"] is not None:
+            _, _, items = prepare_collect(self.hass, self.entry, job)
+            await self.coordinator.rebuilder.async_mark_dirty(
+                items, dt.fromisoformat(job["dirty_from"])
+            )
+        self.jobs.remove(job)
+        await self._async_save()
+        self.coordinator.async_update_listeners()
+
+    @callback
+    def _async_defer(self, resume_at: dt | None = None) -> None:
+        """Resume at resume_at, by default once the daily quota is reset."""
+        if resume_at is None:
+            resume_at = dt_util.start_of_local_day() + timedelta(days=1)
+        _LOGGER.info("Backfill paused, resuming at %s", resume_at)
+        self.async_stop()
+        self._unsub_resume = async_track_point_in_time(
+            self.hass, self._async_resume, resume_at
+        )
+
+    @callback
+    def _async_resume(self, _: dt) -> None:
+        """Restart the jobs after the quota reset."""
+        self._unsub_resume = None
+        self.async_start()
+
+    async def _async_save(self) -> None:
+        """Checkpoint the pending jobs."""
+        await self._store.async_save({"jobs": self.jobs})
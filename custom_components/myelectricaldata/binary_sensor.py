@@ -4,8 +4,10 @@ from __future__ import annotations
 
 import logging
 import re
+from bisect import bisect_right
 from datetime import datetime as dt
 from datetime import time, timedelta
+from typing import Any
 
 from homeassistant.components.binary_sensor import (
     BinarySensorDeviceClass,
@@ -14,7 +16,7 @@ from homeassistant.components.binary_sensor import (
 from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import async_track_point_in_time
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util import dt as dt_util
 
@@ -25,6 +27,29 @@ from .coordinator import EnedisDataUpdateCoordinator
 _LOGGER = logging.getLogger(__name__)
 
 
+def offpeak_transitions(offpeak_hours: str) -> list[tuple[time, bool]]:
+    """Return the daily flips of offpeak_hours, as sorted (time, new state).
+
+    offpeak_hours comes as "HC (1H30-8H00;12H30-14H00)"; each range is on from
+    its start up to its end excluded, wrapping past midnight when it ends
+    earlier than it starts. Overlapping or adjoining ranges merge, so every
+    transition flips the state, except for offpeak hours lasting the whole
+    day, which come back as a single entry at midnight.
+    """
+    minutes = [False] * 1440
+    for match in re.findall(r"(\d{1,2})H(\d{2})-(\d{1,2})H(\d{2})", offpeak_hours):
+        start, end = (int(h) % 24 * 60 + int(m) for h, m in (match[:2], match[2:]))
+        span = range(start, end if start <= end else end + 1440)
+        for minute in span:
+            minutes[minute % 1440] = True
+    flips = [
+        (time(minute // 60, minute % 60), minutes[minute])
+        for minute in range(1440)
+        if minutes[minute] != minutes[minute - 1]
+    ]
+    return flips or ([(time(0), True)] if minutes[0] else [])
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: MyElectricalDataConfigEntry,
@@ -60,6 +85,7 @@ class CountdownSensor(
             "Expiration date": coordinator.access.get("consent_expiration_date"),
             "Last access": coordinator.last_access,
             "Last refresh": coordinator.last_refresh,
+            "Statistics corrections": coordinator.statistics_corrections,
         }
 
     @callback
@@ -75,12 +101,18 @@ class CountdownSensor(
             "Expiration date": self.coordinator.access.get("consent_expiration_date"),
             "Last access": self.coordinator.last_access,
             "Last refresh": self.coordinator.last_refresh,
+            "Statistics corrections": self.coordinator.statistics_corrections,
         }
         super()._handle_coordinator_update()
 
 
 class OffpeakSensor(CoordinatorEntity[EnedisDataUpdateCoordinator], BinarySensorEntity):
-    """Sensor return offpeak status."""
+    """Sensor return offpeak status.
+
+    The contract's offpeak hours are compiled into a table of daily
+    transitions (see offpeak_transitions) whenever they change, and a single
+    timer fires at the next one, so state is only written when it flips.
+    """
 
     _attr_name = "Offpeak hours"
     _attr_has_entity_name = True
@@ -91,52 +123,92 @@ class OffpeakSensor(CoordinatorEntity[EnedisDataUpdateCoordinator], BinarySensor
         super().__init__(coordinator)
         self._attr_unique_id = f"{coordinator.pdl}_offpeak_status"
         self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, coordinator.pdl)})
-        self._attr_available = coordinator.contract.get("offpeak_hours") is not None
-        self._attr_is_on = self._fetch_state()
+        self._offpeak_hours: str | None = None
+        self._transitions: list[tuple[time, bool]] = []
         self._unsubscribe: CALLBACK_TYPE | None = None
+        self._compile()
+        self._attr_is_on = self._fetch_state()
+        self._attr_extra_state_attributes = self._attributes()
+
+    @callback
+    def _compile(self) -> bool:
+        """Rebuild the transition table if the contract changed, tell if it did."""
+        self._attr_available = (
+            self.coordinator.contract.get("offpeak_hours") is not None
+        )
+        offpeak_hours = self.coordinator.contract.get("offpeak_hours") or ""
+        if offpeak_hours == self._offpeak_hours:
+            return False
+        self._offpeak_hours = offpeak_hours
+        self._transitions = offpeak_transitions(offpeak_hours)
+        return True
 
     @callback
     def _fetch_state(self) -> bool:
-        """Fetch state."""
-        # Format HC (1H30-8H00;12H30-14H00)
-        data = self.coordinator.contract.get("offpeak_hours", "")
-        ranges = re.findall(r"(\d{1,2}H\d{2})-(\d{1,2}H\d{2})", data)
-
-        def parse_heure(h_str: str) -> time:
-            """Convert string '8H00' to time object."""
-            h, m = h_str.replace("H", ":").split(":")
-            return time(int(h), int(m))
-
-        range_hours = [(parse_heure(d), parse_heure(f)) for d, f in ranges]
-        now = dt_util.now().time()
-
-        for debut, fin in range_hours:
-            if debut <= fin:
-                if debut <= now <= fin:
-                    return True
-            elif now >= debut or now <= fin:
-                return True
-        return False
+        """Return whether now falls in offpeak hours."""
+        if not self._transitions:
+            return False
+        moment = dt_util.now().time()
+        position = bisect_right(self._transitions, moment, key=lambda row: row[0])
+        # Before the first flip of the day, the last one of yesterday holds
+        return self._transitions[position - 1][1]
+
+    @callback
+    def _next_change(self) -> dt | None:
+        """Return when the state flips next, None if it never does."""
+        if not self._transitions:
+            return None
+        now = dt_util.now()
+        position = bisect_right(self._transitions, now.time(), key=lambda row: row[0])
+        day = dt_util.start_of_local_day(now)
+        if position == len(self._transitions):
+            position, day = 0, dt_util.start_of_local_day(day + timedelta(days=1))
+        change = self._transitions[position][0]
+        return day.replace(hour=change.hour, minute=change.minute)
+
+    @callback
+    def _attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        return {"next_change": self._next_change()}
 
     async def async_added_to_hass(self) -> None:
-        """Démarre la boucle d’auto-refresh local toutes les 10 min."""
+        """Schedule the next transition."""
         await super().async_added_to_hass()
-        self._unsubscribe = async_track_time_interval(
-            self.hass, self._hass_create_refresh_task, interval=timedelta(minutes=1)
+        self.async_on_remove(self._async_cancel)
+        self._async_schedule()
+
+    @callback
+    def _async_schedule(self) -> None:
+        """Fire at the next transition, replacing any timer pending."""
+        self._async_cancel()
+        if (next_change := self._attr_extra_state_attributes["next_change"]) is None:
+            return
+        self._unsubscribe = async_track_point_in_time(
+            self.hass, self._async_transition, next_change
         )
 
-    async def _hass_create_refresh_task(self, _: dt) -> None:
-        """Crée une tâche périodique de recalcul local."""
+    @callback
+    def _async_cancel(self) -> None:
+        """Cancel the pending transition."""
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    @callback
+    def _async_transition(self, _: dt) -> None:
+        """Flip the state and schedule the transition after."""
+        self._unsubscribe = None
         self._attr_is_on = self._fetch_state()
+        self._attr_extra_state_attributes = self._attributes()
         self.async_write_ha_state()
+        self._async_schedule()
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        changed = self._compile()
         self._attr_is_on = self._fetch_state()
+        self._attr_extra_state_attributes = self._attributes()
+        if changed:
+            self._async_schedule()
         super()._handle_coordinator_update()
-
-    async def async_unload(self) -> None:
-        """Unload the heartbeat."""
-        if self._unsubscribe is not None:
-            self._unsubscribe()
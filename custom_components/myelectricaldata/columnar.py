@@ -0,0 +1,117 @@
+"""Columnar cumulative-sum engine for MyElectricalData statistics.
+
+Rebuilds, legacy migration and imports all boil down to the same handful of
+operations over a statistic's rows: fill missing states with zero, order them
+chronologically, keep a time window and compute a running total carried over
+from an anchor. Doing that on NumPy arrays instead of looping over dicts keeps
+multi-year histories in the millisecond range; rows are only turned into
+StatisticData at the recorder boundary (see to_statistic_data).
+
+NumPy is declared in the manifest's requirements, left unpinned so Home
+Assistant's own constraint picks the version.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.util import dt as dt_util
+
+
+def _as_float(values: Iterable[Any]) -> np.ndarray:
+    """Return values as a float array, None and NaN filled with zero."""
+    return np.nan_to_num(np.array(list(values), dtype=float), nan=0.0)
+
+
+@dataclass(slots=True)
+class StatisticColumns:
+    """A statistic's rows as parallel arrays of UTC start timestamps, states, sums."""
+
+    starts: np.ndarray
+    states: np.ndarray
+    sums: np.ndarray
+
+    @classmethod
+    def from_pairs(cls, rows: Iterable[tuple[float, float | None]]) -> StatisticColumns:
+        """Build from (start timestamp, state) rows; sums are left at zero."""
+        rows = list(rows)
+        starts = np.array([row[0] for row in rows], dtype=float)
+        states = _as_float(row[1] for row in rows)
+        return cls(starts, states, np.zeros_like(states))
+
+    @classmethod
+    def from_records(
+        cls, records: list[dict[str, Any]], state_key: str, sum_key: str
+    ) -> StatisticColumns:
+        """Build from collected rows (dicts holding a tz-aware "date")."""
+        starts = np.array([record["date"].timestamp() for record in records], float)
+        states = _as_float(record.get(state_key) for record in records)
+        sums = _as_float(record.get(sum_key) for record in records)
+        return cls(starts, states, sums)
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return len(self.starts)
+
+    @property
+    def last_sum(self) -> float:
+        """Return the running total of the last row."""
+        return float(self.sums[-1])
+
+    def sorted(self) -> StatisticColumns:
+        """Return the rows in chronological order."""
+        order = np.argsort(self.starts, kind="stable")
+        return StatisticColumns(
+            self.starts[order], self.states[order], self.sums[order]
+        )
+
+    def mask(self, keep: np.ndarray) -> StatisticColumns:
+        """Return the rows where keep is True."""
+        return StatisticColumns(self.starts[keep], self.states[keep], self.sums[keep])
+
+    def nonzero(self) -> StatisticColumns:
+        """Return the rows that actually carry a state."""
+        return self.mask(self.states != 0)
+
+    def window(
+        self, start: float | None = None, end: float | None = None
+    ) -> StatisticColumns:
+        """Return the rows starting in [start, end) of chronologically sorted rows."""
+        first = 0 if start is None else int(np.searchsorted(self.starts, start, "left"))
+        last = (
+            len(self) if end is None else int(np.searchsorted(self.starts, end, "left"))
+        )
+        return StatisticColumns(
+            self.starts[first:last], self.states[first:last], self.sums[first:last]
+        )
+
+    def states_at(self, starts: np.ndarray) -> np.ndarray:
+        """Return the state of the rows starting at starts, zero where none does."""
+        if not len(self):
+            return np.zeros(len(starts))
+        position = np.minimum(np.searchsorted(self.starts, starts), len(self) - 1)
+        return np.where(self.starts[position] == starts, self.states[position], 0.0)
+
+    def cumsum(self, anchor: float = 0.0) -> StatisticColumns:
+        """Return the rows with sums recomputed as a running total from anchor."""
+        return StatisticColumns(
+            self.starts, self.states, anchor + np.cumsum(self.states)
+        )
+
+    def to_statistic_data(self) -> list[StatisticData]:
+        """Convert to recorder rows."""
+        return [
+            StatisticData(
+                start=dt_util.utc_from_timestamp(start), state=state, sum=summary
+            )
+            for start, state, summary in zip(
+                self.starts.tolist(),
+                self.states.tolist(),
+                self.sums.tolist(),
+                strict=True,
+            )
+        ]
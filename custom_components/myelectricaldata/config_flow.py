@@ -12,8 +12,11 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_TOKEN
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.selector import (
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
     SelectOptionDict,
     SelectSelector,
     SelectSelectorConfig,
@@ -25,11 +28,14 @@ from myelectricaldatapy import Enedis, EnedisException
 
 from .const import (
     CONF_AUTH,
+    CONF_CACHE_TTL,
     CONF_CONSUMPTION,
+    CONF_CRAWL,
     CONF_ECOWATT,
     CONF_INTERVALS,
     CONF_PDL,
     CONF_PRODUCTION,
+    CONF_REPRICE,
     CONF_RULE_DELETE,
     CONF_RULE_END_TIME,
     CONF_RULE_ID,
@@ -39,6 +45,7 @@ from .const import (
     CONF_TEMPO,
     CONSUMPTION_DAILY,
     CONSUMPTION_DETAIL,
+    DEFAULT_CACHE_TTL,
     DEFAULT_CONSUMPTION_TEMPO,
     DOMAIN,
     PRODUCTION_DAILY,
@@ -88,7 +95,7 @@ class MyElectricalFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             self._async_abort_entries_match({CONF_PDL: user_input[CONF_PDL]})
             api = Enedis(
                 token=user_input[CONF_TOKEN],
-                session=async_create_clientsession(self.hass),
+                session=async_get_clientsession(self.hass),
                 timeout=30,
             )
             try:
@@ -161,6 +168,21 @@ class MyElectricalDataOptionsFlowHandler(config_entries.OptionsFlow):
                     CONF_TEMPO,
                     default=self._data[step_id].get(CONF_TEMPO, False),
                 ): bool,
+                vol.Required(
+                    CONF_REPRICE,
+                    default=self._data[step_id].get(CONF_REPRICE, False),
+                ): bool,
+                vol.Required(
+                    CONF_CACHE_TTL,
+                    default=self._data[step_id].get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL),
+                ): NumberSelector(
+                    NumberSelectorConfig(
+                        min=0,
+                        max=168,
+                        mode=NumberSelectorMode.BOX,
+                        unit_of_measurement="h",
+                    )
+                ),
             }
         )
         if user_input is not None:
@@ -188,10 +210,18 @@ class MyElectricalDataOptionsFlowHandler(config_entries.OptionsFlow):
                         translation_key="production_choice",
                     )
                 ),
+                vol.Required(
+                    CONF_CRAWL, default=self._data[step_id].get(CONF_CRAWL, False)
+                ): bool,
             }
         )
         if user_input is not None:
-            self._data[step_id].update({CONF_SERVICE: user_input.get(CONF_SERVICE)})
+            self._data[step_id].update(
+                {
+                    CONF_SERVICE: user_input.get(CONF_SERVICE),
+                    CONF_CRAWL: user_input.get(CONF_CRAWL, False),
+                }
+            )
             return await self.async_step_init()
         return self.async_show_form(
             step_id=step_id, data_schema=schema, last_step=False
@@ -222,10 +252,18 @@ class MyElectricalDataOptionsFlowHandler(config_entries.OptionsFlow):
                         translation_key="interval_key",
                     )
                 ),
+                vol.Required(
+                    CONF_CRAWL, default=self._data[step_id].get(CONF_CRAWL, False)
+                ): bool,
             }
         )
         if user_input is not None:
-            self._data[step_id].update({CONF_SERVICE: user_input.get(CONF_SERVICE)})
+            self._data[step_id].update(
+                {
+                    CONF_SERVICE: user_input.get(CONF_SERVICE),
+                    CONF_CRAWL: user_input.get(CONF_CRAWL, False),
+                }
+            )
             if sel_interval := user_input.get(CONF_INTERVALS):
                 return await self.async_step_rules(None, sel_interval, step_id)
             return await self.async_step_init()
@@ -339,6 +377,7 @@ def default_settings(data: dict[str, Any]):
         data[CONF_CONSUMPTION] = {
             CONF_SERVICE: CONSUMPTION_DETAIL,
             CONF_INTERVALS: DEFAULT_CONSUMPTION_TEMPO[CONF_INTERVALS],
+            CONF_CRAWL: consumption.get(CONF_CRAWL, False),
         }
 
     return data
@@ -1,7 +1,9 @@
 """Constants for the Enedis integration."""
 CLEAR_SERVICE = "clear_data"
 CONF_AUTH = "authentication"
+CONF_CACHE_TTL = "cache_ttl"
 CONF_CONSUMPTION = "consumption"
+CONF_CRAWL = "crawl_history"
 CONF_ECOWATT = "ecowatt"
 CONF_END_DATE = "end_date"
 CONF_ENTRY = "entry"
@@ -9,6 +11,7 @@ CONF_PDL = "pdl"
 CONF_POWER_MODE = "power_mode"
 CONF_INTERVALS = "intervals"
 CONF_PRODUCTION = "production"
+CONF_REPRICE = "reprice_on_change"
 CONF_RULE_DELETE = "rule_delete"
 CONF_RULE_END_TIME = "rule_end_time"
 CONF_RULE_ID = "rule_id"
@@ -17,6 +20,7 @@ CONF_RULE_START_TIME = "rule_start_time"
 CONF_SERVICE = "service"
 CONF_START_DATE = "start_date"
 CONF_STATISTIC_ID = "statistic_id"
+CONF_TARIFF = "tariff"
 CONF_TEMPO = "tempo"
 CONSUMPTION_DAILY = "daily_consumption"
 CONSUMPTION_DETAIL = "consumption_load_curve"
@@ -28,18 +32,24 @@ CONF_RED = "red"
 CONF_WHITE = "white"
 CONF_STD = "standard"
 CONF_OFFPEAK = "offpeak"
+DEFAULT_CACHE_TTL = 24
 DEFAULT_CC_PRICE = 0.1740
 DEFAULT_HC_PRICE = 0.1470
 DEFAULT_HP_PRICE = 0.1841
 DEFAULT_PC_PRICE = 0.06
 DOMAIN = "myelectricaldata"
 FETCH_SERVICE = "fetch_data"
+FLUSH_SERVICE = "flush_data"
+MIGRATE_SERVICE = "migrate_data"
 MANUFACTURER = "Enedis"
 PLATFORMS = ["sensor", "binary_sensor", "number"]
 PRODUCTION_DAILY = "daily_production"
 PRODUCTION_DETAIL = "production_load_curve"
 REBUILD_SERVICE = "rebuild_data"
+REPRICE_SERVICE = "reprice_data"
 SAVE = "save"
+TARIFF_SERVICE = "set_tariff"
+STORAGE_VERSION = 1
 URL = "https://myelectricaldata.fr"
 DEFAULT_CONSUMPTION_TEMPO = {
     CONF_PRICINGS: {
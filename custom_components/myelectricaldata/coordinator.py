@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import date, timedelta
 from datetime import datetime as dt
@@ -9,45 +10,71 @@ from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_TOKEN
-from homeassistant.core import Event, HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
-from myelectricaldatapy import EnedisByPDL, EnedisException, LimitReached
+from myelectricaldatapy import Enedis, EnedisByPDL, EnedisException, LimitReached
 
+from .backfill import DETAIL_WINDOW, BackfillQueue
 from .const import (
     CONF_AUTH,
+    CONF_CACHE_TTL,
     CONF_CONSUMPTION,
     CONF_ECOWATT,
     CONF_INTERVALS,
     CONF_PDL,
     CONF_PRODUCTION,
+    CONF_REPRICE,
     CONF_RULE_END_TIME,
     CONF_RULE_START_TIME,
     CONF_SERVICE,
     CONF_TEMPO,
+    CONSUMPTION_DAILY,
     CONSUMPTION_DETAIL,
+    DEFAULT_CACHE_TTL,
     DOMAIN,
     PRODUCTION_DETAIL,
+    STORAGE_VERSION,
 )
+from .crawler import HistoryCrawler
+from .endpoints import ACCESS, CONTRACT, EndpointCache, EndpointSession
+from .feeds import national_feeds
 from .helpers import (
-    async_get_db_infos,
-    async_get_last_infos,
+    StatisticsCache,
+    StatisticsImportQueue,
+    StatisticsRebuilder,
+    async_gather_limited,
     async_import_sensor_statistics,
     async_migrate_legacy_statistics,
     async_reassert_statistics,
+    async_reprice_statistics,
     build_price_items,
     build_sensor_items,
     next_date,
     read_prices,
+    split_db_infos,
 )
+from .quota import estimate_calls, quota_budget
+from .scheduler import RefreshScheduler
+from .tariffs import TariffHistory
+from .tempo import async_subscribe_tempo, tempo_calendar
 
 SCAN_INTERVAL = timedelta(hours=1)
-RETRY = 3
+# Delay letting several tariff versions be recorded in a row before repricing,
+# in seconds.
+REPRICE_COOLDOWN = 30
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def migration_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store remembering which statistics were already migrated."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.migration")
+
+
 class EnedisDataUpdateCoordinator(DataUpdateCoordinator):
     """Define an object to fetch data."""
 
@@ -56,33 +83,109 @@ class EnedisDataUpdateCoordinator(DataUpdateCoordinator):
         self.entry = entry
         self.access: dict[str, Any] = {}
         self.contract: dict[str, Any] = {}
-        self.ecowatt_day: str | None = None
         self.ecowatt: dict[str, Any] = {}
         self.last_access: dt | None = None
         self.last_refresh: date | None = None
         self.last_stat: dt | None = None
         self.pdl: str = entry.data[CONF_PDL]
         self.price_items: list[dict[str, Any]] = []
+        self.sensor_items: list[dict[str, Any]] = []
+        self.tariffs = TariffHistory(hass, entry.entry_id)
         self._known_sums: dict[str, tuple[dt | None, float, str]] = {}
-        self._migrated_legacy_stats = False
-        self.tempo_day: str | None = None
+        self.stats_cache = StatisticsCache(hass)
+        self.import_queue = StatisticsImportQueue(hass, self.stats_cache)
+        # Held by whatever writes this entry's statistics (refresh, reassert,
+        # backfill and crawler imports, rebuilds), so they never interleave.
+        self.lock = asyncio.Lock()
+        self.rebuilder = StatisticsRebuilder(
+            hass, entry.entry_id, self.lock, self._async_rebuilt
+        )
+        self._migration_store = migration_store(hass, entry.entry_id)
+        self._migrated: set[str] = set()
         self.tempo: dict[str, Any] = {}
-        self.retry: int = RETRY
+        self.tempo_calendar = tempo_calendar(hass)
+        self.feeds = national_feeds(hass)
+        self.scheduler = RefreshScheduler(hass, entry.entry_id)
+        self.quota = quota_budget(hass, entry.options[CONF_AUTH][CONF_TOKEN])
+        self.endpoints = EndpointCache(
+            hass,
+            entry.entry_id,
+            timedelta(
+                hours=entry.options[CONF_AUTH].get(CONF_CACHE_TTL, DEFAULT_CACHE_TTL)
+            ),
+        )
+        self.statistics_corrections: int = 0
+        self.backfill = BackfillQueue(hass, entry, self)
+        self.crawler = HistoryCrawler(hass, entry, self)
+        self.session = async_get_clientsession(hass)
+        self._reprice_since: dt | None = None
+        self._reprice_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=REPRICE_COOLDOWN,
+            immediate=False,
+            function=self._async_reprice_pending,
+        )
 
         super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
 
     async def _async_setup(self) -> None:
         """Set up the coordinator."""
+        if (stored := await self._migration_store.async_load()) is not None:
+            self._migrated = set(stored.get("migrated", []))
+        await self.scheduler.async_load()
+        await self.backfill.async_load()
+        await self.crawler.async_load()
+        await self.rebuilder.async_load()
+        await self.tariffs.async_load()
+        await self.tempo_calendar.async_load()
+        await self.endpoints.async_load()
+        # Entities set up before the first refresh ends render from the cache
+        self.access = self.endpoints.get(ACCESS) or {}
+        if self.endpoints.get(CONTRACT) is not None:
+            self.contract = await Enedis(
+                self.entry.options[CONF_AUTH][CONF_TOKEN], self.create_session()
+            ).async_get_contract(self.pdl)
         try:
-            self.api = EnedisByPDL(
-                pdl=self.pdl,
-                token=self.entry.options[CONF_AUTH][CONF_TOKEN],
-                session=async_create_clientsession(self.hass),
-                timeout=30,
-            )
+            self.api = self.create_client()
         except EnedisException as error:
             raise UpdateFailed(f"Error to setup coordinator: {error}") from error
 
+    @property
+    def tempo_day(self) -> str | None:
+        """Return today's Tempo colour, from the shared feed."""
+        if not self.entry.options.get(CONF_AUTH, {}).get(CONF_TEMPO):
+            return None
+        return self.feeds.tempo.today
+
+    @property
+    def ecowatt_day(self) -> dict[str, Any]:
+        """Return today's EcoWatt signal, from the shared feed."""
+        if not self.entry.options.get(CONF_AUTH, {}).get(CONF_ECOWATT):
+            return {}
+        return self.feeds.ecowatt.today
+
+    def create_session(self) -> EndpointSession:
+        """Return a session for one API client, over the shared one."""
+        return EndpointSession(self.session, self.pdl, self.endpoints)
+
+    def create_client(self, session: EndpointSession | None = None) -> EnedisByPDL:
+        """Return a new API client sharing the coordinator's session.
+
+        The refresh, its catch-up, the backfill queue and the history crawler
+        all go through Home Assistant's shared HTTP session, so their calls
+        reuse the same keep-alive connections instead of opening a pool each.
+        Their contract, address and access come from the endpoint cache, and
+        their failed requests are recorded, by session (see EndpointSession),
+        a new one unless given.
+        """
+        return EnedisByPDL(
+            pdl=self.pdl,
+            token=self.entry.options[CONF_AUTH][CONF_TOKEN],
+            session=session or self.create_session(),
+            timeout=30,
+        )
+
     async def async_handle_hourly_statistics(self, _event: Event) -> None:
         """Re-assert our tracked cumulative sums after HA's native compiler runs.
 
@@ -91,23 +194,180 @@ class EnedisDataUpdateCoordinator(DataUpdateCoordinator):
         source="recorder"). HA's own sensor/recorder.py compiler also generates
         "sum" statistics for any entity with a state_class, purely from its live
         state history - independently of, and racing with, our explicit import.
-        Reasserting our last known-good sum right after each hourly compile
-        (EVENT_RECORDER_HOURLY_STATISTICS_GENERATED) overwrites whatever the
-        native compiler just wrote for the current hour with our own value.
+        Right after each hourly compile (EVENT_RECORDER_HOURLY_STATISTICS_GENERATED)
+        the freshly compiled sums are compared with our own last known-good
+        ones and only those that diverged get overwritten. The running count
+        of such corrections is exposed as a diagnostic attribute.
+        """
+        async with self.lock:
+            corrections = await async_reassert_statistics(
+                self.hass, self._known_sums, self.import_queue
+            )
+        if corrections:
+            self.statistics_corrections += corrections
+            self.async_update_listeners()
+
+    @callback
+    def _async_rebuilt(self, statistic_ids: list[str]) -> None:
+        """Forget what's known of statistics whose sums were just rewritten."""
+        self.stats_cache.invalidate(statistic_ids)
+        for statistic_id in statistic_ids:
+            # Stale known-good sums would revert the rebuild at the next reassert
+            self._known_sums.pop(statistic_id, None)
+
+    async def async_reprice(
+        self, start: dt | None = None, end: dt | None = None
+    ) -> None:
+        """Recompute the cost statistics from the stored energy and tariffs.
+
+        Covers the rows starting in [start, end), the whole history by
+        default, each row priced from the tariff history, or at the live
+        tariff for those without one (see helpers.async_reprice_statistics).
+        Sums past the range are rebuilt right after, so the Energy dashboard
+        has no seam.
+        """
+        dirty: list[tuple[list[dict[str, Any]], dt]] = []
+        tempo = bool(self.entry.options.get(CONF_AUTH, {}).get(CONF_TEMPO))
+        async with self.lock:
+            for mode in dict.fromkeys(item["mode"] for item in self.sensor_items):
+                mode_items = [i for i in self.sensor_items if i["mode"] == mode]
+                prices = read_prices(
+                    self.hass, [i for i in self.price_items if i["mode"] == mode]
+                )
+                if (
+                    dirty_from := await async_reprice_statistics(
+                        self.hass,
+                        mode_items,
+                        prices,
+                        start,
+                        end,
+                        self.import_queue,
+                        self.tariffs,
+                        self.tempo_calendar if tempo else None,
+                    )
+                ) is not None:
+                    dirty.append(
+                        ([i for i in mode_items if i["kind"] == "cost"], dirty_from)
+                    )
+            await self.import_queue.async_flush()
+
+        if not dirty:
+            return
+        self._async_rebuilt([item["entity_id"] for items, _ in dirty for item in items])
+        for items, dirty_from in dirty:
+            await self.rebuilder.async_rebuild(items, dirty_from)
+        await self.async_request_refresh()
+
+    async def async_request_reprice(self, since: dt) -> None:
+        """Reprice from since shortly after a dated tariff version, if opted in.
+
+        Requests within the cooldown are merged into one reprice from the
+        earliest of their dates.
         """
-        await async_reassert_statistics(self.hass, self._known_sums)
+        if not self.entry.options.get(CONF_AUTH, {}).get(CONF_REPRICE):
+            return
+        if self._reprice_since is None or since < self._reprice_since:
+            self._reprice_since = since
+        await self._reprice_debouncer.async_call()
+
+    async def _async_reprice_pending(self) -> None:
+        """Run the reprice requested by async_request_reprice."""
+        since, self._reprice_since = self._reprice_since, None
+        await self.async_reprice(since)
+
+    async def async_shutdown(self) -> None:
+        """Cancel any pending reprice."""
+        await super().async_shutdown()
+        self._reprice_debouncer.async_shutdown()
+
+    async def async_reset_migrations(self) -> None:
+        """Forget completed legacy migrations so the next refresh re-runs them."""
+        self._migrated.clear()
+        await self._migration_store.async_save({"migrated": []})
+
+    async def _async_catch_up(
+        self,
+        service: str,
+        intervals: list[Any],
+        prices: dict[str, Any],
+        mode_items: list[dict[str, Any]],
+        tempo: bool,
+    ) -> dt | None:
+        """Collect the load curve windows still missing up to now.
+
+        The main refresh collects a single 7-day window per mode, so after an
+        outage of several weeks the load curve would only catch up one week
+        per day. As long as the next window ends before now, it is collected
+        right away with its own client and imported as it arrives (which
+        advances the write-through cache the next window starts from), as far
+        as the quota left beyond every scheduled refresh allows. Returns the
+        earliest hour imported.
+
+        Modes catch up concurrently, so their calls are charged to the quota
+        before being made, and never both fit the same spare calls.
+        """
+        dirty_from: dt | None = None
+        ids = [item["entity_id"] for item in mode_items]
+        while True:
+            db_infos = await self.stats_cache.async_get(ids)
+            dt_start, cum_values, cum_prices = split_db_infos(mode_items, db_infos)
+            start = next_date(dt_start, service)
+            if (end := start + DETAIL_WINDOW) > dt_util.now().replace(tzinfo=None):
+                return dirty_from
+            colors = self.tempo_calendar.between(start, end) if tempo else None
+            calls = estimate_calls(service, start, end) + int(tempo and colors is None)
+            if not self.quota.can_spend(calls):
+                _LOGGER.debug("Catch-up of %s paused at %s (quota)", service, start)
+                return dirty_from
+            self.quota.spend(calls)
+
+            client = self.create_client()
+            client.set_collects(
+                service=service,
+                start=start,
+                end=end,
+                intervals=intervals,
+                prices=prices,
+                cum_value=cum_values,
+                cum_price=cum_prices,
+            )
+            if tempo:
+                async_subscribe_tempo(client, colors)
+            try:
+                await client.async_update_collects()
+            except EnedisException as error:
+                _LOGGER.debug("Catch-up of %s stopped at %s: %s", service, start, error)
+                return dirty_from
+            if tempo:
+                await self.tempo_calendar.async_update(client.tempo)
+
+            # Only the import holds the write lock, never the fetch before it
+            async with self.lock:
+                imported = await async_import_sensor_statistics(
+                    self.hass,
+                    mode_items,
+                    client.stats,
+                    self.import_queue,
+                    self.tariffs,
+                    self.tempo_calendar if tempo else None,
+                )
+                await self.import_queue.async_flush()
+            if imported is None:
+                return dirty_from
+            _LOGGER.debug("Caught up %s from %s to %s", service, start, end)
+            if dirty_from is None or imported < dirty_from:
+                dirty_from = imported
 
     async def _async_update_data(self) -> dict[str, Any]:
         """Update data via API."""
         options = self.entry.options
+        token = options[CONF_AUTH][CONF_TOKEN]
         tempo = bool(options.get(CONF_AUTH, {}).get(CONF_TEMPO))
-        # Get tempo day
+        # Tempo and EcoWatt are national, fetched once for every entry
         if tempo:
-            self.api.tempo_subscription(True)
-
-        # Get ecowatt information
+            await self.feeds.tempo.async_refresh(token, self.entry.entry_id)
         if options.get(CONF_AUTH, {}).get(CONF_ECOWATT):
-            self.api.ecowatt_subscription(True)
+            await self.feeds.ecowatt.async_refresh(token, self.entry.entry_id)
 
         dict_opts = dict(
             filter(
@@ -121,6 +381,7 @@ class EnedisDataUpdateCoordinator(DataUpdateCoordinator):
 
         items: list[dict[str, Any]] = []
         price_items: list[dict[str, Any]] = []
+        collects: list[tuple[str, list[Any], dict[str, Any], list[dict[str, Any]]]] = []
         for mode, opt in dict_opts.items():
             service = opt.get(CONF_SERVICE)
             intervals = [
@@ -138,38 +399,65 @@ class EnedisDataUpdateCoordinator(DataUpdateCoordinator):
             mode_items = build_sensor_items(
                 mode, self.pdl, service, intervals, has_price=bool(prices)
             )
-            if not self._migrated_legacy_stats:
-                await async_migrate_legacy_statistics(self.hass, mode_items)
-            dt_start, cum_values, cum_prices = await async_get_last_infos(
-                self.hass, mode_items
-            )
+            collects.append((service, intervals, prices, mode_items))
+            items.extend(mode_items)
+            price_items.extend(mode_price_items)
 
+        # Legacy migration state is persisted per statistic_id, so it's only
+        # ever probed for statistics that never went through it, not again on
+        # every restart or options reload.
+        if pending := [i for i in items if i["entity_id"] not in self._migrated]:
+            async with self.lock:
+                await async_migrate_legacy_statistics(
+                    self.hass, pending, self.import_queue
+                )
+            self._migrated.update(item["entity_id"] for item in pending)
+            await self._migration_store.async_save({"migrated": sorted(self._migrated)})
+
+        # One recorder job for every bucket of every mode the first time, then
+        # served from the write-through cache on every following refresh.
+        db_infos = await self.stats_cache.async_get(item["entity_id"] for item in items)
+        collect_calls = 0
+        now = dt_util.now().replace(tzinfo=None)
+        for service, intervals, prices, mode_items in collects:
+            dt_start, cum_values, cum_prices = split_db_infos(mode_items, db_infos)
+
+            start = next_date(dt_start, service)
             end = None
             if service in [CONSUMPTION_DETAIL, PRODUCTION_DETAIL]:
-                end = next_date(dt_start, service) + timedelta(days=7)
+                end = start + DETAIL_WINDOW
+            collect_calls += estimate_calls(service, start, end)
 
             self.api.set_collects(
                 service=service,
-                start=next_date(dt_start, service),
+                start=start,
                 end=end,
                 intervals=intervals,
                 prices=prices,
                 cum_value=cum_values,
                 cum_price=cum_prices,
             )
-            items.extend(mode_items)
-            price_items.extend(mode_price_items)
+            if tempo and service in [CONSUMPTION_DAILY, CONSUMPTION_DETAIL]:
+                # No row goes past today, whose colour the Tempo feed keeps
+                colors = self.tempo_calendar.between(start, min(end or now, now))
+                async_subscribe_tempo(self.api, colors)
+                collect_calls += int(colors is None)
 
         self.price_items = price_items
-        self._migrated_legacy_stats = True
+        self.sensor_items = items
 
-        force_refresh = (
-            (self.retry != 0)
-            and self.last_stat is not None
-            and (self.last_stat.date() != dt_util.now().date())
-        )
+        # Re-collect within the day only while its data is due and not in yet,
+        # and only if the token's quota can still afford it.
+        refresh_calls = self.endpoints.missing() + collect_calls
+        force_refresh = self.scheduler.expects_data(dt_util.now())
+        if force_refresh and not self.quota.can_spend(
+            refresh_calls, self.entry.entry_id
+        ):
+            _LOGGER.warning("Quota too low to refresh data, retrying later")
+            force_refresh = False
 
         # Refresh Api data
+        last_refresh = self.api.last_refresh
         try:
             await self.api.async_update(force_refresh=force_refresh)
             _LOGGER.debug("Refresh data: %s", self.api.last_refresh)
@@ -177,27 +465,61 @@ class EnedisDataUpdateCoordinator(DataUpdateCoordinator):
             _LOGGER.error("Limit reached: %s", error)
         except EnedisException as error:
             _LOGGER.error("Error to update data: %s", error)
+        finally:
+            fetched = self.endpoints.pop_fetched()
+            if ACCESS in fetched:
+                # call_number already counts the valid_access call itself
+                self.quota.update_from_access(self.api.access)
+            self.quota.spend(len(fetched) - int(ACCESS in fetched))
+            if self.api.last_refresh != last_refresh:
+                self.quota.spend(collect_calls)
+        if tempo:
+            await self.tempo_calendar.async_update(self.api.tempo)
+
+        # A backfill window or rebuild in flight finishes before this import
+        async with self.lock:
+            # Import statistics directly onto their own sensor entity
+            dirty_from = await self.entry.async_create_task(
+                self.hass,
+                async_import_sensor_statistics(
+                    self.hass,
+                    items,
+                    self.api.stats,
+                    self.import_queue,
+                    self.tariffs,
+                    self.tempo_calendar if tempo else None,
+                ),
+                "statistics",
+            )
+            # Every row of this cycle goes to the recorder in one job, which
+            # also advances the write-through cache read just below.
+            await self.import_queue.async_flush()
 
-        # Import statistics directly onto their own sensor entity
-        await self.entry.async_create_task(
-            self.hass,
-            async_import_sensor_statistics(self.hass, items, self.api.stats),
-            "statistics",
+        # Consumption and production are independent streams, so a dual PDL
+        # catches up in about the time of its slowest one. Each window takes
+        # the write lock for its import only, not across its fetch.
+        caught_up = await async_gather_limited(
+            self._async_catch_up(
+                service,
+                intervals,
+                prices,
+                mode_items,
+                tempo=tempo and service == CONSUMPTION_DETAIL,
+            )
+            for service, intervals, prices, mode_items in collects
+            if service in [CONSUMPTION_DETAIL, PRODUCTION_DETAIL]
         )
+        dirty_from = dirty_from or min(filter(None, caught_up), default=None)
 
         self.access = self.api.access
         self.contract = self.api.contract
-        self.tempo_day = self.api.tempo_day
-        self.ecowatt_day = self.api.ecowatt_day
         self.last_access = self.api.last_access
         self.last_refresh = self.api.last_refresh
-        self.retry -= 1
 
+        db_infos = await self.stats_cache.async_get(item["entity_id"] for item in items)
         sensors_data = {}
         for item in items:
-            summary, self.last_stat = await async_get_db_infos(
-                self.hass, item["entity_id"]
-            )
+            summary, self.last_stat = db_infos[item["entity_id"]]
             self._known_sums[item["entity_id"]] = (
                 self.last_stat,
                 float(summary),
@@ -207,4 +529,31 @@ class EnedisDataUpdateCoordinator(DataUpdateCoordinator):
         _LOGGER.debug(
             "[sensors_data] %s, last collect: %s", sensors_data, self.last_stat
         )
+
+        now = dt_util.now()
+        # A day is published for the whole PDL at once. Cost rows and tariff
+        # buckets or modes without energy that day (zero rows aren't stored)
+        # lag behind, so freshness follows the latest energy statistic.
+        await self.scheduler.async_record(
+            now,
+            max(
+                (
+                    last
+                    for item in items
+                    if item["kind"] == "energy"
+                    and (last := db_infos[item["entity_id"]][1])
+                ),
+                default=None,
+            ),
+            sum(map(len, self.api.stats.values())) if dirty_from else 0,
+        )
+        self.update_interval = self.scheduler.next_interval(now)
+        self.quota.reserve(
+            self.entry.entry_id,
+            refresh_calls if self.scheduler.fresh_day != now.date() else 0,
+        )
+        _LOGGER.debug("Next refresh in %s", self.update_interval)
+
+        # Older history only ever gets the quota left once all of the above ran
+        self.crawler.async_start()
         return sensors_data
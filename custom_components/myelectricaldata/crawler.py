@@ -0,0 +1,206 @@
+"""Background reverse-history crawler for MyElectricalData."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime as dt
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from myelectricaldatapy import EnedisException, LimitReached
+
+from .backfill import collect_window, prepare_collect, uses_tempo
+from .const import (
+    CONF_CONSUMPTION,
+    CONF_CRAWL,
+    CONF_PRODUCTION,
+    CONF_SERVICE,
+    DOMAIN,
+    STORAGE_VERSION,
+)
+from .helpers import async_get_first_start, async_import_sensor_statistics
+from .quota import estimate_calls
+from .tempo import async_subscribe_tempo
+
+if TYPE_CHECKING:
+    from .coordinator import EnedisDataUpdateCoordinator
+
+# Consecutive empty windows, each older than the last, after which the history
+# is considered complete. Only answers without any failed request count; a
+# single one may be a gap.
+EMPTY_WINDOWS = 2
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def crawler_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding an entry's crawl positions."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.crawler")
+
+
+class HistoryCrawler:
+    """Fill in the history older than what's stored, one window at a time.
+
+    Opt-in per mode (CONF_CRAWL option). Starting from the earliest hour
+    stored for a mode, windows of the longest range a single API call accepts
+    are collected backwards, only with the quota left beyond every scheduled
+    refresh and never while a fetch_data backfill is queued. The crawl stops
+    for good once Enedis has answered EMPTY_WINDOWS windows in a row with
+    nothing (a request that failed doesn't count, the window is retried; an
+    empty one is stepped over, in case it is a gap) or once the contract's
+    activation date is reached. Positions are persisted, so the full history
+    fills in over several days. Each crawl session ends by marking its
+    statistics dirty from the earliest hour it imported.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        coordinator: EnedisDataUpdateCoordinator,
+    ) -> None:
+        """Initialize the crawler."""
+        self.hass = hass
+        self.entry = entry
+        self.coordinator = coordinator
+        self.state: dict[str, dict[str, Any]] = {}
+        self._store = crawler_store(hass, entry.entry_id)
+        self._task: asyncio.Task[None] | None = None
+
+    async def async_load(self) -> None:
+        """Restore the crawl positions."""
+        if (stored := await self._store.async_load()) is not None:
+            self.state = stored.get("modes", {})
+
+    @callback
+    def async_start(self) -> None:
+        """Crawl in the background, unless already crawling or nothing to do."""
+        if self._task is not None and not self._task.done():
+            return
+        if not any(
+            options.get(CONF_CRAWL) and options.get(CONF_SERVICE)
+            for mode, options in self.entry.options.items()
+            if mode in [CONF_PRODUCTION, CONF_CONSUMPTION]
+        ):
+            return
+        self._task = self.entry.async_create_background_task(
+            self.hass, self._async_run(), f"{DOMAIN} history crawler"
+        )
+
+    async def _async_run(self) -> None:
+        """Crawl every opted-in mode as far as today's spare quota goes."""
+        for mode in [CONF_CONSUMPTION, CONF_PRODUCTION]:
+            options = self.entry.options.get(mode, {})
+            if not options.get(CONF_CRAWL) or not (
+                service := options.get(CONF_SERVICE)
+            ):
+                continue
+            state = self.state.get(mode, {})
+            if state.get(CONF_SERVICE) != service:
+                state = {CONF_SERVICE: service, "cursor": None, "empty": 0}
+                self.state[mode] = state
+            if not state.get("done"):
+                await self._async_crawl(state)
+
+    async def _async_crawl(self, state: dict[str, Any]) -> None:
+        """Crawl one mode backwards until out of quota or out of history."""
+        service = state[CONF_SERVICE]
+        intervals, prices, items = prepare_collect(self.hass, self.entry, state)
+        tempo = (
+            self.coordinator.tempo_calendar if uses_tempo(self.entry, state) else None
+        )
+        floor = self.coordinator.contract.get("last_activation_date")
+        dirty_from: dt | None = None
+        while True:
+            if state["cursor"] is None:
+                first = await async_get_first_start(
+                    self.hass,
+                    [item["entity_id"] for item in items if item["kind"] == "energy"],
+                )
+                if first is None:
+                    # Nothing stored yet, the regular refresh comes first
+                    break
+                state["cursor"] = first.replace(tzinfo=None).isoformat()
+
+            end = dt.fromisoformat(state["cursor"])
+            start = end - collect_window(service)
+            if floor and end.date().isoformat() <= floor[:10]:
+                state["done"] = True
+                break
+            colors = tempo.between(start, end) if tempo is not None else None
+            calls = estimate_calls(service, start, end) + int(
+                tempo is not None and colors is None
+            )
+            spare = self.coordinator.quota.can_spend(calls)
+            if self.coordinator.backfill.jobs or not spare:
+                break
+
+            session = self.coordinator.create_session()
+            client = self.coordinator.create_client(session)
+            client.set_collects(
+                service, start=start, end=end, intervals=intervals, prices=prices
+            )
+            if tempo is not None:
+                async_subscribe_tempo(client, colors)
+            collected = False
+            imported: dt | None = None
+            try:
+                await client.async_update_collects()
+                if collected := client.has_collected:
+                    if tempo is not None:
+                        await tempo.async_update(client.tempo)
+                    async with self.coordinator.lock:
+                        imported = await async_import_sensor_statistics(
+                            self.hass,
+                            items,
+                            client.stats,
+                            self.coordinator.import_queue,
+                            self.coordinator.tariffs,
+                            tempo,
+                        )
+                        await self.coordinator.import_queue.async_flush()
+            except LimitReached as error:
+                _LOGGER.debug("History crawl of %s paused: %s", service, error)
+                break
+            except EnedisException as error:
+                _LOGGER.debug("No %s data before %s: %s", service, end, error)
+            finally:
+                self.coordinator.quota.spend(calls)
+
+            if not collected:
+                if session.failures:
+                    # A swallowed 409, timeout or error says nothing about
+                    # the history: the same window is tried again next run
+                    _LOGGER.debug(
+                        "History crawl of %s paused at %s: %s",
+                        service,
+                        end,
+                        session.failures[-1],
+                    )
+                    break
+                # Step past the empty window, an outage may leave a gap
+                state["empty"] += 1
+                state["cursor"] = start.isoformat()
+                state["done"] = state["empty"] >= EMPTY_WINDOWS
+                await self._async_save()
+                if state["done"]:
+                    _LOGGER.info("History of %s complete from %s", service, end)
+                    break
+                continue
+            _LOGGER.debug("Crawled %s from %s to %s", service, start, end)
+            state["empty"] = 0
+            state["cursor"] = start.isoformat()
+            await self._async_save()
+            if imported is not None and (dirty_from is None or imported < dirty_from):
+                dirty_from = imported
+
+        await self._async_save()
+        if dirty_from is not None:
+            await self.coordinator.rebuilder.async_mark_dirty(items, dirty_from)
+
+    async def _async_save(self) -> None:
+        """Checkpoint the crawl positions."""
+        await self._store.async_save({"modes": self.state})
@@ -0,0 +1,201 @@
+"""Persisted cache of the slow-changing Enedis endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import datetime as dt
+from datetime import timedelta
+from typing import Any
+
+from aiohttp import ClientError, ClientResponse, ClientSession
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STORAGE_VERSION
+
+ACCESS = "access"
+ADDRESS = "address"
+CONTRACT = "contract"
+# Endpoints every refresh of the client asks for, valid_access first.
+ENDPOINTS = [ACCESS, CONTRACT, ADDRESS]
+# Cached endpoint of each API path, requested as <path>/<pdl>.
+ENDPOINT_PATHS = {"valid_access": ACCESS, "contracts": CONTRACT, "addresses": ADDRESS}
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def endpoint_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding an entry's cached endpoint payloads."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.endpoints")
+
+
+def _usable_access(access: Any) -> bool:
+    """Tell whether an access payload may be served again from the cache."""
+    return (
+        isinstance(access, dict)
+        and access.get("valid") is True
+        and not access.get("quota_reached")
+        and not access.get("ban")
+    )
+
+
+class EndpointCache:
+    """Payloads of the contract, address and valid_access endpoints.
+
+    The contract (subscribed power, offpeak hours, activation dates) and the
+    address almost never change, yet the client asks for them again every
+    day and on every forced refresh, three calls off a quota of a few dozen.
+    Each payload is kept here, across restarts, for ttl; valid_access for
+    the rest of the day at most, since the quota it reports resets at
+    midnight, and only while it grants access. Fetches that hit the API are
+    recorded (see pop_fetched), so their calls can be charged exactly.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, ttl: timedelta) -> None:
+        """Initialize an empty cache."""
+        self.hass = hass
+        self.ttl = ttl
+        self.entries: dict[str, dict[str, Any]] = {}
+        self._fetched: list[str] = []
+        self._store = endpoint_store(hass, entry_id)
+
+    async def async_load(self) -> None:
+        """Restore the cached payloads."""
+        if (stored := await self._store.async_load()) is not None:
+            self.entries = stored.get("entries", {})
+
+    @callback
+    def get(self, name: str) -> Any | None:
+        """Return the cached payload of name, None if missing or expired."""
+        if (entry := self.entries.get(name)) is None:
+            return None
+        if dt_util.now() >= dt.fromisoformat(entry["expires"]):
+            return None
+        return entry["payload"]
+
+    @callback
+    def missing(self) -> int:
+        """Return how many endpoints the next full refresh has to call."""
+        return sum(self.get(name) is None for name in ENDPOINTS)
+
+    @callback
+    def pop_fetched(self) -> list[str]:
+        """Return the endpoints called on the API since the last pop."""
+        fetched, self._fetched = self._fetched, []
+        return fetched
+
+    async def async_fetch(self, name: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the payload of name, from the cache while fresh."""
+        if (payload := self.get(name)) is not None:
+            return payload
+        self._fetched.append(name)
+        payload = await fetch()
+        if (expires := self._expiry(name, payload)) is not None:
+            self.entries[name] = {"expires": expires.isoformat(), "payload": payload}
+            await self._store.async_save({"entries": self.entries})
+        return payload
+
+    async def async_clear(self) -> None:
+        """Forget every payload, so the next refresh fetches them again."""
+        _LOGGER.debug("Endpoint cache cleared")
+        self.entries = {}
+        await self._store.async_remove()
+
+    def _expiry(self, name: str, payload: Any) -> dt | None:
+        """Return until when payload is served, None to not cache it."""
+        if self.ttl <= timedelta(0) or not payload:
+            return None
+        expires = dt_util.now() + self.ttl
+        if name == ACCESS:
+            if not _usable_access(payload):
+                return None
+            return min(expires, dt_util.start_of_local_day() + timedelta(days=1))
+        return expires
+
+
+class CachedResponse:
+    """Successful JSON response of an endpoint answered from the cache."""
+
+    status = 200
+    reason = "OK"
+
+    def __init__(self, payload: Any) -> None:
+        """Initialize the response."""
+        self.payload = payload
+        self.headers = {"Content-Type": "application/json"}
+
+    async def read(self) -> bytes:
+        """Return the body."""
+        return json.dumps(self.payload).encode()
+
+    def raise_for_status(self) -> None:
+        """Do nothing, only successful payloads are cached."""
+
+    async def json(self) -> Any:
+        """Return the payload."""
+        return self.payload
+
+    async def text(self) -> str:
+        """Return the body as text."""
+        return json.dumps(self.payload)
+
+
+class EndpointSession:
+    """HTTP session of one API client, over Home Assistant's shared one.
+
+    myelectricaldatapy clients make every request through the session they
+    are given. This one answers contract, address and valid_access requests
+    from the endpoint cache while it holds them, caching what the API
+    returns otherwise, and passes every other request through. It also
+    keeps the requests that failed, since EnedisByPDL swallows their errors
+    while collecting: a window it reports as not collected with no failed
+    request really is empty; otherwise it only failed, by quota, timeout or
+    error.
+    """
+
+    def __init__(self, session: ClientSession, pdl: str, cache: EndpointCache) -> None:
+        """Initialize the session."""
+        self.session = session
+        self.pdl = pdl
+        self.cache = cache
+        self.failures: list[str] = []
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> Any:
+        """Send a request, unless the cache answers it."""
+        *_, path, pdl = str(url).split("/")
+        if (
+            method.lower() != "get"
+            or pdl != self.pdl
+            or (name := ENDPOINT_PATHS.get(path)) is None
+        ):
+            return await self._async_send(method, url, **kwargs)
+
+        response: ClientResponse | None = None
+
+        async def fetch() -> Any:
+            nonlocal response
+            response = await self._async_send(method, url, **kwargs)
+            content_type = response.headers.get("Content-Type", "")
+            if response.status < 400 and "application/json" in content_type:
+                return await response.json()
+            return None
+
+        payload = await self.cache.async_fetch(name, fetch)
+        return response if response is not None else CachedResponse(payload)
+
+    async def _async_send(self, method: str, url: str, **kwargs: Any) -> ClientResponse:
+        """Send a request over the shared session, recording it if it fails."""
+        try:
+            response = await self.session.request(method, url, **kwargs)
+            # Read here, so a body cut short by the timeout counts as failed
+            await response.read()
+        except (ClientError, OSError, TimeoutError, asyncio.CancelledError) as error:
+            self.failures.append(f"{url}: {error!r}")
+            raise
+        if response.status >= 400:
+            self.failures.append(f"{url}: {response.status} {response.reason}")
+        return response
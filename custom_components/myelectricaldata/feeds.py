@@ -0,0 +1,195 @@
+"""National RTE feeds shared by every MyElectricalData entry."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime as dt
+from datetime import time, timedelta
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
+from myelectricaldatapy import Enedis, EnedisException
+
+from .const import DOMAIN
+from .quota import quota_budget
+from .tempo import TempoCalendar, tempo_calendar
+
+# RTE publishes the colour of the next Tempo day late in the morning.
+TEMPO_PUBLICATION = time(11, 0)
+# Days of EcoWatt signals RTE publishes ahead, today included.
+ECOWATT_DAYS = 4
+# Delay before asking again for a feed that failed or isn't published yet.
+FEED_RETRY = timedelta(hours=1)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class NationalFeed(ABC):
+    """A national feed, fetched once for every entry until it expires.
+
+    Tempo colours and EcoWatt signals are the same for every PDL, yet each
+    coordinator used to fetch them on its own every update cycle. Entries
+    now refresh the shared feed instead: nothing is fetched while it is
+    fresh, and entries refreshing at the same time join the request in
+    flight rather than making their own. Its call is charged to the quota
+    of the token that made it. Listeners (the sensors of every entry) are
+    called whenever new data comes in.
+    """
+
+    name = "feed"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty feed."""
+        self.hass = hass
+        self.expires: dt | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Call update_callback on new data, return a function to stop."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    async def async_refresh(self, token: str, owner: str) -> None:
+        """Fetch the feed with token unless it's fresh or already being fetched.
+
+        owner is the entry whose scheduled refresh asks, and whose quota
+        reservation may cover the call.
+        """
+        if self.expires is not None and dt_util.now() < self.expires:
+            return
+        if self._task is None:
+            self._task = self.hass.async_create_task(
+                self._async_fetch(token, owner), f"{DOMAIN} {self.name} feed"
+            )
+        await asyncio.shield(self._task)
+
+    async def _async_fetch(self, token: str, owner: str) -> None:
+        """Fetch the feed once, then notify the listeners."""
+        budget = quota_budget(self.hass, token)
+        now = dt_util.now()
+        try:
+            if not budget.can_spend(1, owner):
+                self.expires = now + FEED_RETRY
+                return
+            client = Enedis(token, async_get_clientsession(self.hass))
+            try:
+                data = await self._async_request(client, now)
+            finally:
+                budget.spend(1)
+        except EnedisException as error:
+            _LOGGER.warning("Error fetching %s: %s", self.name, error)
+            self.expires = now + FEED_RETRY
+        else:
+            await self._async_store(data or {})
+            self.expires = self._expiry(now)
+            _LOGGER.debug("[%s] fresh until %s", self.name, self.expires)
+            for update_callback in list(self._listeners):
+                update_callback()
+        finally:
+            self._task = None
+
+    @abstractmethod
+    async def _async_request(self, client: Enedis, now: dt) -> Any:
+        """Return the feed's data, from the API."""
+
+    @abstractmethod
+    async def _async_store(self, data: dict[str, Any]) -> None:
+        """Keep the feed's data."""
+
+    @abstractmethod
+    def _expiry(self, now: dt) -> dt:
+        """Return until when data fetched at now is fresh."""
+
+
+class TempoFeed(NationalFeed):
+    """Colours of today and tomorrow, kept in the shared Tempo calendar."""
+
+    name = "tempo"
+
+    def __init__(self, hass: HomeAssistant, calendar: TempoCalendar) -> None:
+        """Initialize the feed."""
+        super().__init__(hass)
+        self.calendar = calendar
+
+    @property
+    def today(self) -> str | None:
+        """Return today's colour, None while unknown."""
+        return self.calendar.get(dt_util.now().date())
+
+    async def _async_request(self, client: Enedis, now: dt) -> Any:
+        """Return the colours of today and tomorrow."""
+        today = now.replace(tzinfo=None)
+        return await client.async_get_tempo(today, today + timedelta(days=2))
+
+    async def _async_store(self, data: dict[str, Any]) -> None:
+        """Record the colours in the calendar."""
+        await self.calendar.async_update(data)
+
+    def _expiry(self, now: dt) -> dt:
+        """Fresh until tomorrow's publication once tomorrow is known.
+
+        Until then, until today's publication, then retried until it's out.
+        """
+        publication = dt_util.start_of_local_day(now).replace(
+            hour=TEMPO_PUBLICATION.hour, minute=TEMPO_PUBLICATION.minute
+        )
+        if self.calendar.get(now.date() + timedelta(days=1)) is not None:
+            return publication + timedelta(days=1)
+        if self.today is not None and now < publication:
+            return publication
+        return now + FEED_RETRY
+
+
+class EcoWattFeed(NationalFeed):
+    """EcoWatt signals of the next few days."""
+
+    name = "ecowatt"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the feed."""
+        super().__init__(hass)
+        self.days: dict[str, Any] = {}
+
+    @property
+    def today(self) -> dict[str, Any]:
+        """Return today's signal, empty while unknown."""
+        return self.days.get(dt_util.now().date().isoformat(), {})
+
+    async def _async_request(self, client: Enedis, now: dt) -> Any:
+        """Return the signals from today on."""
+        today = now.replace(tzinfo=None)
+        return await client.async_get_ecowatt(
+            today, today + timedelta(days=ECOWATT_DAYS)
+        )
+
+    async def _async_store(self, data: dict[str, Any]) -> None:
+        """Keep the signals."""
+        self.days = data
+
+    def _expiry(self, now: dt) -> dt:
+        """Fresh until the next day."""
+        return dt_util.start_of_local_day(now) + timedelta(days=1)
+
+
+class NationalFeeds:
+    """The national feeds shared by every entry (see national_feeds)."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the feeds."""
+        self.tempo = TempoFeed(hass, tempo_calendar(hass))
+        self.ecowatt = EcoWattFeed(hass)
+
+
+@callback
+def national_feeds(hass: HomeAssistant) -> NationalFeeds:
+    """Return the national feeds shared by every entry."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if "feeds" not in data:
+        data["feeds"] = NationalFeeds(hass)
+    return data["feeds"]
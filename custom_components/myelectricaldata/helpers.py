@@ -2,13 +2,18 @@
 
 from __future__ import annotations
 
+import asyncio
 import contextlib
 import logging
+import math
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
 from datetime import datetime as dt
 from datetime import timedelta
 from typing import Any
 
+import numpy as np
 from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.db_schema import Statistics
 from homeassistant.components.recorder.models import (
     StatisticData,
     StatisticMeanType,
@@ -16,15 +21,18 @@ from homeassistant.components.recorder.models import (
 )
 from homeassistant.components.recorder.statistics import (
     async_import_statistics,
-    get_last_statistics,
-    statistics_during_period,
 )
+from homeassistant.components.recorder.util import session_scope
 from homeassistant.const import UnitOfEnergy
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.util import dt as dt_util
 from homeassistant.util import slugify
 from homeassistant.util.unit_conversion import EnergyConverter
+from sqlalchemy import func, select
 
+from .columnar import StatisticColumns
 from .const import (
     CONF_BLUE,
     CONF_CONSUMPTION,
@@ -43,41 +51,424 @@ from .const import (
     DOMAIN,
     PRODUCTION_DAILY,
     PRODUCTION_DETAIL,
+    STORAGE_VERSION,
 )
+from .tariffs import TariffHistory
+from .tempo import TEMPO_CODES, TempoCalendar
+
+# Difference between two sums below which they're considered equal.
+SUM_TOLERANCE = 1e-6
+# Rows read back and rewritten at once when streaming a statistic's history
+# (about a month of hourly rows), so memory doesn't grow with its length.
+STATISTICS_PAGE_SIZE = 24 * 31
+# Most independent streams (modes, statistics) processed at once, so a long
+# migration or rebuild doesn't flood the recorder's executor.
+MAX_CONCURRENT_JOBS = 4
+# Time without new dirty ranges after which pending rebuilds run.
+REBUILD_QUIET_PERIOD = timedelta(minutes=5)
 
 _LOGGER = logging.getLogger(__name__)
 
 
-async def async_get_db_infos(hass: HomeAssistant, statistic_id: str) -> tuple[str, dt]:
-    """Fetch last information in database."""
+async def async_gather_limited[T](
+    jobs: Iterable[Awaitable[T]], limit: int = MAX_CONCURRENT_JOBS
+) -> list[T]:
+    """Await jobs concurrently, at most limit at a time, results in order."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _async_run(job: Awaitable[T]) -> T:
+        async with semaphore:
+            return await job
+
+    return await asyncio.gather(*(_async_run(job) for job in jobs))
+
+
+def _get_last_statistics_many(
+    hass: HomeAssistant, statistic_ids: set[str], before: float | None = None
+) -> dict[str, tuple[float, float]]:
+    """Return the (sum, start timestamp) of each statistic's latest hourly row.
+
+    get_last_statistics only accepts a single statistic_id, so looking up
+    every bucket of every PDL that way costs one executor hop and one query
+    per statistic. This resolves all the metadata ids at once and fetches
+    every latest row in a single grouped query. With before (a UTC timestamp),
+    only rows starting strictly earlier are considered. Runs in the recorder
+    executor.
+    """
+    with session_scope(hass=hass, read_only=True) as session:
+        metadata = get_instance(hass).statistics_meta_manager.get_many(
+            session, statistic_ids=statistic_ids
+        )
+        if not metadata:
+            return {}
+        ids = {
+            metadata_id: statistic_id
+            for statistic_id, (metadata_id, _) in metadata.items()
+        }
+        latest = (
+            select(
+                Statistics.metadata_id,
+                func.max(Statistics.start_ts).label("max_start_ts"),
+            )
+            .where(Statistics.metadata_id.in_(list(ids)))
+            .group_by(Statistics.metadata_id)
+        )
+        if before is not None:
+            latest = latest.where(Statistics.start_ts < before)
+        latest = latest.subquery()
+        stmt = select(Statistics.metadata_id, Statistics.start_ts, Statistics.sum).join(
+            latest,
+            (Statistics.metadata_id == latest.c.metadata_id)
+            & (Statistics.start_ts == latest.c.max_start_ts),
+        )
+        return {
+            ids[row.metadata_id]: (row.sum or 0, row.start_ts)
+            for row in session.execute(stmt)
+        }
+
+
+async def async_get_many_db_infos(
+    hass: HomeAssistant, statistic_ids: Iterable[str], before: dt | None = None
+) -> dict[str, tuple[float, dt | None]]:
+    """Fetch last sum and date of several statistics in one recorder job.
+
+    When before is given, the last row starting strictly before that point is
+    returned instead (the anchor of an incremental rebuild).
+    """
+    statistic_ids = set(statistic_ids)
     last_stats = await get_instance(hass).async_add_executor_job(
-        get_last_statistics, hass, 1, statistic_id, True, {"sum"}
+        _get_last_statistics_many,
+        hass,
+        statistic_ids,
+        None if before is None else dt_util.as_utc(before).timestamp(),
     )
-    last_summary, dt_last_stat = (
-        (0, None)
-        if not last_stats
-        else (
-            last_stats[statistic_id][0]["sum"],
-            dt_util.as_local(
-                dt_util.utc_from_timestamp(last_stats[statistic_id][0]["start"])
-            ),
+    infos: dict[str, tuple[float, dt | None]] = {}
+    for statistic_id in statistic_ids:
+        if (last_stat := last_stats.get(statistic_id)) is None:
+            infos[statistic_id] = (0, None)
+            continue
+        last_summary, last_start = last_stat
+        infos[statistic_id] = (
+            last_summary,
+            dt_util.as_local(dt_util.utc_from_timestamp(last_start)),
+        )
+    _LOGGER.debug("[infosdb] %s", infos)
+    return infos
+
+
+def _get_first_starts_many(
+    hass: HomeAssistant, statistic_ids: set[str]
+) -> dict[str, float]:
+    """Return the start timestamp of each statistic's earliest hourly row.
+
+    Runs in the recorder executor.
+    """
+    with session_scope(hass=hass, read_only=True) as session:
+        metadata = get_instance(hass).statistics_meta_manager.get_many(
+            session, statistic_ids=statistic_ids
         )
+        if not metadata:
+            return {}
+        ids = {
+            metadata_id: statistic_id
+            for statistic_id, (metadata_id, _) in metadata.items()
+        }
+        stmt = (
+            select(Statistics.metadata_id, func.min(Statistics.start_ts))
+            .where(Statistics.metadata_id.in_(list(ids)))
+            .group_by(Statistics.metadata_id)
+        )
+        return {
+            ids[metadata_id]: start_ts
+            for metadata_id, start_ts in session.execute(stmt)
+        }
+
+
+async def async_get_first_start(
+    hass: HomeAssistant, statistic_ids: Iterable[str]
+) -> dt | None:
+    """Return the earliest hour stored across several statistics."""
+    first_starts = await get_instance(hass).async_add_executor_job(
+        _get_first_starts_many, hass, set(statistic_ids)
     )
-    _LOGGER.debug(
-        "[%s] summary: %s, last date: %s", statistic_id, last_summary, dt_last_stat
+    if not first_starts:
+        return None
+    return dt_util.as_local(dt_util.utc_from_timestamp(min(first_starts.values())))
+
+
+async def async_get_db_infos(
+    hass: HomeAssistant, statistic_id: str
+) -> tuple[float, dt | None]:
+    """Fetch last information in database."""
+    return (await async_get_many_db_infos(hass, [statistic_id]))[statistic_id]
+
+
+def _get_statistics_sums_at(
+    hass: HomeAssistant, statistic_ids: set[str], start: float
+) -> dict[str, float | None]:
+    """Return the sum each statistic currently holds for the row starting at start.
+
+    Statistics without a row there are left out. Runs in the recorder executor.
+    """
+    with session_scope(hass=hass, read_only=True) as session:
+        metadata = get_instance(hass).statistics_meta_manager.get_many(
+            session, statistic_ids=statistic_ids
+        )
+        if not metadata:
+            return {}
+        ids = {
+            metadata_id: statistic_id
+            for statistic_id, (metadata_id, _) in metadata.items()
+        }
+        stmt = select(Statistics.metadata_id, Statistics.sum).where(
+            Statistics.metadata_id.in_(list(ids)), Statistics.start_ts == start
+        )
+        return {ids[row.metadata_id]: row.sum for row in session.execute(stmt)}
+
+
+def _get_statistics_window(
+    hass: HomeAssistant, statistic_ids: set[str], start: float, end: float
+) -> dict[str, dict[float, tuple[float | None, float | None]]]:
+    """Return the (state, sum) of each statistic's rows from start to end.
+
+    Rows are keyed by start timestamp, both bounds included. One range query
+    for all statistics. Runs in the recorder executor.
+    """
+    with session_scope(hass=hass, read_only=True) as session:
+        metadata = get_instance(hass).statistics_meta_manager.get_many(
+            session, statistic_ids=statistic_ids
+        )
+        if not metadata:
+            return {}
+        ids = {
+            metadata_id: statistic_id
+            for statistic_id, (metadata_id, _) in metadata.items()
+        }
+        stmt = select(
+            Statistics.metadata_id,
+            Statistics.start_ts,
+            Statistics.state,
+            Statistics.sum,
+        ).where(
+            Statistics.metadata_id.in_(list(ids)),
+            Statistics.start_ts >= start,
+            Statistics.start_ts <= end,
+        )
+        stored: dict[str, dict[float, tuple[float | None, float | None]]] = {}
+        for row in session.execute(stmt):
+            stored.setdefault(ids[row.metadata_id], {})[row.start_ts] = (
+                row.state,
+                row.sum,
+            )
+        return stored
+
+
+def _get_statistics_page(
+    hass: HomeAssistant, statistic_id: str, since: float, limit: int
+) -> list[tuple[float, float | None]]:
+    """Return up to limit (start timestamp, state) rows from since, oldest first.
+
+    Keyset pagination on start_ts: each page is a single indexed range query
+    whatever the length of the history. Runs in the recorder executor.
+    """
+    with session_scope(hass=hass, read_only=True) as session:
+        metadata = get_instance(hass).statistics_meta_manager.get_many(
+            session, statistic_ids={statistic_id}
+        )
+        if not metadata:
+            return []
+        stmt = (
+            select(Statistics.start_ts, Statistics.state)
+            .where(
+                Statistics.metadata_id == metadata[statistic_id][0],
+                Statistics.start_ts >= since,
+            )
+            .order_by(Statistics.start_ts)
+            .limit(limit)
+        )
+        return [(row.start_ts, row.state) for row in session.execute(stmt)]
+
+
+async def _async_iter_statistics(
+    hass: HomeAssistant, statistic_id: str, start_time: dt
+) -> AsyncIterator[list[tuple[float, float | None]]]:
+    """Yield a statistic's (start timestamp, state) rows page by page."""
+    instance = get_instance(hass)
+    since = dt_util.as_utc(start_time).timestamp()
+    while True:
+        page = await instance.async_add_executor_job(
+            _get_statistics_page, hass, statistic_id, since, STATISTICS_PAGE_SIZE
+        )
+        if page:
+            yield page
+        if len(page) < STATISTICS_PAGE_SIZE:
+            return
+        # Rows are at least an hour apart, so this is strictly past the last one.
+        since = page[-1][0] + 1
+
+
+async def _async_read_columns(
+    hass: HomeAssistant, statistic_id: str, start_time: dt, end_ts: float
+) -> StatisticColumns:
+    """Return a statistic's rows starting in [start_time, end_ts)."""
+    rows: list[tuple[float, float | None]] = []
+    async for page in _async_iter_statistics(hass, statistic_id, start_time):
+        rows.extend(page)
+        if page[-1][0] >= end_ts:
+            break
+    return StatisticColumns.from_pairs(rows).window(None, end_ts)
+
+
+class StatisticsCache:
+    """Write-through high-water mark of each statistic's last sum and date.
+
+    Seeded from the recorder the first time a statistic_id is asked for, then
+    advanced straight from the rows async_import_sensor_statistics writes, so
+    a steady-state refresh where the API returns nothing new doesn't touch the
+    database at all. Anything rewriting history behind its back (clear_data,
+    rebuild_data, fetch_data) must invalidate it.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty cache."""
+        self.hass = hass
+        self._infos: dict[str, tuple[float, dt | None]] = {}
+
+    async def async_get(
+        self, statistic_ids: Iterable[str]
+    ) -> dict[str, tuple[float, dt | None]]:
+        """Return last sum and date, querying the recorder only for unknown ids."""
+        statistic_ids = list(statistic_ids)
+        if missing := [sid for sid in statistic_ids if sid not in self._infos]:
+            self._infos.update(await async_get_many_db_infos(self.hass, missing))
+        return {
+            statistic_id: self._infos[statistic_id] for statistic_id in statistic_ids
+        }
+
+    def peek(self, statistic_id: str) -> tuple[float, dt | None] | None:
+        """Return what's cached for a statistic, without ever querying."""
+        return self._infos.get(statistic_id)
+
+    def update(self, statistic_id: str, rows: list[StatisticData]) -> None:
+        """Advance the high-water mark from rows just handed to the recorder.
+
+        A statistic that was never seeded is left alone: its real last row
+        isn't known, so it gets read from the database on next access.
+        """
+        if statistic_id not in self._infos or not rows:
+            return
+        last_row = max(rows, key=lambda row: row["start"])
+        _, last_dt = self._infos[statistic_id]
+        if last_dt is None or last_row["start"] >= last_dt:
+            self._infos[statistic_id] = (
+                float(last_row["sum"]),
+                dt_util.as_local(last_row["start"]),
+            )
+
+    def invalidate(self, statistic_ids: Iterable[str] | None = None) -> None:
+        """Forget some (or all) statistics so they're read again from the recorder."""
+        if statistic_ids is None:
+            self._infos.clear()
+            return
+        for statistic_id in statistic_ids:
+            self._infos.pop(statistic_id, None)
+
+
+def _statistic_metadata(statistic_id: str, kind: str) -> StatisticMetaData:
+    """Return the metadata of one of our energy or cost statistics."""
+    is_energy = kind == "energy"
+    return StatisticMetaData(
+        has_sum=True,
+        name=None,
+        source="recorder",
+        statistic_id=statistic_id,
+        unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR if is_energy else "EUR",
+        mean_type=StatisticMeanType.NONE,
+        unit_class=EnergyConverter.UNIT_CLASS if is_energy else None,
     )
-    return (last_summary, dt_last_stat)
 
 
-async def async_get_last_infos(
-    hass: HomeAssistant, items: list[dict[str, Any]]
-) -> tuple[dt, dict[str, float], dict[str, float]]:
-    """Set default api."""
+def _import_many(
+    hass: HomeAssistant, pending: list[tuple[StatisticMetaData, list[StatisticData]]]
+) -> None:
+    """Hand every pending statistic import to the recorder from one executor job."""
+    for metadata, rows in pending:
+        async_import_statistics(hass, metadata, rows)
+
+
+class StatisticsImportQueue:
+    """Per-entry buffer merging the statistic rows of a whole cycle.
+
+    Every import path (collect, hourly reassert, legacy migration, rebuild)
+    used to build its own StatisticMetaData and hop to the executor once per
+    statistic. Rows are now merged per statistic_id, with the metadata built
+    once per statistic_id and kept for the entry's lifetime, and the whole
+    lot is handed to the recorder in a single job when the refresh or service
+    call flushes it. A flush also happens on its own as soon as
+    STATISTICS_PAGE_SIZE rows are pending, so a streamed rebuild stays
+    bounded in memory. Flushed rows advance the write-through cache, if any.
+    Flushes are serialized: when streams share the queue, a flush returns
+    only once the rows queued before it are committed, even if a concurrent
+    flush picked them up.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, cache: StatisticsCache | None = None
+    ) -> None:
+        """Initialize an empty queue."""
+        self.hass = hass
+        self.cache = cache
+        self._metadata: dict[str, StatisticMetaData] = {}
+        self._rows: dict[str, list[StatisticData]] = {}
+        self._pending = 0
+        self._lock = asyncio.Lock()
+
+    async def async_add(
+        self, statistic_id: str, kind: str, rows: list[StatisticData]
+    ) -> None:
+        """Queue rows for a statistic, flushing once a page worth is pending."""
+        if not rows:
+            return
+        if statistic_id not in self._metadata:
+            self._metadata[statistic_id] = _statistic_metadata(statistic_id, kind)
+        self._rows.setdefault(statistic_id, []).extend(rows)
+        self._pending += len(rows)
+        if self._pending >= STATISTICS_PAGE_SIZE:
+            await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Hand every pending row to the recorder in a single executor job."""
+        async with self._lock:
+            if not self._rows:
+                return
+            pending = [
+                (self._metadata[statistic_id], rows)
+                for statistic_id, rows in self._rows.items()
+            ]
+            self._rows = {}
+            self._pending = 0
+            _LOGGER.debug(
+                "[import_queue] %s statistics, %s rows",
+                len(pending),
+                sum(len(rows) for _, rows in pending),
+            )
+            await get_instance(self.hass).async_add_executor_job(
+                _import_many, self.hass, pending
+            )
+            if self.cache is not None:
+                for metadata, rows in pending:
+                    self.cache.update(metadata["statistic_id"], rows)
+
+
+def split_db_infos(
+    items: list[dict[str, Any]], db_infos: dict[str, tuple[float, dt | None]]
+) -> tuple[dt | None, dict[str, float], dict[str, float]]:
+    """Split per-statistic last infos into the collector's cumulative baselines."""
     sum_values: dict[str, float] = {}
     sum_prices: dict[str, float] = {}
     _dt_last: dt | None = None
     for item in items:
-        summary, dt_last = await async_get_db_infos(hass, item["entity_id"])
+        summary, dt_last = db_infos.get(item["entity_id"], (0, None))
         if item["kind"] == "energy":
             sum_values[item["note"]] = float(summary)
             _dt_last = dt_last if _dt_last is None else _dt_last
@@ -93,6 +484,16 @@ async def async_get_last_infos(
     return _dt_last, sum_values, sum_prices
 
 
+async def async_get_last_infos(
+    hass: HomeAssistant, items: list[dict[str, Any]], before: dt | None = None
+) -> tuple[dt | None, dict[str, float], dict[str, float]]:
+    """Return the collector's baselines, from the rows before before if given."""
+    db_infos = await async_get_many_db_infos(
+        hass, [item["entity_id"] for item in items], before=before
+    )
+    return split_db_infos(items, db_infos)
+
+
 def build_sensor_items(
     mode: str, pdl: str, service: str, intervals: list[Any], has_price: bool
 ) -> list[dict[str, Any]]:
@@ -214,84 +615,256 @@ def read_prices(hass: HomeAssistant, items: list[dict[str, Any]]) -> dict[str, A
     return prices
 
 
+def _group_collected(
+    data_collected: dict[str, Any],
+) -> dict[tuple[str, str], list[dict[str, Any]]]:
+    """Bucket collected rows by (mode, note) in a single pass.
+
+    A detail fetch with offpeak and pricing yields four items over the same
+    thousands of rows; indexing them once keeps the import linear in the
+    number of rows instead of rows x items.
+    """
+    buckets: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    for mode, rows in data_collected.items():
+        for data in rows:
+            buckets.setdefault((mode, data["notes"]), []).append(data)
+    return buckets
+
+
 async def async_import_sensor_statistics(
     hass: HomeAssistant,
     items: list[dict[str, Any]],
     data_collected: dict[str, Any],
-) -> None:
-    """Import statistics directly onto their own real sensor entity."""
+    queue: StatisticsImportQueue | None = None,
+    tariffs: TariffHistory | None = None,
+    tempo: TempoCalendar | None = None,
+) -> dt | None:
+    """Import statistics directly onto their own real sensor entity.
+
+    Rows go through the given import queue, which the caller flushes at the
+    end of its cycle; without one, a private queue is flushed before
+    returning. With a tariff history, cost rows are priced with the tariff
+    in effect at their own start rather than the single snapshot the
+    collector was given, by the colour of their day for Tempo (see
+    _row_prices). Returns the earliest start imported, i.e. from
+    where a rebuild has to recompute the cumulative sum (see
+    async_rebuild_statistics).
+    """
+    own_queue = queue is None
+    if queue is None:
+        queue = StatisticsImportQueue(hass)
+    buckets = _group_collected(data_collected)
+    pending: dict[str, StatisticColumns] = {}
+    kinds: dict[str, str] = {}
     for item in items:
-        rows: list[StatisticData] = []
-        for data in data_collected.get(item["mode"], []):
-            if data["notes"] != item["note"]:
-                continue
-            if item["kind"] == "energy" and data.get("value"):
-                rows.append(
-                    StatisticData(
-                        start=data["date"], state=data["value"], sum=data["sum_value"]
-                    )
-                )
-            elif item["kind"] == "cost" and data.get("price"):
-                rows.append(
-                    StatisticData(
-                        start=data["date"], state=data["price"], sum=data["sum_price"]
-                    )
-                )
+        if not (bucket := buckets.get((item["mode"], item["note"]))):
+            continue
+        state_key, sum_key = (
+            ("value", "sum_value")
+            if item["kind"] == "energy"
+            else ("price", "sum_price")
+        )
+        columns = StatisticColumns.from_records(bucket, state_key, sum_key).sorted()
+        if item["kind"] == "cost" and tariffs is not None and len(columns):
+            columns = _price_columns(
+                StatisticColumns.from_records(bucket, "value", "sum_value").sorted(),
+                columns,
+                _row_prices(item, columns.starts, tariffs, tempo),
+            )
+        if len(columns := columns.nonzero()):
+            pending[item["entity_id"]] = columns
+            kinds[item["entity_id"]] = item["kind"]
 
-        if not rows:
+    dirty_from: dt | None = None
+    for statistic_id, columns in (
+        await _async_drop_unchanged(hass, pending, queue.cache)
+    ).items():
+        if not len(columns):
+            continue
+
+        _LOGGER.debug("[import_stats] %s -> %s rows", statistic_id, len(columns))
+        await queue.async_add(
+            statistic_id, kinds[statistic_id], columns.to_statistic_data()
+        )
+        first_start = dt_util.utc_from_timestamp(columns.starts[0])
+        if dirty_from is None or first_start < dirty_from:
+            dirty_from = first_start
+
+    if own_queue:
+        await queue.async_flush()
+    return dirty_from
+
+
+def _price_columns(
+    energy: StatisticColumns, cost: StatisticColumns, prices: np.ndarray | None
+) -> StatisticColumns:
+    """Return cost rows priced row by row, keeping the collector's baseline.
+
+    The collector's running total starts from the cost sum it was given, so
+    that baseline is carried over onto the repriced states. Without prices
+    (no tariff history) the collected rows are kept as they are, and so is
+    each row whose price is unknown (NaN).
+    """
+    if prices is None:
+        return cost
+    baseline = float(cost.sums[0] - cost.states[0])
+    states = np.where(np.isnan(prices), cost.states, energy.states * prices)
+    return StatisticColumns(energy.starts, states, cost.sums).cumsum(baseline)
+
+
+def _row_prices(
+    item: dict[str, Any],
+    starts: np.ndarray,
+    tariffs: TariffHistory | None,
+    tempo: TempoCalendar | None = None,
+    live: dict[str, Any] | None = None,
+) -> np.ndarray | None:
+    """Return the price of each of a cost item's rows, None if none is known.
+
+    Flat-priced rows get the tariff history's version in effect at their
+    start, or else the live price. With a Tempo calendar, consumption rows
+    get the price of their day's colour the same way, NaN while the colour
+    of that day isn't known.
+    """
+    mode, note, live = item["mode"], item["note"], live or {}
+    if tempo is None or mode != CONF_CONSUMPTION:
+        if (
+            tariffs is not None
+            and (prices := tariffs.prices_at(mode, note, starts)) is not None
+        ):
+            return prices
+        if (price := live.get(CONF_PRICE)) is None:
+            return None
+        return np.full(len(starts), float(price))
+
+    colors = tempo.colors_at(starts)
+    prices = np.full(len(starts), np.nan)
+    for color in TEMPO_CODES:
+        history = (
+            tariffs.prices_at(mode, note, starts, color)
+            if tariffs is not None
+            else None
+        )
+        if history is None and (price := live.get(color)) is None:
+            continue
+        hits = colors == color
+        prices[hits] = history[hits] if history is not None else float(price)
+    return prices
+
+
+async def _async_drop_unchanged(
+    hass: HomeAssistant,
+    pending: dict[str, StatisticColumns],
+    cache: StatisticsCache | None,
+) -> dict[str, StatisticColumns]:
+    """Drop the rows the recorder already holds with the same state and sum.
+
+    A force_refresh or a fetch_data over an already collected range returns
+    rows that are mostly stored already. Whatever could overlap existing data
+    is compared against it with a single range query, so only new or changed
+    hours get imported. Statistics whose rows all start past the cached
+    high-water mark can't overlap anything and skip the query altogether.
+    """
+    overlapping: dict[str, StatisticColumns] = {}
+    for statistic_id, columns in pending.items():
+        known = cache.peek(statistic_id) if cache is not None else None
+        if known is not None and (
+            known[1] is None or columns.starts[0] > known[1].timestamp()
+        ):
             continue
+        overlapping[statistic_id] = columns
+    if not overlapping:
+        return pending
 
-        _LOGGER.debug("[import_stats] %s -> %s rows", item["entity_id"], len(rows))
-        is_energy = item["kind"] == "energy"
-        metadata = StatisticMetaData(
-            has_sum=True,
-            name=None,
-            source="recorder",
-            statistic_id=item["entity_id"],
-            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR if is_energy else "EUR",
-            mean_type=StatisticMeanType.NONE,
-            unit_class=EnergyConverter.UNIT_CLASS if is_energy else None,
+    stored = await get_instance(hass).async_add_executor_job(
+        _get_statistics_window,
+        hass,
+        set(overlapping),
+        min(float(columns.starts[0]) for columns in overlapping.values()),
+        max(float(columns.starts[-1]) for columns in overlapping.values()),
+    )
+    for statistic_id, columns in overlapping.items():
+        if not (existing := stored.get(statistic_id)):
+            continue
+        known = StatisticColumns(
+            np.fromiter(existing, float, len(existing)),
+            np.array([state for state, _ in existing.values()], float),
+            np.array([summary for _, summary in existing.values()], float),
+        ).sorted()
+        index = np.minimum(
+            np.searchsorted(known.starts, columns.starts), len(known) - 1
         )
-        await get_instance(hass).async_add_executor_job(
-            async_import_statistics, hass, metadata, rows
+        unchanged = (
+            (known.starts[index] == columns.starts)
+            & np.isclose(
+                known.states[index], columns.states, rtol=0, atol=SUM_TOLERANCE
+            )
+            & np.isclose(known.sums[index], columns.sums, rtol=0, atol=SUM_TOLERANCE)
         )
+        if skipped := int(unchanged.sum()):
+            _LOGGER.debug("[import_stats] %s: %s unchanged rows", statistic_id, skipped)
+        pending[statistic_id] = columns.mask(~unchanged)
+    return pending
 
 
 async def async_reassert_statistics(
-    hass: HomeAssistant, known_sums: dict[str, tuple[dt | None, float, str]]
-) -> None:
-    """Overwrite the current hour's statistic with our own last known-good sum.
+    hass: HomeAssistant,
+    known_sums: dict[str, tuple[dt | None, float, str]],
+    queue: StatisticsImportQueue | None = None,
+) -> int:
+    """Restore our own known-good sum where HA's native compiler diverged from it.
 
     Each PowerSensor's statistic_id is its own entity_id (source="recorder"),
     so HA's built-in sensor/recorder.py compiler also generates "sum"
     statistics for it from its live state history, independently of and
     racing with async_import_sensor_statistics. Called right after
-    EVENT_RECORDER_HOURLY_STATISTICS_GENERATED, this re-writes the current
-    hour with the value we actually imported, undoing whatever the native
-    compiler just wrote for it - unless we ourselves already wrote real data
-    for this exact hour this cycle, in which case there's nothing to correct
-    and doing so would clobber that real per-period state.
+    EVENT_RECORDER_HOURLY_STATISTICS_GENERATED, this reads back the sum the
+    compiler just wrote for the hour it compiled (the one that just ended),
+    for every tracked entity in one query, and only rewrites the entities
+    where it differs from the value we actually imported. Most hours the
+    sensor's state didn't move and the compiler wrote our own sum back, so
+    nothing is written at all. An entity we ourselves already wrote real
+    data for at or after that hour is left alone, since correcting it would
+    clobber that real per-period state. Returns the number of corrections.
     """
-    instance = get_instance(hass)
-    hour_start = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    queue = queue or StatisticsImportQueue(hass)
+    compiled_start = dt_util.utcnow().replace(
+        minute=0, second=0, microsecond=0
+    ) - timedelta(hours=1)
+    candidates: dict[str, tuple[float, str]] = {}
     for entity_id, (last_real_dt, last_real_sum, kind) in known_sums.items():
-        if last_real_dt is not None and dt_util.as_utc(last_real_dt) >= hour_start:
+        if last_real_dt is not None and dt_util.as_utc(last_real_dt) >= compiled_start:
             continue  # this hour was legitimately written by us this cycle
+        candidates[entity_id] = (last_real_sum, kind)
+    if not candidates:
+        return 0
 
-        is_energy = kind == "energy"
-        metadata = StatisticMetaData(
-            has_sum=True,
-            name=None,
-            source="recorder",
-            statistic_id=entity_id,
-            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR if is_energy else "EUR",
-            mean_type=StatisticMeanType.NONE,
-            unit_class=EnergyConverter.UNIT_CLASS if is_energy else None,
+    # The event fires before the compile session commits, wait for it to land
+    await get_instance(hass).async_block_till_done()
+    compiled = await get_instance(hass).async_add_executor_job(
+        _get_statistics_sums_at, hass, set(candidates), compiled_start.timestamp()
+    )
+    corrections = 0
+    for entity_id, (last_real_sum, kind) in candidates.items():
+        compiled_sum = compiled.get(entity_id)
+        if compiled_sum is None or math.isclose(
+            compiled_sum, last_real_sum, abs_tol=SUM_TOLERANCE
+        ):
+            continue
+        _LOGGER.debug(
+            "[reassert] %s: compiled sum %s, restoring %s",
+            entity_id,
+            compiled_sum,
+            last_real_sum,
         )
-        rows = [StatisticData(start=hour_start, state=0, sum=last_real_sum)]
-        await instance.async_add_executor_job(
-            async_import_statistics, hass, metadata, rows
+        await queue.async_add(
+            entity_id,
+            kind,
+            [StatisticData(start=compiled_start, state=0, sum=last_real_sum)],
         )
+        corrections += 1
+    await queue.async_flush()
+    return corrections
 
 
 def _legacy_statistic_id(item: dict[str, Any]) -> str:
@@ -308,77 +881,83 @@ def _legacy_statistic_id(item: dict[str, Any]) -> str:
 
 
 async def async_migrate_legacy_statistics(
-    hass: HomeAssistant, items: list[dict[str, Any]]
+    hass: HomeAssistant,
+    items: list[dict[str, Any]],
+    queue: StatisticsImportQueue | None = None,
 ) -> None:
     """One-time copy of the old external statistics onto their new entity.
 
-    Runs once per coordinator lifetime (see EnedisDataUpdateCoordinator).
+    Runs once per statistic_id: the coordinator only passes the items its
+    persisted migration store doesn't list yet (see migration_store).
     Purely a local database copy, no Enedis API call involved, so upgrading
     doesn't strand years of already-collected history behind a 7-day cold
     start just because the statistic_id moved onto a real sensor entity.
+    Statistics are independent and migrated concurrently.
     """
-    instance = get_instance(hass)
-    migrated_items: list[dict[str, Any]] = []
-    for item in items:
-        new_id = item["entity_id"]
-        if (await async_get_db_infos(hass, new_id))[1] is not None:
-            continue  # already has data, nothing to migrate
+    queue = queue or StatisticsImportQueue(hass)
+    db_infos = await async_get_many_db_infos(
+        hass, [item["entity_id"] for item in items]
+    )
 
+    async def _async_migrate(item: dict[str, Any]) -> None:
+        # The legacy sum may already carry a discontinuity from a pre-refactor
+        # manual backfill that was never rebuilt (see async_rebuild_statistics),
+        # so it isn't copied verbatim: the running total is recomputed from the
+        # legacy state values while streaming them over, which keeps that stale
+        # discontinuity from becoming a phantom spike in the Energy dashboard.
         legacy_id = _legacy_statistic_id(item)
-        result = await instance.async_add_executor_job(
-            statistics_during_period,
-            hass,
-            dt_util.utc_from_timestamp(0),
-            None,
-            {legacy_id},
-            "hour",
-            None,
-            {"state", "sum"},
+        count = await _async_stream_running_sum(
+            hass, queue, legacy_id, item, dt_util.utc_from_timestamp(0), 0.0
         )
-        values = result.get(legacy_id)
-        if not values:
-            continue
-
-        rows = [
-            StatisticData(
-                start=dt_util.utc_from_timestamp(value["start"]),
-                state=value["state"],
-                sum=value["sum"],
+        if count:
+            _LOGGER.info(
+                "Migrated %s historical points from %s to %s",
+                count,
+                legacy_id,
+                item["entity_id"],
             )
-            for value in values
-        ]
-        is_energy = item["kind"] == "energy"
-        metadata = StatisticMetaData(
-            has_sum=True,
-            name=None,
-            source="recorder",
-            statistic_id=new_id,
-            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR if is_energy else "EUR",
-            mean_type=StatisticMeanType.NONE,
-            unit_class=EnergyConverter.UNIT_CLASS if is_energy else None,
-        )
-        await instance.async_add_executor_job(
-            async_import_statistics, hass, metadata, rows
-        )
-        _LOGGER.info(
-            "Migrated %s historical points from %s to %s", len(rows), legacy_id, new_id
-        )
-        migrated_items.append(item)
 
-    if migrated_items:
-        # The legacy sum was copied verbatim and may already carry a
-        # discontinuity from a pre-refactor manual backfill that was never
-        # rebuilt (see async_rebuild_statistics). Recomputing it from the
-        # just-imported state values (same local, API-free operation)
-        # prevents that stale discontinuity from becoming a phantom spike
-        # in the Energy dashboard on the new entity.
-        await async_rebuild_statistics(hass, migrated_items)
+    # Statistics that already have data have nothing to migrate
+    await async_gather_limited(
+        _async_migrate(item) for item in items if db_infos[item["entity_id"]][1] is None
+    )
+    await queue.async_flush()
+
+
+async def _async_stream_running_sum(
+    hass: HomeAssistant,
+    queue: StatisticsImportQueue,
+    source_id: str,
+    item: dict[str, Any],
+    start_time: dt,
+    running_sum: float,
+) -> int:
+    """Write item's statistic as the running total of source_id's states.
+
+    Reads source_id from start_time one page at a time, carries the running
+    sum over from page to page and queues each page before reading the next
+    one (the queue flushes on its own every page worth of rows), so peak
+    memory stays bounded by a single page no matter how long the history is.
+    Returns the number of rows written.
+    """
+    count = 0
+    async for page in _async_iter_statistics(hass, source_id, start_time):
+        columns = StatisticColumns.from_pairs(page).cumsum(running_sum)
+        running_sum = columns.last_sum
+        await queue.async_add(
+            item["entity_id"], item["kind"], columns.to_statistic_data()
+        )
+        count += len(columns)
+    return count
 
 
 async def async_rebuild_statistics(
-    hass: HomeAssistant, items: list[dict[str, Any]]
+    hass: HomeAssistant,
+    items: list[dict[str, Any]],
+    dirty_from: dt | None = None,
+    queue: StatisticsImportQueue | None = None,
 ) -> None:
-    """Recompute a clean, monotonic cumulative sum across an entity's full history.
+    """Recompute a clean, monotonic cumulative sum across an entity's history.
 
     A manual backfill (see services.FETCH_SERVICE) is typically done in
     several chunks spread over several days to stay under Enedis' daily
@@ -390,53 +969,270 @@ async def async_rebuild_statistics(
     total of a chunk imported afterward that precedes it).
 
     This re-reads every raw state value for the statistic (chronologically,
-    across its whole history) and rewrites the sum as a plain running total
-    from zero, so the result is correct regardless of how many calls it took
-    to get there or in what order. No Enedis API call involved.
+    a page at a time) and rewrites the sum as a plain running total, so the
+    result is correct regardless of how many calls it took to get there or in
+    what order. With dirty_from, everything before that point is trusted as
+    already clean: the running total restarts from the sum of the last row
+    preceding it and only the suffix is read back and rewritten. Without it,
+    the whole history is rebuilt from zero. No Enedis API call involved.
+    Statistics are independent and rebuilt concurrently.
     """
-    instance = get_instance(hass)
-    for item in items:
+    queue = queue or StatisticsImportQueue(hass)
+    # Rows still waiting in the recorder's queue (e.g. the chunk that was just
+    # imported) must be committed before they are read back.
+    await queue.async_flush()
+    await get_instance(hass).async_block_till_done()
+
+    start_time = dt_util.utc_from_timestamp(0)
+    anchors: dict[str, tuple[float, dt | None]] = {}
+    if dirty_from is not None:
+        start_time = dt_util.as_utc(dirty_from)
+        anchors = await async_get_many_db_infos(
+            hass, [item["entity_id"] for item in items], before=start_time
+        )
+
+    async def _async_rebuild(item: dict[str, Any]) -> None:
         statistic_id = item["entity_id"]
-        result = await instance.async_add_executor_job(
-            statistics_during_period,
+        count = await _async_stream_running_sum(
             hass,
-            dt_util.utc_from_timestamp(0),
-            None,
-            {statistic_id},
-            "hour",
-            None,
-            {"state"},
+            queue,
+            statistic_id,
+            item,
+            start_time,
+            float(anchors.get(statistic_id, (0, None))[0]),
+        )
+        if count:
+            _LOGGER.info("Rebuilt %s statistic points for %s", count, statistic_id)
+
+    await async_gather_limited(_async_rebuild(item) for item in items)
+    await queue.async_flush()
+
+
+async def async_reprice_statistics(
+    hass: HomeAssistant,
+    items: list[dict[str, Any]],
+    prices: dict[str, Any],
+    start: dt | None = None,
+    end: dt | None = None,
+    queue: StatisticsImportQueue | None = None,
+    tariffs: TariffHistory | None = None,
+    tempo: TempoCalendar | None = None,
+) -> dt | None:
+    """Recompute a mode's cost statistics from its stored energy and prices.
+
+    Cost rows are otherwise only ever computed at import time, from the
+    tariffs of that moment, so fixing a wrong tariff would mean clearing and
+    collecting everything again. Here the energy rows starting in
+    [start, end) are read back from the recorder, priced with the flat price
+    of their bucket (prices as returned by read_prices) and their running
+    total carried on from the cost sum just before start; only the cost rows
+    whose state or sum actually change are written. With a tariff history,
+    each row gets the price in effect at its start instead. Tempo rows are
+    priced by the colour of their day from the calendar, and those of a day
+    it doesn't know keep their stored cost. No Enedis API call involved.
+    Returns from where the cost sums past the range need a rebuild (see
+    async_rebuild_statistics), None if nothing changed.
+    """
+    own_queue = queue is None
+    if queue is None:
+        queue = StatisticsImportQueue(hass)
+    start_time = dt_util.as_utc(start) if start else dt_util.utc_from_timestamp(0)
+    end_ts = dt_util.as_utc(end).timestamp() if end else math.inf
+    energy = {item["note"]: item for item in items if item["kind"] == "energy"}
+    costs = [
+        item for item in items if item["kind"] == "cost" and item["note"] in energy
+    ]
+    anchors = await async_get_many_db_infos(
+        hass, [item["entity_id"] for item in costs], before=start_time
+    )
+
+    pending: dict[str, StatisticColumns] = {}
+    last_starts: dict[str, float] = {}
+    for item in costs:
+        columns = await _async_read_columns(
+            hass, energy[item["note"]]["entity_id"], start_time, end_ts
+        )
+        if not len(columns):
+            continue
+        row_prices = _row_prices(
+            item, columns.starts, tariffs, tempo, prices.get(item["note"], {})
         )
-        values = result.get(statistic_id)
-        if not values:
+        if row_prices is None:
+            _LOGGER.warning("No price for %s, not repriced", item["entity_id"])
             continue
+        states = columns.states * row_prices
+        if (unknown := np.isnan(row_prices)).any():
+            stored = await _async_read_columns(
+                hass, item["entity_id"], start_time, end_ts
+            )
+            states[unknown] = stored.states_at(columns.starts[unknown])
+        pending[item["entity_id"]] = StatisticColumns(
+            columns.starts, states, columns.sums
+        ).cumsum(float(anchors[item["entity_id"]][0]))
+        last_starts[item["entity_id"]] = float(columns.starts[-1])
 
-        running_sum = 0.0
-        rows = []
-        for value in sorted(values, key=lambda v: v["start"]):
-            running_sum += value.get("state") or 0
-            rows.append(
-                StatisticData(
-                    start=dt_util.utc_from_timestamp(value["start"]),
-                    state=value.get("state") or 0,
-                    sum=running_sum,
-                )
+    dirty_from: dt | None = None
+    for statistic_id, columns in (
+        await _async_drop_unchanged(hass, pending, queue.cache)
+    ).items():
+        if not len(columns):
+            continue
+        _LOGGER.debug("[reprice] %s -> %s rows", statistic_id, len(columns))
+        await queue.async_add(statistic_id, "cost", columns.to_statistic_data())
+        # Rows past the range keep their price but have to follow the new sum
+        after = dt_util.utc_from_timestamp(last_starts[statistic_id] + 1)
+        if dirty_from is None or after < dirty_from:
+            dirty_from = after
+
+    if own_queue:
+        await queue.async_flush()
+    return dirty_from
+
+
+def rebuild_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding an entry's pending rebuilds."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.rebuild")
+
+
+class StatisticsRebuilder:
+    """Per-entry coalescer of statistic rebuilds.
+
+    The backfill and the history crawler only mark what they imported as
+    dirty: a script backfilling 50 weekly chunks would otherwise rebuild the
+    same history 50 times. Dirty ranges are merged per statistic_id, keeping
+    the earliest dirty point (a full rebuild wins over any partial one), and
+    persisted, then rebuilt once REBUILD_QUIET_PERIOD went by without a new
+    one, or right away when flushed (flush_data and rebuild_data services).
+    A single task runs the rebuilds: a request coming in while one runs
+    joins its next pass instead of starting one of its own. Each pass holds
+    the entry's write lock, so it never interleaves with a refresh import or
+    an hourly reassert of the same statistics.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        lock: asyncio.Lock,
+        on_rebuilt: Callable[[list[str]], None] | None = None,
+    ) -> None:
+        """Initialize the rebuilder."""
+        self.hass = hass
+        self._lock = lock
+        self._on_rebuilt = on_rebuilt
+        self._pending: dict[str, tuple[dict[str, Any], dt | None]] = {}
+        self._store = rebuild_store(hass, entry_id)
+        self._task: asyncio.Task[None] | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def pending(self) -> list[str]:
+        """Return the statistic_ids waiting for a rebuild."""
+        return list(self._pending)
+
+    async def async_load(self) -> None:
+        """Restore the dirty ranges left over and schedule their rebuild."""
+        if (stored := await self._store.async_load()) is None:
+            return
+        for statistic_id, pending in stored.get("pending", {}).items():
+            since = pending["dirty_from"]
+            self._pending[statistic_id] = (
+                pending["item"],
+                None if since is None else dt.fromisoformat(since),
+            )
+        if self._pending:
+            self._async_schedule()
+
+    async def async_mark_dirty(
+        self, items: list[dict[str, Any]], dirty_from: dt | None = None
+    ) -> None:
+        """Rebuild items from dirty_from once things have quietened down."""
+        self._merge(items, dirty_from)
+        await self._async_save()
+        self._async_schedule()
+
+    async def async_rebuild(
+        self, items: list[dict[str, Any]], dirty_from: dt | None = None
+    ) -> None:
+        """Rebuild items from dirty_from now, with whatever else is dirty."""
+        self._merge(items, dirty_from)
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Rebuild everything dirty now, without waiting for the quiet period."""
+        self.async_stop()
+        if not self._pending and self._task is None:
+            return
+        if self._task is None:
+            self._task = self.hass.async_create_task(
+                self._async_run(), f"{DOMAIN} rebuild statistics"
             )
+        await asyncio.shield(self._task)
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the pending quiet period timer."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
 
-        is_energy = item["kind"] == "energy"
-        metadata = StatisticMetaData(
-            has_sum=True,
-            name=None,
-            source="recorder",
-            statistic_id=statistic_id,
-            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR if is_energy else "EUR",
-            mean_type=StatisticMeanType.NONE,
-            unit_class=EnergyConverter.UNIT_CLASS if is_energy else None,
+    def _merge(self, items: list[dict[str, Any]], dirty_from: dt | None) -> None:
+        """Merge items into the pending rebuilds, keeping the earliest point."""
+        for item in items:
+            since = dirty_from
+            if (pending := self._pending.get(item["entity_id"])) is not None:
+                since = (
+                    None
+                    if pending[1] is None or since is None
+                    else min(pending[1], since)
+                )
+            self._pending[item["entity_id"]] = (item, since)
+
+    @callback
+    def _async_schedule(self) -> None:
+        """(Re)start the quiet period."""
+        self.async_stop()
+        self._unsub_timer = async_call_later(
+            self.hass, REBUILD_QUIET_PERIOD, self._async_quiet
         )
-        await instance.async_add_executor_job(
-            async_import_statistics, hass, metadata, rows
+
+    @callback
+    def _async_quiet(self, _: dt) -> None:
+        """Flush once nothing was marked dirty for a whole quiet period."""
+        self._unsub_timer = None
+        self.hass.async_create_task(self.async_flush(), f"{DOMAIN} flush rebuilds")
+
+    async def _async_run(self) -> None:
+        """Rebuild whatever is pending until nothing is left."""
+        try:
+            while self._pending:
+                async with self._lock:
+                    # Requests keep merging while waiting for the lock
+                    pending, self._pending = self._pending, {}
+                    groups: dict[dt | None, list[dict[str, Any]]] = {}
+                    for item, since in pending.values():
+                        groups.setdefault(since, []).append(item)
+                    for since, items in groups.items():
+                        await async_rebuild_statistics(self.hass, items, since)
+                await self._async_save()
+                if self._on_rebuilt is not None:
+                    self._on_rebuilt(list(pending))
+        finally:
+            self._task = None
+
+    async def _async_save(self) -> None:
+        """Checkpoint the pending rebuilds."""
+        await self._store.async_save(
+            {
+                "pending": {
+                    statistic_id: {
+                        "item": item,
+                        "dirty_from": None if since is None else since.isoformat(),
+                    }
+                    for statistic_id, (item, since) in self._pending.items()
+                }
+            }
         )
-        _LOGGER.info("Rebuilt %s statistic points for %s", len(rows), statistic_id)
 
 
 def next_date(date_: dt | None, service: str) -> dt:
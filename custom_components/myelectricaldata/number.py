@@ -4,7 +4,11 @@ These numbers are the single source of truth for pricing: their live value
 is read back by the coordinator (see helpers.read_prices) every update cycle
 to compute the cost statistics, and their value is restored across HA
 restarts so the user only has to set a tariff once (and edit it whenever it
-changes) instead of going through the config flow.
+changes) instead of going through the config flow. Each edit is also
+recorded in the entry's tariff history (see tariffs.TariffHistory) from the
+moment it is made: rows older than the edit keep the price they were billed
+at, so it never reprices the history. A price that took effect in the past
+is dated with the set_tariff service instead.
 """
 
 import logging
@@ -18,6 +22,7 @@ from homeassistant.components.number import (
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
 
 from . import MyElectricalDataConfigEntry
 from .const import DOMAIN, MANUFACTURER, URL
@@ -53,6 +58,7 @@ class TariffNumber(RestoreNumber, NumberEntity):
     def __init__(self, coordinator: EnedisDataUpdateCoordinator, item: dict) -> None:
         """Initialize the tariff number."""
         self.coordinator = coordinator
+        self._item = item
         self.entity_id = item["entity_id"]
         self._attr_unique_id = item["unique_id"]
         self._attr_name = item["name"]
@@ -69,8 +75,12 @@ class TariffNumber(RestoreNumber, NumberEntity):
         await super().async_added_to_hass()
         if (last_data := await self.async_get_last_number_data()) is not None:
             self._attr_native_value = last_data.native_value
+        await self.coordinator.tariffs.async_setdefault(
+            self._item, self._attr_native_value
+        )
 
     async def async_set_native_value(self, value: float) -> None:
         """Update the current value."""
         self._attr_native_value = value
         self.async_write_ha_state()
+        await self.coordinator.tariffs.async_set(self._item, value, dt_util.now())
@@ -0,0 +1,120 @@
+"""Daily API quota budgeting for MyElectricalData."""
+
+from __future__ import annotations
+
+import math
+from datetime import date
+from datetime import datetime as dt
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import CONSUMPTION_DETAIL, DOMAIN, PRODUCTION_DETAIL
+
+# valid_access, contract and address, fetched once a day or on force_refresh.
+SETUP_CALLS = 3
+# Load curves are served by windows of 7 days at most, one call each.
+DETAIL_WINDOW_DAYS = 7
+
+
+def estimate_calls(service: str, start: dt, end: dt | None = None) -> int:
+    """Return the number of calls collecting service over [start, end) takes."""
+    if end is None or service not in [CONSUMPTION_DETAIL, PRODUCTION_DETAIL]:
+        return 1
+    return max(math.ceil((end - start).days / DETAIL_WINDOW_DAYS), 1)
+
+
+class QuotaBudget:
+    """Calls left today on a token's daily quota.
+
+    Enedis counts calls per token, not per PDL, so all the entries sharing a
+    token share one budget (see quota_budget). The server side count comes in
+    with the access payload, only refreshed once a day; calls made since are
+    counted locally. Each entry reserves what its next scheduled refresh will
+    need, so a backfill only ever spends what is left beyond that.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the budget."""
+        self.day: date = dt_util.now().date()
+        self.limit: int | None = None
+        self.used: int = 0
+        self.blocked: bool = False
+        self.reservations: dict[str, int] = {}
+
+    @property
+    def reserved(self) -> int:
+        """Return the calls reserved for scheduled refreshes."""
+        return sum(self.reservations.values())
+
+    @property
+    def remaining(self) -> int | None:
+        """Return the calls left today, None while the quota is unknown."""
+        self._roll()
+        if self.blocked:
+            return 0
+        if self.limit is None:
+            return None
+        return max(self.limit - self.used, 0)
+
+    @property
+    def projected(self) -> int:
+        """Return the calls expected to be made today."""
+        self._roll()
+        return self.used + self.reserved
+
+    def update_from_access(self, access: dict[str, Any]) -> None:
+        """Align with the quota reported by the valid_access endpoint."""
+        self._roll()
+        if not access:
+            return
+        if (limit := access.get("quota_limit")) is not None:
+            self.limit = int(limit)
+        if (call_number := access.get("call_number")) is not None:
+            self.used = max(self.used, int(call_number))
+        self.blocked = bool(access.get("quota_reached") or access.get("ban"))
+
+    def reserve(self, owner: str, calls: int) -> None:
+        """Set the calls owner's next scheduled refresh will need."""
+        self.reservations[owner] = calls
+
+    def release(self, owner: str) -> None:
+        """Drop owner's reservation."""
+        self.reservations.pop(owner, None)
+
+    def can_spend(self, calls: int, owner: str | None = None) -> bool:
+        """Tell whether calls fit in today's quota.
+
+        Calls made by owner's own scheduled refresh may use its reservation,
+        anything else (owner None) only what is left beyond all reservations.
+        """
+        if (remaining := self.remaining) is None:
+            return not self.blocked
+        reserved = self.reserved
+        if owner is not None:
+            reserved -= self.reservations.get(owner, 0)
+        return calls <= remaining - reserved
+
+    def spend(self, calls: int) -> None:
+        """Count calls just made."""
+        self._roll()
+        self.used += calls
+
+    def _roll(self) -> None:
+        """Reset the daily count when the day changes."""
+        if (today := dt_util.now().date()) != self.day:
+            self.day = today
+            self.used = 0
+            self.blocked = False
+
+
+@callback
+def quota_budget(hass: HomeAssistant, token: str) -> QuotaBudget:
+    """Return the budget shared by every entry using token."""
+    budgets: dict[str, QuotaBudget] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        "quota", {}
+    )
+    if token not in budgets:
+        budgets[token] = QuotaBudget()
+    return budgets[token]
@@ -0,0 +1,121 @@
+"""Publication-aware refresh scheduling for MyElectricalData."""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, timedelta
+from datetime import datetime as dt
+from statistics import median
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, STORAGE_VERSION
+
+# Enedis publishes the previous day once, usually early in the morning. Until a
+# PDL's own publication time has been observed, poll densely over this window.
+DEFAULT_WINDOW = (timedelta(hours=5), timedelta(hours=11))
+# Margin kept around the learned publication time.
+WINDOW_MARGIN = timedelta(minutes=45)
+# Number of observed publication times the window is learned from.
+MAX_SAMPLES = 14
+
+DENSE_INTERVAL = timedelta(minutes=15)
+LATE_INTERVAL = timedelta(hours=1)
+IDLE_INTERVAL = timedelta(hours=6)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def scheduler_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding an entry's learned publication times."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.scheduler")
+
+
+class RefreshScheduler:
+    """Decide when the coordinator should next poll Enedis.
+
+    The day's data is published once, so polling every hour mostly returns
+    nothing new. The time of day at which new rows first showed up is recorded
+    for each PDL: refreshes are dense around that window until the data is in,
+    then back off to a near-idle pace until the next day's window opens.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the scheduler."""
+        self._store = scheduler_store(hass, entry_id)
+        self.samples: list[float] = []
+        self.fresh_day: date | None = None
+        self._waiting_day: date | None = None
+
+    async def async_load(self) -> None:
+        """Restore the learned publication times."""
+        if (stored := await self._store.async_load()) is not None:
+            self.samples = list(stored.get("samples", []))[-MAX_SAMPLES:]
+            if fresh_day := stored.get("fresh_day"):
+                self.fresh_day = date.fromisoformat(fresh_day)
+
+    @property
+    def window(self) -> tuple[timedelta, timedelta]:
+        """Return the publication window as offsets from local midnight."""
+        if not self.samples:
+            return DEFAULT_WINDOW
+        center = median(self.samples)
+        spread = median(abs(sample - center) for sample in self.samples)
+        margin = max(WINDOW_MARGIN, timedelta(seconds=2 * spread))
+        center_delta = timedelta(seconds=center)
+        return max(center_delta - margin, timedelta()), center_delta + margin
+
+    def expects_data(self, now: dt) -> bool:
+        """Tell whether today's data is due but hasn't been collected yet."""
+        now = dt_util.as_local(now)
+        return self.fresh_day != now.date() and now >= self._window_start(now)
+
+    async def async_record(self, now: dt, last_stat: dt | None, new_rows: int) -> None:
+        """Record the outcome of a refresh.
+
+        The day counts as complete once last_stat, the latest energy
+        statistic, reaches yesterday. When it was still missing at an earlier
+        refresh of the day and this one brought new rows, the time of day is
+        kept as a publication sample; a first catch-up after setup teaches
+        nothing.
+        """
+        now = dt_util.as_local(now)
+        today = now.date()
+        if self.fresh_day == today:
+            return
+        if last_stat is None or (
+            dt_util.as_local(last_stat).date() < today - timedelta(days=1)
+        ):
+            self._waiting_day = today
+            return
+        if new_rows and self._waiting_day == today:
+            midnight = dt_util.start_of_local_day(now)
+            self.samples = [
+                *self.samples,
+                (now - midnight).total_seconds(),
+            ][-MAX_SAMPLES:]
+            _LOGGER.debug("Data published at %s (%s rows)", now.time(), new_rows)
+        self.fresh_day = today
+        await self._store.async_save(
+            {"samples": self.samples, "fresh_day": today.isoformat()}
+        )
+
+    def next_interval(self, now: dt) -> timedelta:
+        """Return the delay until the next refresh."""
+        now = dt_util.as_local(now)
+        start = self._window_start(now)
+        end = dt_util.start_of_local_day(now) + self.window[1]
+        if self.fresh_day == now.date():
+            start = self._window_start(now + timedelta(days=1))
+        elif start <= now <= end:
+            return DENSE_INTERVAL
+        elif now > end:
+            return LATE_INTERVAL
+        return max(min(start - now, IDLE_INTERVAL), DENSE_INTERVAL)
+
+    def _window_start(self, now: dt) -> dt:
+        """Return when the publication window opens on now's local day."""
+        return dt_util.start_of_local_day(now) + self.window[0]
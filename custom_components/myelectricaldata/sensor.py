@@ -9,7 +9,7 @@ from homeassistant.components.sensor import (
     SensorEntity,
     SensorStateClass,
 )
-from homeassistant.const import UnitOfEnergy
+from homeassistant.const import PERCENTAGE, EntityCategory, UnitOfEnergy
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -35,6 +35,8 @@ async def async_setup_entry(
     entities = [
         PowerSensor(coordinator, entity_id) for entity_id in coordinator.data
     ]
+    entities.append(QuotaSensor(coordinator))
+    entities.append(BackfillSensor(coordinator))
     if coordinator.tempo_day:
         entities.append(TempoSensor(coordinator))
     if coordinator.ecowatt_day:
@@ -111,9 +113,18 @@ class TempoSensor(CoordinatorEntity, SensorEntity):
         self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, coordinator.pdl)})
         self._attr_native_value = coordinator.tempo_day
 
+    async def async_added_to_hass(self) -> None:
+        """Follow the Tempo feed shared with the other entries."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.feeds.tempo.async_add_listener(
+                self._handle_coordinator_update
+            )
+        )
+
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+        """Handle updated data from the coordinator or the Tempo feed."""
         self._attr_native_value = self.coordinator.tempo_day
         super()._handle_coordinator_update()
 
@@ -135,9 +146,18 @@ class EcoWattSensor(CoordinatorEntity, SensorEntity):
             "message": coordinator.ecowatt_day.get("message")
         }
 
+    async def async_added_to_hass(self) -> None:
+        """Follow the EcoWatt feed shared with the other entries."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.feeds.ecowatt.async_add_listener(
+                self._handle_coordinator_update
+            )
+        )
+
     @callback
     def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
+        """Handle updated data from the coordinator or the EcoWatt feed."""
         self._attr_native_value = DAY_VALUES[
             self.coordinator.ecowatt_day.get("value", 0)
         ]
@@ -145,3 +165,74 @@ class EcoWattSensor(CoordinatorEntity, SensorEntity):
             "message": self.coordinator.ecowatt_day.get("message")
         }
         self.async_write_ha_state()
+
+
+class QuotaSensor(CoordinatorEntity, SensorEntity):
+    """Sensor return the API calls projected today on the token's quota."""
+
+    _attr_name = "Projected API calls"
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{coordinator.pdl}_projected_calls"
+        self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, coordinator.pdl)})
+        self._update_from_quota()
+
+    def _update_from_quota(self) -> None:
+        """Read the shared quota budget."""
+        quota = self.coordinator.quota
+        self._attr_native_value = quota.projected
+        self._attr_extra_state_attributes = {
+            "quota": quota.limit,
+            "used": quota.used,
+            "reserved": quota.reserved,
+            "remaining": quota.remaining,
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._update_from_quota()
+        super()._handle_coordinator_update()
+
+
+class BackfillSensor(CoordinatorEntity, SensorEntity):
+    """Sensor return the progress of the queued history backfills."""
+
+    _attr_name = "Backfill progress"
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = PERCENTAGE
+
+    def __init__(self, coordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{coordinator.pdl}_backfill_progress"
+        self._attr_device_info = DeviceInfo(identifiers={(DOMAIN, coordinator.pdl)})
+        self._update_from_backfill()
+
+    def _update_from_backfill(self) -> None:
+        """Read the backfill queue."""
+        backfill = self.coordinator.backfill
+        self._attr_native_value = backfill.progress
+        self._attr_extra_state_attributes = {
+            "jobs": len(backfill.jobs),
+            "windows left": sum(
+                job["windows_total"] - job["windows_done"] for job in backfill.jobs
+            ),
+            "current": (
+                f"{backfill.jobs[0]['service']} from {backfill.jobs[0]['cursor']}"
+                if backfill.jobs
+                else None
+            ),
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._update_from_backfill()
+        super()._handle_coordinator_update()
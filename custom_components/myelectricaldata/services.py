@@ -7,43 +7,30 @@ import logging
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant.components.recorder import get_instance
-from homeassistant.const import CONF_TOKEN
+from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import HomeAssistant, ServiceCall, callback
 from homeassistant.exceptions import ServiceValidationError
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
-from myelectricaldatapy import EnedisByPDL
+from homeassistant.util import dt as dt_util
 
 from .const import (
     CLEAR_SERVICE,
-    CONF_AUTH,
-    CONF_CONSUMPTION,
     CONF_END_DATE,
     CONF_ENTRY,
-    CONF_INTERVALS,
     CONF_OFF_PRICE,
-    CONF_PDL,
     CONF_PRICE,
-    CONF_PRODUCTION,
-    CONF_RULE_END_TIME,
-    CONF_RULE_START_TIME,
     CONF_SERVICE,
     CONF_START_DATE,
     CONF_STATISTIC_ID,
-    CONF_TEMPO,
-    CONSUMPTION_DAILY,
-    CONSUMPTION_DETAIL,
+    CONF_TARIFF,
     DOMAIN,
     FETCH_SERVICE,
+    FLUSH_SERVICE,
+    MIGRATE_SERVICE,
     REBUILD_SERVICE,
+    REPRICE_SERVICE,
+    TARIFF_SERVICE,
 )
-from .helpers import (
-    async_get_last_infos,
-    async_import_sensor_statistics,
-    async_rebuild_statistics,
-    build_price_items,
-    build_sensor_items,
-    read_prices,
-)
+from .helpers import StatisticsRebuilder, async_rebuild_statistics
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -57,6 +44,26 @@ HISTORY_SERVICE_SCHEMA = vol.Schema(
         vol.Optional(CONF_OFF_PRICE): cv.positive_float,
     }
 )
+MIGRATE_SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_ENTRY): str,
+    }
+)
+REPRICE_SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_ENTRY): str,
+        vol.Optional(CONF_START_DATE): cv.datetime,
+        vol.Optional(CONF_END_DATE): cv.datetime,
+    }
+)
+TARIFF_SERVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_ENTRY): str,
+        vol.Required(CONF_TARIFF): cv.entity_id,
+        vol.Required(CONF_START_DATE): cv.datetime,
+        vol.Required(CONF_PRICE): cv.positive_float,
+    }
+)
 CLEAR_SERVICE_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_STATISTIC_ID): str,
@@ -64,81 +71,45 @@ CLEAR_SERVICE_SCHEMA = vol.Schema(
 )
 
 
+@callback
+def _async_invalidate_caches(hass: HomeAssistant, statistic_ids: list[str]) -> None:
+    """Drop statistics rewritten behind the coordinators' write-through cache."""
+    for entry in hass.config_entries.async_loaded_entries(DOMAIN):
+        entry.runtime_data.stats_cache.invalidate(statistic_ids)
+
+
+@callback
+def _async_get_rebuilder(
+    hass: HomeAssistant, statistic_id: str
+) -> StatisticsRebuilder | None:
+    """Return the rebuilder of the loaded entry owning statistic_id, if any."""
+    for entry in hass.config_entries.async_loaded_entries(DOMAIN):
+        if statistic_id.startswith(f"sensor.{DOMAIN}_{entry.runtime_data.pdl}_"):
+            return entry.runtime_data.rebuilder
+    return None
+
+
 async def async_services(hass: HomeAssistant):
     """Register services."""
 
     @callback
     async def async_reload_history(call: ServiceCall) -> None:
-        """Load data in statistics table."""
+        """Queue a history backfill, collected in the background within quota."""
         entry = hass.config_entries.async_get_entry(call.data[CONF_ENTRY])
-        if entry is None:
+        if entry is None or entry.state is not ConfigEntryState.LOADED:
             raise ServiceValidationError("Config entry not found")
-        service = call.data[CONF_SERVICE]
-        options = entry.options
-        pdl = entry.data[CONF_PDL]
         start_date = call.data[CONF_START_DATE]
         end_date = call.data[CONF_END_DATE]
-        mode = (
-            CONF_CONSUMPTION
-            if service in [CONSUMPTION_DAILY, CONSUMPTION_DETAIL]
-            else CONF_PRODUCTION
-        )
-        intervals = options.get(mode, {}).get(CONF_INTERVALS, {})
-        intervals = [
-            (interval[CONF_RULE_START_TIME], interval[CONF_RULE_END_TIME])
-            for interval in intervals.values()
-        ]
-
-        # Set price: use the call's override if given, otherwise fall back to
-        # the live value of the tariff number entities (the source of truth).
-        if price := call.data.get(CONF_PRICE):
-            prices = {"standard": {CONF_PRICE: price}}
-            if len(intervals) != 0 and (off_price := call.data.get(CONF_OFF_PRICE)):
-                prices.update({"offpeak": {CONF_PRICE: off_price}})
-            else:
-                intervals = []
-        else:
-            tempo = mode == CONF_CONSUMPTION and bool(
-                options.get(CONF_AUTH, {}).get(CONF_TEMPO)
-            )
-            prices = read_prices(
-                hass, build_price_items(mode, pdl, service, intervals, tempo)
-            )
-
-        # Get sensor items for this mode/service
-        items = build_sensor_items(mode, pdl, service, intervals, has_price=bool(prices))
-
-        api = EnedisByPDL(
-            pdl=pdl,
-            token=options[CONF_AUTH][CONF_TOKEN],
-            session=async_create_clientsession(hass),
-            timeout=30,
-        )
-
-        # Get last sum and price
-        _, sum_values, sum_prices = await async_get_last_infos(hass, items)
-
-        # Set api collector
-        api.set_collects(
-            service,
-            start=start_date,
-            end=end_date,
-            intervals=intervals,
-            prices=prices,
-            cum_value=sum_values,
-            cum_price=sum_prices,
+        if start_date >= end_date:
+            raise ServiceValidationError("Start date must be before end date")
+        await entry.runtime_data.backfill.async_enqueue(
+            call.data[CONF_SERVICE],
+            start_date,
+            end_date,
+            call.data.get(CONF_PRICE),
+            call.data.get(CONF_OFF_PRICE),
         )
 
-        # Update data
-        await api.async_update_collects()
-        # Import statistics onto their own sensor entity, then rebuild the
-        # cumulative sum from scratch so a chunk imported out of order (e.g.
-        # backfilling several date ranges over several days to stay under
-        # the daily API quota) reconnects cleanly with what's already there.
-        if api.has_collected:
-            await async_import_sensor_statistics(hass, items, api.stats)
-            await async_rebuild_statistics(hass, items)
-
     @callback
     async def async_clear(call: ServiceCall) -> None:
         """Clear data in database."""
@@ -147,6 +118,7 @@ async def async_services(hass: HomeAssistant):
             _LOGGER.error("Statistic_id is incorrect %s", statistic_id)
             return
         get_instance(hass).async_clear_statistics([statistic_id])
+        _async_invalidate_caches(hass, [statistic_id])
 
     @callback
     async def async_rebuild(call: ServiceCall) -> None:
@@ -155,13 +127,83 @@ async def async_services(hass: HomeAssistant):
         Purely local (rereads what's already in the recorder database), no
         Enedis API call involved - fixes a sum left discontinuous by a manual
         adjustment or an out-of-order backfill without spending API quota.
+        Goes through the owning entry's rebuilder, so a burst of calls for the
+        same statistic rebuilds it once and never races a refresh.
         """
         statistic_id = call.data[CONF_STATISTIC_ID]
         if not statistic_id.startswith(f"sensor.{DOMAIN}_"):
             _LOGGER.error("Statistic_id is incorrect %s", statistic_id)
             return
         kind = "cost" if statistic_id.endswith("_cost") else "energy"
-        await async_rebuild_statistics(hass, [{"entity_id": statistic_id, "kind": kind}])
+        items = [{"entity_id": statistic_id, "kind": kind}]
+        if (rebuilder := _async_get_rebuilder(hass, statistic_id)) is not None:
+            await rebuilder.async_rebuild(items)
+            return
+        await async_rebuild_statistics(hass, items)
+        _async_invalidate_caches(hass, [statistic_id])
+
+    @callback
+    async def async_reprice(call: ServiceCall) -> None:
+        """Recompute an entry's cost statistics from the current tariffs.
+
+        Purely local as well: the stored energy is priced again, so a tariff
+        set wrong during a backfill is fixed without spending API quota.
+        """
+        entry = hass.config_entries.async_get_entry(call.data[CONF_ENTRY])
+        if entry is None or entry.state is not ConfigEntryState.LOADED:
+            raise ServiceValidationError("Config entry not found")
+        start_date = call.data.get(CONF_START_DATE)
+        end_date = call.data.get(CONF_END_DATE)
+        if start_date and end_date and start_date >= end_date:
+            raise ServiceValidationError("Start date must be before end date")
+        await entry.runtime_data.async_reprice(start_date, end_date)
+
+    @callback
+    async def async_set_tariff(call: ServiceCall) -> None:
+        """Record the price a tariff had from a past date.
+
+        The tariff number only sets today's price; this dates a version so
+        the rows since then are priced with it, older rows keeping theirs.
+        Those already imported are repriced if reprice_on_change is enabled.
+        """
+        entry = hass.config_entries.async_get_entry(call.data[CONF_ENTRY])
+        if entry is None or entry.state is not ConfigEntryState.LOADED:
+            raise ServiceValidationError("Config entry not found")
+        coordinator = entry.runtime_data
+        item = next(
+            (
+                item
+                for item in coordinator.price_items
+                if item["entity_id"] == call.data[CONF_TARIFF]
+            ),
+            None,
+        )
+        if item is None:
+            raise ServiceValidationError("Tariff not found")
+        start_date = dt_util.as_utc(call.data[CONF_START_DATE])
+        if await coordinator.tariffs.async_set(item, call.data[CONF_PRICE], start_date):
+            await coordinator.async_request_reprice(start_date)
+
+    @callback
+    async def async_flush(call: ServiceCall) -> None:
+        """Run an entry's pending rebuilds without waiting for the quiet period."""
+        entry = hass.config_entries.async_get_entry(call.data[CONF_ENTRY])
+        if entry is None or entry.state is not ConfigEntryState.LOADED:
+            raise ServiceValidationError("Config entry not found")
+        await entry.runtime_data.rebuilder.async_flush()
+
+    @callback
+    async def async_migrate(call: ServiceCall) -> None:
+        """Force the legacy statistics migration to run again for an entry.
+
+        Completed migrations are persisted and never probed again; this is
+        the diagnostic escape hatch to redo them on the next refresh.
+        """
+        entry = hass.config_entries.async_get_entry(call.data[CONF_ENTRY])
+        if entry is None or entry.state is not ConfigEntryState.LOADED:
+            raise ServiceValidationError("Config entry not found")
+        await entry.runtime_data.async_reset_migrations()
+        await entry.runtime_data.async_request_refresh()
 
     hass.services.async_register(
         DOMAIN, FETCH_SERVICE, async_reload_history, schema=HISTORY_SERVICE_SCHEMA
@@ -172,3 +214,15 @@ async def async_services(hass: HomeAssistant):
     hass.services.async_register(
         DOMAIN, REBUILD_SERVICE, async_rebuild, schema=CLEAR_SERVICE_SCHEMA
     )
+    hass.services.async_register(
+        DOMAIN, MIGRATE_SERVICE, async_migrate, schema=MIGRATE_SERVICE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, FLUSH_SERVICE, async_flush, schema=MIGRATE_SERVICE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, REPRICE_SERVICE, async_reprice, schema=REPRICE_SERVICE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, TARIFF_SERVICE, async_set_tariff, schema=TARIFF_SERVICE_SCHEMA
+    )
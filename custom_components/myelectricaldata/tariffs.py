@@ -0,0 +1,108 @@
+"""Time-versioned tariffs for MyElectricalData."""
+
+from __future__ import annotations
+
+import bisect
+import logging
+from datetime import datetime as dt
+from typing import Any
+
+import numpy as np
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import CONF_PRICE, DOMAIN, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def tariff_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding an entry's tariff history."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.tariffs")
+
+
+def _tariff_key(mode: str, note: str, key: str) -> str:
+    """Return the key of a tariff in the history."""
+    return f"{mode}.{note}.{key}"
+
+
+class TariffHistory:
+    """Persistent, time-versioned values of an entry's tariff numbers.
+
+    The TariffNumber entities only hold today's price, while a backfill can
+    span regulated tariff changes (TRVE updates every February and August).
+    Each tariff keeps the list of (effective from, price) versions, fed by
+    the number entities (from the moment they're edited) and the set_tariff
+    service (from any date). Rows are priced with the version in effect at
+    their start: a sorted index searched for all rows at once. The first
+    version also applies to anything older than it.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize an empty history."""
+        self.hass = hass
+        self.versions: dict[str, list[tuple[float, float]]] = {}
+        self._store = tariff_store(hass, entry_id)
+        self._index: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    async def async_load(self) -> None:
+        """Restore the history."""
+        if (stored := await self._store.async_load()) is not None:
+            self.versions = {
+                key: [(since, price) for since, price in versions]
+                for key, versions in stored.get("versions", {}).items()
+            }
+
+    async def async_setdefault(self, item: dict[str, Any], price: float) -> None:
+        """Record price as applying since forever, unless item has a history."""
+        key = _tariff_key(item["mode"], item["note"], item["key"])
+        if self.versions.get(key):
+            return
+        self.versions[key] = [(0.0, float(price))]
+        self._index.pop(key, None)
+        await self._async_save()
+
+    async def async_set(
+        self, item: dict[str, Any], price: float, since: dt | None = None
+    ) -> bool:
+        """Record price as the one in effect from since (forever when None).
+
+        Returns whether the history changed: setting the price already in
+        effect at that time is a no-op.
+        """
+        key = _tariff_key(item["mode"], item["note"], item["key"])
+        versions = self.versions.setdefault(key, [])
+        start = since.timestamp() if since is not None else 0.0
+        position = bisect.bisect_right(versions, start, key=lambda version: version[0])
+        if position and versions[position - 1][0] == start:
+            versions[position - 1] = (start, float(price))
+        elif position and versions[position - 1][1] == float(price):
+            return False
+        else:
+            versions.insert(position, (start, float(price)))
+        _LOGGER.debug("[tariffs] %s = %s from %s", key, price, since)
+        self._index.pop(key, None)
+        await self._async_save()
+        return True
+
+    def prices_at(
+        self, mode: str, note: str, starts: np.ndarray, key: str = CONF_PRICE
+    ) -> np.ndarray | None:
+        """Return the price in effect at each start, None without history.
+
+        key is the flat price by default, or a Tempo colour.
+        """
+        key = _tariff_key(mode, note, key)
+        if key not in self._index:
+            if not (versions := self.versions.get(key)):
+                return None
+            self._index[key] = (
+                np.array([since for since, _ in versions], dtype=float),
+                np.array([price for _, price in versions], dtype=float),
+            )
+        froms, prices = self._index[key]
+        return prices[np.maximum(np.searchsorted(froms, starts, "right") - 1, 0)]
+
+    async def _async_save(self) -> None:
+        """Persist the history."""
+        await self._store.async_save({"versions": self.versions})
@@ -0,0 +1,139 @@
+"""Local Tempo colour calendar for MyElectricalData."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, timedelta
+from datetime import datetime as dt
+from typing import Any
+
+import numpy as np
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from myelectricaldatapy import EnedisByPDL
+
+from .const import CONF_BLUE, CONF_RED, CONF_WHITE, DOMAIN, STORAGE_VERSION
+
+# Colour codes of the date-indexed array, 0 standing for an unknown day.
+TEMPO_COLORS = np.array(["", CONF_BLUE, CONF_WHITE, CONF_RED])
+TEMPO_CODES = {str(color): code for code, color in enumerate(TEMPO_COLORS) if code}
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def tempo_store(hass: HomeAssistant) -> Store[dict[str, Any]]:
+    """Return the store holding the Tempo calendar, shared by every entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.tempo")
+
+
+class TempoCalendar:
+    """Persistent colour of every Tempo day seen so far.
+
+    The colours are national (RTE), final once published and the same for
+    every PDL, yet each collect would ask for them again: one extra API call
+    per backfill, crawl or catch-up window. Every colour fetched is kept
+    here, so a window whose days are all known is priced from the calendar
+    without that call, and the local repricing gets the colour of each row.
+    Days are looked up in a date-indexed array (see colors_at) rebuilt
+    lazily after each change.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize an empty calendar."""
+        self.hass = hass
+        self.days: dict[str, str] = {}
+        self._store = tempo_store(hass)
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._index: tuple[int, np.ndarray] | None = None
+
+    async def async_load(self) -> None:
+        """Restore the calendar, once for all the entries sharing it."""
+        async with self._lock:
+            if self._loaded:
+                return
+            if (stored := await self._store.async_load()) is not None:
+                self.days = dict(stored.get("days", {}))
+            self._loaded = True
+
+    @callback
+    def get(self, day: date) -> str | None:
+        """Return the colour of day, None while unknown."""
+        return self.days.get(day.isoformat())
+
+    @callback
+    def between(self, start: dt, end: dt) -> dict[str, str] | None:
+        """Return the colours of the days in [start, end), None if one is unknown.
+
+        Shaped like the client's own tempo attribute, so it can be handed to
+        a client instead of fetching them (see async_subscribe_tempo).
+        """
+        colors: dict[str, str] = {}
+        day = start.date()
+        while day <= (end - timedelta(microseconds=1)).date():
+            if (color := self.get(day)) is None:
+                return None
+            colors[day.isoformat()] = color
+            day += timedelta(days=1)
+        return colors
+
+    def colors_at(self, starts: np.ndarray) -> np.ndarray:
+        """Return the colour of the local day of each start, "" when unknown."""
+        if self._index is None:
+            ordinals = [date.fromisoformat(day).toordinal() for day in self.days]
+            first = min(ordinals, default=0)
+            codes = np.zeros(max(ordinals, default=first - 1) - first + 1, np.int8)
+            for ordinal, color in zip(ordinals, self.days.values(), strict=True):
+                codes[ordinal - first] = TEMPO_CODES[color]
+            self._index = (first, codes)
+        first, codes = self._index
+        timezone = dt_util.get_default_time_zone()
+        offsets = (
+            np.array(
+                [dt.fromtimestamp(ts, timezone).toordinal() for ts in starts.tolist()],
+                dtype=int,
+            )
+            - first
+        )
+        known = (offsets >= 0) & (offsets < len(codes))
+        found = np.zeros(len(offsets), np.int8)
+        found[known] = codes[offsets[known]]
+        return TEMPO_COLORS[found]
+
+    async def async_update(self, colors: dict[str, Any]) -> None:
+        """Record the colours a client fetched, saved only if any was new."""
+        changed = False
+        for day, color in colors.items():
+            if (color := str(color).lower()) not in TEMPO_CODES:
+                continue
+            if self.days.get(day) != color:
+                self.days[day] = color
+                changed = True
+        if changed:
+            _LOGGER.debug("[tempo] %s days known", len(self.days))
+            self._index = None
+            await self._store.async_save({"days": self.days})
+
+
+@callback
+def tempo_calendar(hass: HomeAssistant) -> TempoCalendar:
+    """Return the Tempo calendar shared by every entry."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if "tempo" not in data:
+        data["tempo"] = TempoCalendar(hass)
+    return data["tempo"]
+
+
+@callback
+def async_subscribe_tempo(client: EnedisByPDL, colors: dict[str, str] | None) -> None:
+    """Enable a client's Tempo pricing, from colors when known.
+
+    Must come after set_collects, which turns the subscription on by itself
+    for Tempo prices. Without colors, the client fetches them along with its
+    collect (one more call); with them, it prices from them without calling.
+    """
+    client.tempo_subscription(colors is None)
+    if colors is not None:
+        client.tempo = colors
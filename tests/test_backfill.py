@@ -0,0 +1,251 @@
+"""Tests for custom_components.myelectricaldata.backfill."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import UTC, timedelta
+from datetime import datetime as dt
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.const import CONF_TOKEN
+from homeassistant.util import dt as dt_util
+from myelectricaldatapy import EnedisException
+
+from custom_components.myelectricaldata.backfill import WINDOW_ATTEMPTS, BackfillQueue
+from custom_components.myelectricaldata.const import (
+    CONF_AUTH,
+    CONF_CONSUMPTION,
+    CONF_STD,
+    CONSUMPTION_DAILY,
+    CONSUMPTION_DETAIL,
+)
+from custom_components.myelectricaldata.helpers import (
+    StatisticsImportQueue,
+    async_import_sensor_statistics,
+)
+from custom_components.myelectricaldata.quota import quota_budget
+
+START = dt(2024, 1, 1)
+
+
+@pytest.fixture
+def mock_api():
+    """Return the API client handed out to the backfill."""
+    api = MagicMock()
+    api.async_update_collects = AsyncMock()
+    api.has_collected = True
+    api.stats = {}
+    return api
+
+
+@pytest.fixture
+def coordinator(mock_api):
+    """Return the parts of the coordinator the backfill relies on."""
+    return SimpleNamespace(
+        lock=asyncio.Lock(),
+        rebuilder=SimpleNamespace(async_mark_dirty=AsyncMock()),
+        tariffs=None,
+        stats_cache=MagicMock(),
+        import_queue=SimpleNamespace(async_flush=AsyncMock()),
+        async_update_listeners=MagicMock(),
+        create_client=MagicMock(return_value=mock_api),
+    )
+
+
+@pytest.fixture
+def backfill(hass, config_entry, coordinator):
+    """Return an empty backfill queue for the mock config entry."""
+    config_entry.add_to_hass(hass)
+    return BackfillQueue(hass, config_entry, coordinator)
+
+
+@pytest.fixture(autouse=True)
+def mock_statistics(mock_api, coordinator):
+    """Patch the statistics writes of the backfill."""
+    with (
+        patch(
+            "custom_components.myelectricaldata.backfill.async_get_last_infos",
+            new=AsyncMock(return_value=(None, {}, {})),
+        ) as mock_last_infos,
+        patch(
+            "custom_components.myelectricaldata.backfill.async_import_sensor_statistics",
+            new=AsyncMock(return_value=dt_util.utc_from_timestamp(0)),
+        ) as mock_import,
+    ):
+        mock_api.mock_import = mock_import
+        mock_api.mock_last_infos = mock_last_infos
+        mock_api.mock_rebuild = coordinator.rebuilder.async_mark_dirty
+        yield
+
+
+async def test_job_is_split_into_api_windows_and_rebuilt_once(backfill, mock_api):
+    """A load curve range is collected 7 days at a time, then rebuilt once."""
+    with patch.object(backfill, "async_start"):
+        await backfill.async_enqueue(
+            CONSUMPTION_DETAIL, START, START + timedelta(days=17)
+        )
+    assert backfill.jobs[0]["windows_total"] == 3
+
+    await backfill._async_run()
+
+    windows = [
+        (call.kwargs["start"], call.kwargs["end"])
+        for call in mock_api.set_collects.call_args_list
+    ]
+    assert windows == [
+        (START, START + timedelta(days=7)),
+        (START + timedelta(days=7), START + timedelta(days=14)),
+        (START + timedelta(days=14), START + timedelta(days=17)),
+    ]
+    assert mock_api.mock_import.await_count == 3
+    # Each window's sums carry on from the rows stored just before it
+    assert [
+        call.kwargs["before"] for call in mock_api.mock_last_infos.await_args_list
+    ] == [start for start, _ in windows]
+    mock_api.mock_rebuild.assert_awaited_once()
+    assert mock_api.mock_rebuild.await_args.args[1] == dt_util.utc_from_timestamp(0)
+    assert backfill.jobs == []
+    assert backfill.progress == 100.0
+
+
+async def test_daily_range_uses_yearly_windows(backfill, mock_api):
+    """Daily data is collected a year at a time."""
+    with patch.object(backfill, "async_start"):
+        await backfill.async_enqueue(
+            CONSUMPTION_DAILY, START, START + timedelta(days=400)
+        )
+
+    await backfill._async_run()
+
+    assert mock_api.set_collects.call_count == 2
+
+
+async def test_waits_for_tomorrow_when_quota_is_spent(
+    hass, config_entry, coordinator, backfill, mock_api
+):
+    """Windows that don't fit today's quota are deferred, progress is kept."""
+    quota_budget(hass, config_entry.options[CONF_AUTH][CONF_TOKEN]).update_from_access(
+        {"quota_limit": 1, "call_number": 0}
+    )
+    with patch.object(backfill, "async_start"):
+        await backfill.async_enqueue(
+            CONSUMPTION_DETAIL, START, START + timedelta(days=14)
+        )
+
+    with patch(
+        "custom_components.myelectricaldata.backfill.async_track_point_in_time"
+    ) as mock_track:
+        await backfill._async_run()
+
+    mock_track.assert_called_once()
+    assert mock_api.set_collects.call_count == 1
+    assert backfill.jobs[0]["cursor"] == (START + timedelta(days=7)).isoformat()
+    mock_api.mock_rebuild.assert_not_called()
+
+    restored = BackfillQueue(hass, config_entry, coordinator)
+    await restored.async_load()
+    assert restored.jobs == backfill.jobs
+    assert restored.progress == 50.0
+
+
+async def test_failed_window_is_retried_without_advancing(backfill, mock_api):
+    """A window that brings nothing back keeps the cursor and is retried later."""
+    mock_api.has_collected = False
+    with patch.object(backfill, "async_start"):
+        await backfill.async_enqueue(
+            CONSUMPTION_DETAIL, START, START + timedelta(days=14)
+        )
+
+    with patch(
+        "custom_components.myelectricaldata.backfill.async_track_point_in_time"
+    ) as mock_track:
+        await backfill._async_run()
+
+    mock_track.assert_called_once()
+    assert mock_track.call_args.args[2] < dt_util.start_of_local_day() + timedelta(
+        days=1
+    )
+    mock_api.mock_import.assert_not_called()
+    assert backfill.jobs[0]["cursor"] == START.isoformat()
+    assert backfill.jobs[0]["windows_done"] == 0
+    assert backfill.jobs[0]["attempts"] == 1
+
+
+async def test_window_is_given_up_after_repeated_failures(backfill, mock_api):
+    """A window still empty after WINDOW_ATTEMPTS tries doesn't stop the job."""
+    mock_api.async_update_collects.side_effect = [
+        *[EnedisException("Data collection is empty")] * WINDOW_ATTEMPTS,
+        None,
+    ]
+    with patch.object(backfill, "async_start"):
+        await backfill.async_enqueue(
+            CONSUMPTION_DETAIL, START, START + timedelta(days=14)
+        )
+
+    with patch("custom_components.myelectricaldata.backfill.async_track_point_in_time"):
+        for _ in range(WINDOW_ATTEMPTS):
+            await backfill._async_run()
+
+    assert mock_api.async_update_collects.await_count == WINDOW_ATTEMPTS + 1
+    assert mock_api.mock_import.await_count == 1
+    mock_api.mock_rebuild.assert_awaited_once()
+    assert backfill.jobs == []
+
+
+async def test_identical_request_is_queued_once(backfill, mock_api):
+    """A repeated fetch_data call for a range already queued is dropped."""
+    with patch.object(backfill, "async_start"):
+        for _ in range(3):
+            await backfill.async_enqueue(
+                CONSUMPTION_DETAIL, START, START + timedelta(days=7), 0.2
+            )
+        await backfill.async_enqueue(
+            CONSUMPTION_DETAIL, START, START + timedelta(days=7), 0.3
+        )
+
+    assert [job["price"] for job in backfill.jobs] == [0.2, 0.3]
+
+
+async def test_window_rows_reach_the_recorder(
+    recorder_mock, hass, backfill, coordinator, mock_api
+):
+    """A window smaller than a flush page is still handed to the recorder."""
+    coordinator.import_queue = StatisticsImportQueue(hass)
+    mock_api.stats = {
+        CONF_CONSUMPTION: [
+            {
+                "notes": CONF_STD,
+                "date": dt(2024, 1, 1, hour, tzinfo=UTC),
+                "value": 1.0,
+                "sum_value": hour + 1.0,
+                "price": 0.2,
+                "sum_price": (hour + 1) * 0.2,
+            }
+            for hour in range(3)
+        ]
+    }
+    with patch.object(backfill, "async_start"):
+        await backfill.async_enqueue(
+            CONSUMPTION_DETAIL, START, START + timedelta(days=1), 0.2
+        )
+
+    with (
+        patch(
+            "custom_components.myelectricaldata.backfill.async_import_sensor_statistics",
+            new=async_import_sensor_statistics,
+        ),
+        patch(
+            "custom_components.myelectricaldata.helpers.async_import_statistics"
+        ) as mock_import_statistics,
+    ):
+        await backfill._async_run()
+
+    imported = {
+        call.args[1]["statistic_id"]: call.args[2]
+        for call in mock_import_statistics.call_args_list
+    }
+    assert imported
+    assert all(len(rows) == 3 for rows in imported.values())
+    assert backfill.jobs == []
@@ -3,13 +3,18 @@
 from __future__ import annotations
 
 from datetime import datetime as dt
+from datetime import time
 from types import SimpleNamespace
 from unittest.mock import patch
 
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
 from custom_components.myelectricaldata.binary_sensor import (
     CountdownSensor,
     OffpeakSensor,
     async_setup_entry,
+    offpeak_transitions,
 )
 
 
@@ -21,6 +26,7 @@ def _fake_coordinator(**overrides):
         contract={},
         last_access=None,
         last_refresh=None,
+        statistics_corrections=0,
         last_update_success=True,
         async_add_listener=lambda *args, **kwargs: (lambda: None),
     )
@@ -130,16 +136,58 @@ def test_offpeak_sensor_handle_coordinator_update_recomputes_state():
     assert sensor._attr_is_on is True
 
 
-async def test_offpeak_sensor_added_to_hass_schedules_refresh(hass):
-    """async_added_to_hass wires up a periodic local refresh."""
-    coordinator = _fake_coordinator(contract={"offpeak_hours": "01H00-06H00"})
+def test_offpeak_transitions_merge_and_wrap():
+    """Ranges compile into sorted flips, merged and wrapped past midnight."""
+    assert offpeak_transitions("HC (22H00-6H00)") == [
+        (time(6, 0), False),
+        (time(22, 0), True),
+    ]
+    assert offpeak_transitions("HC (2H00-7H00;6H00-8H00)") == [
+        (time(2, 0), True),
+        (time(8, 0), False),
+    ]
+    assert offpeak_transitions("HC (0H00-12H00;12H00-24H00)") == [(time(0), True)]
+    assert offpeak_transitions("") == []
+
+
+async def test_offpeak_sensor_exposes_next_change(hass, freezer):
+    """The next transition is exposed as the next_change attribute."""
+    freezer.move_to(dt(2026, 1, 1, 23, 0, tzinfo=dt_util.get_default_time_zone()))
+    coordinator = _fake_coordinator(contract={"offpeak_hours": "HC (1H30-8H00)"})
+    sensor = OffpeakSensor(coordinator)
+    assert sensor._attr_is_on is False
+    assert sensor._attr_extra_state_attributes["next_change"] == dt(
+        2026, 1, 2, 1, 30, tzinfo=dt_util.get_default_time_zone()
+    )
+
+
+async def test_offpeak_sensor_writes_state_on_transitions_only(hass, freezer):
+    """A single timer fires at the next transition and flips the state."""
+    timezone = dt_util.get_default_time_zone()
+    freezer.move_to(dt(2026, 1, 1, 5, 0, tzinfo=timezone))
+    coordinator = _fake_coordinator(contract={"offpeak_hours": "HC (22H00-6H00)"})
     sensor = OffpeakSensor(coordinator)
     sensor.hass = hass
     sensor.entity_id = "binary_sensor.myelectricaldata_offpeak"
 
-    await sensor.async_added_to_hass()
-    assert sensor._unsubscribe is not None
+    with patch.object(sensor, "async_write_ha_state") as mock_write:
+        await sensor.async_added_to_hass()
+        assert sensor._attr_is_on is True
+        assert sensor._unsubscribe is not None
+
+        freezer.move_to(dt(2026, 1, 1, 5, 59, tzinfo=timezone))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+        mock_write.assert_not_called()
 
-    await sensor._hass_create_refresh_task(dt.now())
+        freezer.move_to(dt(2026, 1, 1, 6, 0, 1, tzinfo=timezone))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
 
-    await sensor.async_unload()
+    mock_write.assert_called_once()
+    assert sensor._attr_is_on is False
+    assert sensor._attr_extra_state_attributes["next_change"] == dt(
+        2026, 1, 1, 22, 0, tzinfo=timezone
+    )
+    sensor._async_cancel()
+    assert sensor._unsubscribe is None
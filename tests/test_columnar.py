@@ -0,0 +1,75 @@
+"""Tests for custom_components.myelectricaldata.columnar."""
+
+from __future__ import annotations
+
+import numpy as np
+from homeassistant.util import dt as dt_util
+
+from custom_components.myelectricaldata.columnar import StatisticColumns
+
+
+def test_from_pairs_fills_missing_states_with_zero():
+    """None states become zero so they don't poison the running total."""
+    columns = StatisticColumns.from_pairs([(0.0, 1.5), (3600.0, None)])
+
+    assert columns.states.tolist() == [1.5, 0.0]
+    assert columns.sums.tolist() == [0.0, 0.0]
+
+
+def test_from_records_reads_state_and_sum_keys():
+    """Collected rows are read by key, dates turned into UTC timestamps."""
+    start = dt_util.utc_from_timestamp(3600)
+    columns = StatisticColumns.from_records(
+        [{"date": start, "price": 2.0, "sum_price": 5.0}], "price", "sum_price"
+    )
+
+    assert columns.starts.tolist() == [3600.0]
+    assert columns.states.tolist() == [2.0]
+    assert columns.sums.tolist() == [5.0]
+
+
+def test_cumsum_carries_anchor():
+    """The running total starts from the anchor, not from zero."""
+    columns = StatisticColumns.from_pairs([(0.0, 1.0), (1.0, 2.0), (2.0, 3.0)])
+
+    result = columns.cumsum(10.0)
+
+    assert result.sums.tolist() == [11.0, 13.0, 16.0]
+    assert result.last_sum == 16.0
+
+
+def test_sorted_nonzero_and_window():
+    """Rows get ordered, emptied rows dropped and a [start, end) slice kept."""
+    columns = StatisticColumns(
+        np.array([3.0, 1.0, 2.0, 4.0]),
+        np.array([3.0, 1.0, 0.0, 4.0]),
+        np.zeros(4),
+    )
+
+    result = columns.nonzero().sorted()
+
+    assert result.starts.tolist() == [1.0, 3.0, 4.0]
+    assert result.window(2.0, 4.0).starts.tolist() == [3.0]
+    assert len(result.window(end=1.0)) == 0
+    assert len(result.window(start=1.0)) == 3
+
+
+def test_states_at_reads_matching_rows_only():
+    """States are looked up by start, zero where no row starts there."""
+    columns = StatisticColumns.from_pairs([(1.0, 1.5), (3.0, 2.5)])
+
+    assert columns.states_at(np.array([3.0, 2.0, 1.0, 4.0])).tolist() == [
+        2.5,
+        0.0,
+        1.5,
+        0.0,
+    ]
+    assert StatisticColumns.from_pairs([]).states_at(np.array([1.0])).tolist() == [0]
+
+
+def test_to_statistic_data_converts_to_recorder_rows():
+    """Rows come out as StatisticData with UTC datetimes and plain floats."""
+    rows = StatisticColumns.from_pairs([(0.0, 1.0)]).cumsum(2.0).to_statistic_data()
+
+    assert rows == [{"start": dt_util.utc_from_timestamp(0), "state": 1.0, "sum": 3.0}]
+    assert isinstance(rows[0]["sum"], float)
@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
 from myelectricaldatapy import EnedisException, LimitReached
 
-from custom_components.myelectricaldata.const import CONF_AUTH, CONF_TEMPO
+from custom_components.myelectricaldata.const import (
+    CONF_AUTH,
+    CONF_CONSUMPTION,
+    CONF_REPRICE,
+    CONF_TEMPO,
+    CONSUMPTION_DETAIL,
+)
 from custom_components.myelectricaldata.coordinator import (
+    SCAN_INTERVAL,
     EnedisDataUpdateCoordinator,
 )
+from custom_components.myelectricaldata.helpers import build_sensor_items
 
 
 def _make_api_mock() -> MagicMock:
@@ -23,6 +34,7 @@ def _make_api_mock() -> MagicMock:
     api.access = {"valid": True}
     api.contract = {"offpeak_hours": None}
     api.tempo_day = None
+    api.tempo = {}
     api.ecowatt_day = None
     api.last_access = None
     api.last_refresh = None
@@ -42,7 +54,7 @@ async def test_init_sets_defaults_from_entry(coordinator, pdl):
     assert coordinator.pdl == pdl
     assert coordinator.access == {}
     assert coordinator.contract == {}
-    assert coordinator.retry == 3
+    assert coordinator.update_interval == SCAN_INTERVAL
 
 
 async def test_async_setup_builds_api(coordinator):
@@ -56,6 +68,38 @@ async def test_async_setup_builds_api(coordinator):
         assert coordinator.api is mock_cls.return_value
 
 
+async def test_async_setup_restores_contract_from_the_cache(coordinator, pdl):
+    """Entities set up before the first refresh get the cached contract."""
+    contract = {"subscribed_power": "6 kVA", "offpeak_hours": "HC (22H00-6H00)"}
+    contracts = {
+        "customer": {
+            "usage_points": [
+                {"usage_point": {"usage_point_id": pdl}, "contracts": contract}
+            ]
+        }
+    }
+    await coordinator.endpoints.async_fetch(
+        "contract", AsyncMock(return_value=contracts)
+    )
+    with patch("custom_components.myelectricaldata.coordinator.EnedisByPDL"):
+        await coordinator._async_setup()
+
+    assert coordinator.contract == contract
+    assert coordinator.access == {}
+
+
+async def test_clients_share_the_hass_session(hass, coordinator):
+    """Every client, including the backfill's, reuses Home Assistant's session."""
+    with patch(
+        "custom_components.myelectricaldata.coordinator.EnedisByPDL"
+    ) as mock_cls:
+        coordinator.backfill.coordinator.create_client()
+
+    session = mock_cls.call_args.kwargs["session"]
+    assert session.session is async_get_clientsession(hass)
+    assert session.cache is coordinator.endpoints
+
+
 async def test_async_update_data_populates_sensors(recorder_mock, coordinator):
     """A full update cycle stores per-entity summaries in the returned dict."""
     api = _make_api_mock()
@@ -70,7 +114,6 @@ async def test_async_update_data_populates_sensors(recorder_mock, coordinator):
         assert "value" in payload
     assert coordinator.access == api.access
     assert coordinator.contract == api.contract
-    assert coordinator.retry == 2  # decremented once
 
 
 async def test_async_update_data_handles_limit_reached(recorder_mock, coordinator):
@@ -108,7 +151,13 @@ async def test_async_update_data_enables_tempo_subscription(
     api = _make_api_mock()
     coordinator.api = api
 
-    await coordinator._async_update_data()
+    with patch.object(
+        coordinator.feeds.tempo, "async_refresh", new=AsyncMock()
+    ) as mock_refresh:
+        await coordinator._async_update_data()
+
+    # Today's colour comes from the shared feed, the history from the collect
+    mock_refresh.assert_awaited_once_with("fake-token", config_entry.entry_id)
     api.tempo_subscription.assert_called_once_with(True)
 
 
@@ -121,10 +170,304 @@ async def test_async_update_data_migrates_legacy_stats_once(recorder_mock, coord
         "custom_components.myelectricaldata.coordinator.async_migrate_legacy_statistics",
         new=AsyncMock(),
     ) as mock_migrate:
-        await coordinator._async_update_data()
+        data = await coordinator._async_update_data()
         assert mock_migrate.await_count >= 1
-        assert coordinator._migrated_legacy_stats is True
+        assert coordinator._migrated == set(data)
 
         mock_migrate.reset_mock()
         await coordinator._async_update_data()
         mock_migrate.assert_not_called()
+
+
+async def test_migration_state_survives_a_restart(recorder_mock, hass, config_entry):
+    """A new coordinator for the same entry doesn't probe migrated ids again."""
+    config_entry.add_to_hass(hass)
+    first = EnedisDataUpdateCoordinator(hass, config_entry)
+    first.api = _make_api_mock()
+    await first._async_update_data()
+
+    second = EnedisDataUpdateCoordinator(hass, config_entry)
+    with patch(
+        "custom_components.myelectricaldata.coordinator.EnedisByPDL",
+        return_value=_make_api_mock(),
+    ):
+        await second._async_setup()
+    with patch(
+        "custom_components.myelectricaldata.coordinator.async_migrate_legacy_statistics",
+        new=AsyncMock(),
+    ) as mock_migrate:
+        await second._async_update_data()
+    mock_migrate.assert_not_called()
+
+
+async def test_async_reset_migrations_forces_a_new_run(recorder_mock, coordinator):
+    """Resetting the persisted state makes the next refresh migrate again."""
+    coordinator.api = _make_api_mock()
+    await coordinator._async_update_data()
+    await coordinator.async_reset_migrations()
+
+    with patch(
+        "custom_components.myelectricaldata.coordinator.async_migrate_legacy_statistics",
+        new=AsyncMock(),
+    ) as mock_migrate:
+        await coordinator._async_update_data()
+    mock_migrate.assert_awaited_once()
+
+
+async def test_async_update_data_steady_state_skips_database(
+    recorder_mock, coordinator
+):
+    """Once seeded, a refresh with nothing new doesn't query the recorder."""
+    coordinator.api = _make_api_mock()
+    await coordinator._async_update_data()
+
+    with patch(
+        "custom_components.myelectricaldata.helpers.async_get_many_db_infos",
+        new=AsyncMock(),
+    ) as mock_db:
+        data = await coordinator._async_update_data()
+
+    mock_db.assert_not_called()
+    assert data
+
+
+async def test_async_handle_hourly_statistics_counts_corrections(coordinator):
+    """Corrections reported by the reassert are accumulated on the coordinator."""
+    with patch(
+        "custom_components.myelectricaldata.coordinator.async_reassert_statistics",
+        new=AsyncMock(return_value=2),
+    ):
+        await coordinator.async_handle_hourly_statistics(MagicMock())
+        await coordinator.async_handle_hourly_statistics(MagicMock())
+
+    assert coordinator.statistics_corrections == 4
+
+
+async def test_async_update_data_forces_refresh_only_while_data_is_due(
+    recorder_mock, coordinator
+):
+    """force_refresh follows the scheduler instead of a fixed retry count."""
+    coordinator.api = _make_api_mock()
+
+    with patch.object(coordinator.scheduler, "expects_data", return_value=True):
+        await coordinator._async_update_data()
+    coordinator.api.async_update.assert_awaited_with(force_refresh=True)
+
+    with patch.object(coordinator.scheduler, "expects_data", return_value=False):
+        await coordinator._async_update_data()
+    coordinator.api.async_update.assert_awaited_with(force_refresh=False)
+
+
+async def test_async_update_data_applies_scheduled_interval(recorder_mock, coordinator):
+    """The next refresh is scheduled by the publication-aware scheduler."""
+    coordinator.api = _make_api_mock()
+
+    with patch.object(
+        coordinator.scheduler, "next_interval", return_value=timedelta(hours=6)
+    ):
+        await coordinator._async_update_data()
+
+    assert coordinator.update_interval == timedelta(hours=6)
+
+
+async def test_async_update_data_judges_freshness_on_energy_statistics(
+    recorder_mock, coordinator
+):
+    """A mode without energy that day doesn't keep the day from being fresh."""
+    coordinator.api = _make_api_mock()
+    yesterday = dt_util.now() - timedelta(days=1)
+    stale = dt_util.now() - timedelta(days=5)
+
+    async def _async_get(statistic_ids):
+        return {
+            statistic_id: (1.0, stale if "production" in statistic_id else yesterday)
+            for statistic_id in statistic_ids
+        }
+
+    coordinator.stats_cache.async_get = _async_get
+    with patch.object(
+        coordinator.scheduler, "async_record", new=AsyncMock()
+    ) as mock_record:
+        await coordinator._async_update_data()
+
+    assert mock_record.await_args.args[1] == yesterday
+
+
+async def test_catch_up_collects_load_curve_windows_until_now(coordinator, pdl):
+    """A load curve weeks behind is caught up window after window in one go."""
+    now = dt_util.now()
+    lags = [now - timedelta(days=20), now - timedelta(days=13), now - timedelta(days=6)]
+    items = build_sensor_items(
+        CONF_CONSUMPTION, pdl, CONSUMPTION_DETAIL, [], has_price=False
+    )
+    coordinator.stats_cache.async_get = AsyncMock(
+        side_effect=[{items[0]["entity_id"]: (0.0, lag)} for lag in lags]
+    )
+    clients = []
+
+    def _create_client():
+        clients.append(_make_api_mock())
+        clients[-1].async_update_collects = AsyncMock()
+        return clients[-1]
+
+    with (
+        patch.object(coordinator, "create_client", side_effect=_create_client),
+        patch(
+            "custom_components.myelectricaldata.coordinator.async_import_sensor_statistics",
+            new=AsyncMock(return_value=lags[0]),
+        ) as mock_import,
+    ):
+        dirty_from = await coordinator._async_catch_up(
+            CONSUMPTION_DETAIL, [], {}, items, tempo=False
+        )
+
+    assert len(clients) == 2
+    assert mock_import.await_count == 2
+    assert dirty_from == lags[0]
+
+
+async def test_catch_up_only_locks_around_imports(coordinator, pdl):
+    """Fetching a catch-up window doesn't hold the entry's write lock."""
+    now = dt_util.now()
+    items = build_sensor_items(
+        CONF_CONSUMPTION, pdl, CONSUMPTION_DETAIL, [], has_price=False
+    )
+    coordinator.stats_cache.async_get = AsyncMock(
+        side_effect=[
+            {items[0]["entity_id"]: (0.0, lag)}
+            for lag in (now - timedelta(days=13), now - timedelta(days=6))
+        ]
+    )
+    client = _make_api_mock()
+    locked: list[bool] = []
+
+    async def _async_update_collects():
+        locked.append(coordinator.lock.locked())
+
+    async def _async_import(*_args):
+        locked.append(coordinator.lock.locked())
+        return now
+
+    client.async_update_collects = _async_update_collects
+    with (
+        patch.object(coordinator, "create_client", return_value=client),
+        patch(
+            "custom_components.myelectricaldata.coordinator.async_import_sensor_statistics",
+            new=_async_import,
+        ),
+    ):
+        await coordinator._async_catch_up(
+            CONSUMPTION_DETAIL, [], {}, items, tempo=False
+        )
+
+    assert locked == [False, True]
+
+
+async def test_catch_up_takes_known_tempo_colours_from_the_calendar(coordinator, pdl):
+    """A window whose colours are all known doesn't ask the API for them."""
+    now = dt_util.now()
+    items = build_sensor_items(
+        CONF_CONSUMPTION, pdl, CONSUMPTION_DETAIL, [], has_price=False
+    )
+    coordinator.stats_cache.async_get = AsyncMock(
+        side_effect=[
+            {items[0]["entity_id"]: (0.0, lag)}
+            for lag in (now - timedelta(days=13), now - timedelta(days=6))
+        ]
+    )
+    await coordinator.tempo_calendar.async_update(
+        {(now - timedelta(days=day)).date().isoformat(): "blue" for day in range(20)}
+    )
+    client = _make_api_mock()
+    client.async_update_collects = AsyncMock()
+
+    with (
+        patch.object(coordinator, "create_client", return_value=client),
+        patch(
+            "custom_components.myelectricaldata.coordinator.async_import_sensor_statistics",
+            new=AsyncMock(return_value=None),
+        ) as mock_import,
+    ):
+        await coordinator._async_catch_up(CONSUMPTION_DETAIL, [], {}, items, tempo=True)
+
+    client.tempo_subscription.assert_called_once_with(False)
+    assert set(client.tempo.values()) == {"blue"}
+    assert mock_import.await_args.args[-1] is coordinator.tempo_calendar
+    assert coordinator.quota.used == 1
+
+
+async def test_catch_up_stops_when_quota_is_spent(coordinator, pdl):
+    """No catch-up window is collected beyond the spare quota."""
+    coordinator.quota.update_from_access({"quota_limit": 5, "call_number": 5})
+    items = build_sensor_items(
+        CONF_CONSUMPTION, pdl, CONSUMPTION_DETAIL, [], has_price=False
+    )
+    coordinator.stats_cache.async_get = AsyncMock(
+        return_value={items[0]["entity_id"]: (0.0, dt_util.now() - timedelta(days=30))}
+    )
+
+    with patch.object(coordinator, "create_client") as mock_create_client:
+        assert (
+            await coordinator._async_catch_up(
+                CONSUMPTION_DETAIL, [], {}, items, tempo=False
+            )
+            is None
+        )
+
+    mock_create_client.assert_not_called()
+
+
+async def test_rebuilt_statistics_are_forgotten(coordinator):
+    """A rebuild drops the cached and known-good sums of what it rewrote."""
+    coordinator._known_sums["sensor.a"] = (None, 1.0, "energy")
+    coordinator._known_sums["sensor.b"] = (None, 2.0, "energy")
+    with patch.object(coordinator.stats_cache, "invalidate") as mock_invalidate:
+        coordinator._async_rebuilt(["sensor.a"])
+
+    mock_invalidate.assert_called_once_with(["sensor.a"])
+    assert list(coordinator._known_sums) == ["sensor.b"]
+
+
+async def test_async_reprice_rebuilds_past_the_repriced_range(coordinator, pdl):
+    """Cost sums past the repriced rows are rebuilt, per mode, right after."""
+    coordinator.sensor_items = build_sensor_items(
+        CONF_CONSUMPTION, pdl, CONSUMPTION_DETAIL, [], has_price=True
+    )
+    dirty_from = dt_util.utc_from_timestamp(3600)
+    with (
+        patch(
+            "custom_components.myelectricaldata.coordinator.async_reprice_statistics",
+            new=AsyncMock(return_value=dirty_from),
+        ) as mock_reprice,
+        patch.object(coordinator.rebuilder, "async_rebuild") as mock_rebuild,
+        patch.object(coordinator, "async_request_refresh") as mock_refresh,
+    ):
+        await coordinator.async_reprice()
+
+    mock_reprice.assert_awaited_once()
+    mock_rebuild.assert_awaited_once_with(
+        [item for item in coordinator.sensor_items if item["kind"] == "cost"],
+        dirty_from,
+    )
+    mock_refresh.assert_awaited_once()
+
+
+async def test_reprice_requests_merge_from_the_earliest_date(coordinator, config_entry):
+    """Dated tariff versions recorded in a row reprice once, from the first."""
+    coordinator.hass.config_entries.async_update_entry(
+        config_entry,
+        options={
+            **config_entry.options,
+            CONF_AUTH: {**config_entry.options[CONF_AUTH], CONF_REPRICE: True},
+        },
+    )
+    first = dt_util.utc_from_timestamp(3600)
+    with (
+        patch.object(coordinator, "async_reprice") as mock_reprice,
+        patch.object(coordinator._reprice_debouncer, "async_call"),
+    ):
+        await coordinator.async_request_reprice(first + timedelta(days=1))
+        await coordinator.async_request_reprice(first)
+        await coordinator._async_reprice_pending()
+
+    mock_reprice.assert_awaited_once_with(first)
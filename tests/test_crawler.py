@@ -0,0 +1,239 @@
+"""Tests for custom_components.myelectricaldata.crawler."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import UTC, timedelta
+from datetime import datetime as dt
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.util import dt as dt_util
+from myelectricaldatapy import EnedisException, LimitReached
+
+from custom_components.myelectricaldata.const import (
+    CONF_CONSUMPTION,
+    CONF_CRAWL,
+    CONF_SERVICE,
+    CONF_STD,
+    CONSUMPTION_DETAIL,
+)
+from custom_components.myelectricaldata.crawler import HistoryCrawler
+from custom_components.myelectricaldata.helpers import StatisticsImportQueue
+from custom_components.myelectricaldata.quota import QuotaBudget
+
+FIRST = dt(2024, 1, 15)
+
+
+@pytest.fixture
+def coordinator():
+    """Return the parts of the coordinator the crawler relies on."""
+    api = MagicMock()
+    api.async_update_collects = AsyncMock()
+    api.has_collected = True
+    api.stats = {}
+    return SimpleNamespace(
+        api=api,
+        contract={},
+        quota=QuotaBudget(),
+        backfill=SimpleNamespace(jobs=[]),
+        lock=asyncio.Lock(),
+        rebuilder=SimpleNamespace(async_mark_dirty=AsyncMock()),
+        tariffs=None,
+        import_queue=SimpleNamespace(async_flush=AsyncMock()),
+        create_session=MagicMock(return_value=SimpleNamespace(failures=[])),
+        create_client=MagicMock(return_value=api),
+    )
+
+
+@pytest.fixture
+def crawler(hass, config_entry, coordinator):
+    """Return a crawler opted in for the consumption load curve."""
+    config_entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={
+            **config_entry.options,
+            CONF_CONSUMPTION: {CONF_SERVICE: CONSUMPTION_DETAIL, CONF_CRAWL: True},
+        },
+    )
+    return HistoryCrawler(hass, config_entry, coordinator)
+
+
+@pytest.fixture
+def mock_statistics(coordinator):
+    """Patch the statistics reads and writes of the crawler."""
+    with (
+        patch(
+            "custom_components.myelectricaldata.crawler.async_get_first_start",
+            new=AsyncMock(return_value=FIRST),
+        ) as mock_first,
+        patch(
+            "custom_components.myelectricaldata.crawler.async_import_sensor_statistics",
+            new=AsyncMock(return_value=dt_util.utc_from_timestamp(0)),
+        ) as mock_import,
+    ):
+        yield SimpleNamespace(
+            first=mock_first,
+            import_=mock_import,
+            rebuild=coordinator.rebuilder.async_mark_dirty,
+        )
+
+
+async def test_walks_back_until_history_runs_out(crawler, coordinator, mock_statistics):
+    """Windows go backwards from the earliest hour, then one rebuild follows."""
+    coordinator.api.async_update_collects.side_effect = [
+        None,
+        None,
+        EnedisException("Data collection is empty"),
+        EnedisException("Data collection is empty"),
+    ]
+
+    await crawler._async_run()
+
+    windows = [
+        (call.kwargs["start"], call.kwargs["end"])
+        for call in coordinator.api.set_collects.call_args_list
+    ]
+    assert windows == [
+        (FIRST - timedelta(days=7 * week), FIRST - timedelta(days=7 * (week - 1)))
+        for week in range(1, 5)
+    ]
+    assert crawler.state[CONF_CONSUMPTION]["done"] is True
+    assert mock_statistics.import_.await_count == 2
+    mock_statistics.rebuild.assert_awaited_once()
+
+
+async def test_empty_window_is_stepped_over_as_a_gap(
+    crawler, coordinator, mock_statistics
+):
+    """Older data past a single empty window is still crawled."""
+    coordinator.api.async_update_collects.side_effect = [
+        None,
+        EnedisException("Data collection is empty"),
+        None,
+        EnedisException("Data collection is empty"),
+        EnedisException("Data collection is empty"),
+    ]
+
+    await crawler._async_run()
+
+    ends = [call.kwargs["end"] for call in coordinator.api.set_collects.call_args_list]
+    assert ends == [FIRST - timedelta(days=7 * week) for week in range(5)]
+    assert mock_statistics.import_.await_count == 2
+    state = crawler.state[CONF_CONSUMPTION]
+    assert state["done"] is True
+    assert state["cursor"] == (FIRST - timedelta(days=35)).isoformat()
+
+
+async def test_failed_requests_dont_end_the_crawl(
+    crawler, coordinator, mock_statistics
+):
+    """A window lost to a swallowed error is retried, never counted as empty."""
+    coordinator.create_session.return_value.failures = ["409 Conflict"]
+    coordinator.api.async_update_collects.side_effect = [
+        EnedisException("Data collection is empty"),
+        EnedisException("Data collection is empty"),
+    ]
+
+    await crawler._async_run()
+    await crawler._async_run()
+
+    state = crawler.state[CONF_CONSUMPTION]
+    assert state["empty"] == 0
+    assert not state.get("done")
+    assert state["cursor"] == FIRST.isoformat()
+    windows = [
+        call.kwargs["end"] for call in coordinator.api.set_collects.call_args_list
+    ]
+    assert windows == [FIRST, FIRST]
+
+
+async def test_only_spends_spare_quota(crawler, coordinator, mock_statistics):
+    """Nothing is collected without spare quota or while a backfill is queued."""
+    coordinator.backfill.jobs.append({})
+    await crawler._async_run()
+    coordinator.api.set_collects.assert_not_called()
+
+    coordinator.backfill.jobs.clear()
+    coordinator.quota.update_from_access({"quota_limit": 10, "call_number": 10})
+    await crawler._async_run()
+    coordinator.api.set_collects.assert_not_called()
+    mock_statistics.rebuild.assert_not_called()
+
+
+async def test_stops_at_contract_activation(crawler, coordinator, mock_statistics):
+    """Nothing older than the contract's activation date is requested."""
+    coordinator.contract = {"last_activation_date": "2024-01-10+01:00"}
+    coordinator.api.async_update_collects.side_effect = [None]
+
+    await crawler._async_run()
+
+    assert coordinator.api.set_collects.call_count == 1
+    assert crawler.state[CONF_CONSUMPTION]["done"] is True
+
+
+async def test_position_is_restored(
+    hass, config_entry, crawler, coordinator, mock_statistics
+):
+    """The cursor survives a restart, so the crawl resumes where it stopped."""
+    coordinator.api.async_update_collects.side_effect = [
+        None,
+        EnedisException("Data collection is empty"),
+        LimitReached(409, {"detail": "quota"}),
+    ]
+    await crawler._async_run()
+
+    restored = HistoryCrawler(hass, config_entry, coordinator)
+    await restored.async_load()
+    assert restored.state == crawler.state
+    assert restored.state[CONF_CONSUMPTION]["cursor"] == (
+        (FIRST - timedelta(days=14)).isoformat()
+    )
+    assert restored.state[CONF_CONSUMPTION]["empty"] == 1
+
+
+async def test_crawled_rows_reach_the_recorder(
+    recorder_mock, hass, crawler, coordinator
+):
+    """A window smaller than a flush page is still handed to the recorder."""
+    coordinator.import_queue = StatisticsImportQueue(hass)
+    coordinator.api.stats = {
+        CONF_CONSUMPTION: [
+            {
+                "notes": CONF_STD,
+                "date": dt(2024, 1, 8, hour, tzinfo=UTC),
+                "value": 1.0,
+                "sum_value": hour + 1.0,
+                "price": 0.2,
+                "sum_price": (hour + 1) * 0.2,
+            }
+            for hour in range(3)
+        ]
+    }
+    coordinator.api.async_update_collects.side_effect = [
+        None,
+        LimitReached(409, {"detail": "quota"}),
+    ]
+
+    with (
+        patch(
+            "custom_components.myelectricaldata.crawler.async_get_first_start",
+            new=AsyncMock(return_value=FIRST),
+        ),
+        patch(
+            "custom_components.myelectricaldata.helpers.async_import_statistics"
+        ) as mock_import_statistics,
+    ):
+        await crawler._async_run()
+
+    imported = {
+        call.args[1]["statistic_id"]: call.args[2]
+        for call in mock_import_statistics.call_args_list
+    }
+    assert imported
+    assert all(len(rows) == 3 for rows in imported.values())
+    assert crawler.state[CONF_CONSUMPTION]["cursor"] == (
+        (FIRST - timedelta(days=7)).isoformat()
+    )
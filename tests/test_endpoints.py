@@ -0,0 +1,142 @@
+"""Tests for custom_components.myelectricaldata.endpoints."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime as dt
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiohttp import ClientResponseError
+from myelectricaldatapy import Enedis, EnedisException
+
+from custom_components.myelectricaldata.endpoints import (
+    ACCESS,
+    CONTRACT,
+    EndpointCache,
+    EndpointSession,
+)
+
+CONTRACT_PAYLOAD = {"subscribed_power": "6 kVA", "offpeak_hours": "HC (22H00-6H00)"}
+CONTRACTS_PAYLOAD = {
+    "customer": {
+        "usage_points": [
+            {"usage_point": {"usage_point_id": "pdl"}, "contracts": CONTRACT_PAYLOAD}
+        ]
+    }
+}
+START = dt(2025, 3, 10)
+
+
+async def test_contract_is_served_from_the_cache_until_it_expires(hass, freezer):
+    """The contract endpoint is only called again once its lifetime is over."""
+    cache = EndpointCache(hass, "entry", timedelta(hours=24))
+    fetch = AsyncMock(return_value=CONTRACT_PAYLOAD)
+
+    assert await cache.async_fetch(CONTRACT, fetch) == CONTRACT_PAYLOAD
+    freezer.tick(timedelta(hours=23))
+    assert await cache.async_fetch(CONTRACT, fetch) == CONTRACT_PAYLOAD
+    assert fetch.await_count == 1
+    assert cache.pop_fetched() == [CONTRACT]
+    assert cache.pop_fetched() == []
+
+    freezer.tick(timedelta(hours=2))
+    await cache.async_fetch(CONTRACT, fetch)
+    assert fetch.await_count == 2
+
+
+async def test_access_is_only_kept_while_valid_and_for_the_day(hass, freezer):
+    """An access refusing calls is never cached, a valid one not past midnight."""
+    freezer.move_to("2025-03-10 23:00:00+01:00")
+    cache = EndpointCache(hass, "entry", timedelta(hours=24))
+
+    await cache.async_fetch(ACCESS, AsyncMock(return_value={"quota_reached": True}))
+    assert cache.get(ACCESS) is None
+
+    await cache.async_fetch(ACCESS, AsyncMock(return_value={"valid": True}))
+    assert cache.get(ACCESS) == {"valid": True}
+    freezer.tick(timedelta(hours=1))
+    assert cache.get(ACCESS) is None
+    assert cache.missing() == 3
+
+
+async def test_cache_persists_and_clears(hass):
+    """A new cache restores the payloads, until they're cleared."""
+    cache = EndpointCache(hass, "entry", timedelta(hours=24))
+    await cache.async_fetch(CONTRACT, AsyncMock(return_value=CONTRACT_PAYLOAD))
+
+    restored = EndpointCache(hass, "entry", timedelta(hours=24))
+    await restored.async_load()
+    assert restored.get(CONTRACT) == CONTRACT_PAYLOAD
+    assert restored.missing() == 2
+
+    await restored.async_clear()
+    assert restored.get(CONTRACT) is None
+
+
+async def test_zero_lifetime_disables_the_cache(hass):
+    """With no lifetime, every request goes to the API."""
+    cache = EndpointCache(hass, "entry", timedelta(0))
+    fetch = AsyncMock(return_value=CONTRACT_PAYLOAD)
+
+    await cache.async_fetch(CONTRACT, fetch)
+    await cache.async_fetch(CONTRACT, fetch)
+    assert fetch.await_count == 2
+
+
+def _fake_session(payload, status=200):
+    """Return a stand-in for aiohttp's session answering every request alike."""
+    response = MagicMock(status=status, reason="OK" if status < 400 else "Error")
+    response.headers = {"Content-Type": "application/json"}
+    response.read = AsyncMock(return_value=json.dumps(payload).encode())
+    response.json = AsyncMock(return_value=payload)
+    if status >= 400:
+        response.raise_for_status.side_effect = ClientResponseError(
+            MagicMock(), (), status=status
+        )
+    session = MagicMock()
+    session.request = AsyncMock(return_value=response)
+    return session
+
+
+async def test_session_answers_endpoints_from_the_cache(hass):
+    """A client's contract requests hit the API once for the cache's lifetime."""
+    cache = EndpointCache(hass, "entry", timedelta(hours=24))
+    session = _fake_session(CONTRACTS_PAYLOAD)
+    client = Enedis("token", EndpointSession(session, "pdl", cache))
+
+    assert await client.async_get_contract("pdl") == CONTRACT_PAYLOAD
+    assert await client.async_get_contract("pdl") == CONTRACT_PAYLOAD
+
+    session.request.assert_awaited_once()
+    assert cache.pop_fetched() == [CONTRACT]
+    # The library parses a cached contract as a fetched one
+    assert client.offpeaks == [("22H00", "6H00")]
+
+
+async def test_session_passes_data_requests_through(hass):
+    """Data requests always reach the API."""
+    cache = EndpointCache(hass, "entry", timedelta(hours=24))
+    session = _fake_session({"meter_reading": {}})
+    client = Enedis("token", EndpointSession(session, "pdl", cache))
+
+    await client.async_get_daily_consumption("pdl", START, START)
+    await client.async_get_daily_consumption("pdl", START, START)
+
+    assert session.request.await_count == 2
+    assert cache.entries == {}
+
+
+async def test_session_records_failed_requests(hass):
+    """Errors the collector swallows are kept on the session."""
+    cache = EndpointCache(hass, "entry", timedelta(hours=24))
+    session = EndpointSession(
+        _fake_session({"detail": "quota"}, status=409), "pdl", cache
+    )
+
+    with pytest.raises(EnedisException):
+        await Enedis("token", session).async_get_daily_consumption("pdl", START, START)
+
+    assert len(session.failures) == 1
+    assert "409" in session.failures[0]
@@ -0,0 +1,113 @@
+"""Tests for custom_components.myelectricaldata.feeds."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.util import dt as dt_util
+from myelectricaldatapy import EnedisException
+
+from custom_components.myelectricaldata.feeds import (
+    FEED_RETRY,
+    national_feeds,
+)
+from custom_components.myelectricaldata.quota import quota_budget
+
+TOKEN = "fake-token"
+
+
+@pytest.fixture
+def mock_enedis():
+    """Patch the API client the feeds fetch with."""
+    client = MagicMock()
+    client.async_get_tempo = AsyncMock()
+    client.async_get_ecowatt = AsyncMock()
+    with patch("custom_components.myelectricaldata.feeds.Enedis", return_value=client):
+        yield client
+
+
+def _colors(*days: int) -> dict[str, str]:
+    """Return blue days, offset from today."""
+    today = dt_util.now().date()
+    return {(today + timedelta(days=day)).isoformat(): "blue" for day in days}
+
+
+async def test_entries_share_a_single_request(hass, mock_enedis):
+    """Entries refreshing together join the request in flight."""
+    release = asyncio.Event()
+
+    async def _get_tempo(*_):
+        await release.wait()
+        return _colors(0, 1)
+
+    mock_enedis.async_get_tempo.side_effect = _get_tempo
+    feed = national_feeds(hass).tempo
+    listener = MagicMock()
+    feed.async_add_listener(listener)
+
+    refreshes = asyncio.gather(
+        feed.async_refresh(TOKEN, "entry_1"), feed.async_refresh(TOKEN, "entry_2")
+    )
+    await asyncio.sleep(0)
+    release.set()
+    await refreshes
+
+    mock_enedis.async_get_tempo.assert_awaited_once()
+    listener.assert_called_once()
+    assert feed.today == "blue"
+    assert quota_budget(hass, TOKEN).used == 1
+
+    # Fresh, so nothing is fetched again
+    await feed.async_refresh(TOKEN, "entry_1")
+    mock_enedis.async_get_tempo.assert_awaited_once()
+
+
+async def test_tempo_is_fresh_until_the_next_publication(
+    hass, mock_enedis, freezer: FrozenDateTimeFactory
+):
+    """Tomorrow's colour is asked for again once RTE may have published it."""
+    freezer.move_to(dt_util.start_of_local_day() + timedelta(hours=8))
+    feed = national_feeds(hass).tempo
+
+    mock_enedis.async_get_tempo.return_value = _colors(0)
+    await feed.async_refresh(TOKEN, "entry_1")
+    assert feed.expires == dt_util.start_of_local_day() + timedelta(hours=11)
+
+    freezer.move_to(dt_util.start_of_local_day() + timedelta(hours=12))
+    await feed.async_refresh(TOKEN, "entry_1")
+    assert feed.expires == dt_util.now() + FEED_RETRY
+
+    mock_enedis.async_get_tempo.return_value = _colors(0, 1)
+    freezer.tick(FEED_RETRY)
+    await feed.async_refresh(TOKEN, "entry_1")
+    assert feed.expires == dt_util.start_of_local_day() + timedelta(days=1, hours=11)
+    assert mock_enedis.async_get_tempo.await_count == 3
+
+
+async def test_failed_fetch_is_retried_later(hass, mock_enedis):
+    """A failure keeps the previous data and waits before asking again."""
+    feed = national_feeds(hass).ecowatt
+    mock_enedis.async_get_ecowatt.return_value = {
+        dt_util.now().date().isoformat(): {"value": 1, "message": "ok"}
+    }
+    await feed.async_refresh(TOKEN, "entry_1")
+    assert feed.today == {"value": 1, "message": "ok"}
+
+    feed.expires = None
+    mock_enedis.async_get_ecowatt.side_effect = EnedisException("boom")
+    await feed.async_refresh(TOKEN, "entry_1")
+    assert feed.today == {"value": 1, "message": "ok"}
+    assert dt_util.now() < feed.expires <= dt_util.now() + FEED_RETRY
+
+
+async def test_nothing_is_fetched_without_quota(hass, mock_enedis):
+    """The feed call has to fit in the token's quota like any other."""
+    quota_budget(hass, TOKEN).update_from_access({"quota_limit": 5, "call_number": 5})
+
+    await national_feeds(hass).ecowatt.async_refresh(TOKEN, "entry_1")
+
+    mock_enedis.async_get_ecowatt.assert_not_called()
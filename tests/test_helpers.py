@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
-from datetime import UTC, timedelta
+import asyncio
+from datetime import UTC, date, timedelta
 from datetime import datetime as dt
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
 from homeassistant.components.recorder import get_instance
 from homeassistant.components.recorder.models import StatisticData, StatisticMeanType
 from homeassistant.components.recorder.statistics import (
@@ -13,6 +16,7 @@ from homeassistant.components.recorder.statistics import (
 )
 from homeassistant.const import UnitOfEnergy
 from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 from pytest_homeassistant_custom_component.components.recorder.common import (
     async_wait_recording_done,
 )
@@ -30,17 +34,30 @@ from custom_components.myelectricaldata.const import (
     PRODUCTION_DAILY,
 )
 from custom_components.myelectricaldata.helpers import (
+    REBUILD_QUIET_PERIOD,
+    StatisticsCache,
+    StatisticsImportQueue,
+    StatisticsRebuilder,
+    _get_statistics_window,
+    _group_collected,
     _legacy_statistic_id,
+    async_gather_limited,
     async_get_db_infos,
+    async_get_first_start,
     async_get_last_infos,
+    async_get_many_db_infos,
     async_import_sensor_statistics,
     async_migrate_legacy_statistics,
+    async_reassert_statistics,
     async_rebuild_statistics,
+    async_reprice_statistics,
     build_price_items,
     build_sensor_items,
     next_date,
     read_prices,
 )
+from custom_components.myelectricaldata.tariffs import TariffHistory
+from custom_components.myelectricaldata.tempo import TempoCalendar
 
 PDL = "12345678901234"
 
@@ -262,6 +279,49 @@ async def test_async_get_db_infos_returns_last_sum(recorder_mock, hass):
     assert last_dt is not None
 
 
+async def test_async_get_many_db_infos_batches_known_and_missing(recorder_mock, hass):
+    """Every requested id is answered, missing ones with a zero sum and no date."""
+    known_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    missing_id = f"sensor.{DOMAIN}_{PDL}_production_full"
+    start1 = dt_util.utc_from_timestamp(10 * 86400)
+    start2 = dt_util.utc_from_timestamp(10 * 86400 + 3600)
+    await _import_metadata(
+        hass,
+        known_id,
+        [
+            StatisticData(start=start1, state=4, sum=4),
+            StatisticData(start=start2, state=6, sum=10),
+        ],
+    )
+
+    infos = await async_get_many_db_infos(hass, [known_id, missing_id])
+
+    assert infos[known_id][0] == 10
+    assert dt_util.as_utc(infos[known_id][1]) == start2
+    assert infos[missing_id] == (0, None)
+
+
+async def test_async_get_first_start_returns_earliest_across_ids(recorder_mock, hass):
+    """The earliest hour of any of the statistics is returned, in local time."""
+    items = build_sensor_items(
+        CONF_CONSUMPTION, PDL, CONSUMPTION_DAILY, [], has_price=True
+    )
+    start = dt_util.utc_from_timestamp(10 * 86400)
+    await _import_metadata(
+        hass, items[0]["entity_id"], [StatisticData(start=start, state=1, sum=1)]
+    )
+    await _import_metadata(
+        hass,
+        items[1]["entity_id"],
+        [StatisticData(start=start - timedelta(hours=1), state=1, sum=1)],
+    )
+    await async_wait_recording_done(hass)
+
+    first = await async_get_first_start(hass, [item["entity_id"] for item in items])
+    assert first == start - timedelta(hours=1)
+    assert await async_get_first_start(hass, ["sensor.unknown"]) is None
+
+
 async def test_async_get_last_infos_splits_energy_and_cost(recorder_mock, hass):
     """Energy items feed sum_values/last date, cost items feed sum_prices only."""
     items = build_sensor_items(
@@ -284,6 +344,192 @@ async def test_async_get_last_infos_splits_energy_and_cost(recorder_mock, hass):
     assert sum_prices[cost_item["note"]] == 2
 
 
+async def test_async_get_last_infos_before_takes_the_preceding_rows(
+    recorder_mock, hass
+):
+    """With before, baselines come from the last rows starting before it."""
+    items = build_sensor_items(
+        CONF_CONSUMPTION, PDL, CONSUMPTION_DAILY, [], has_price=False
+    )
+    energy_item = items[0]
+    first = dt_util.utc_from_timestamp(0)
+    second = first + timedelta(days=1)
+    await _import_metadata(
+        hass,
+        energy_item["entity_id"],
+        [
+            StatisticData(start=first, state=5, sum=5),
+            StatisticData(start=second, state=3, sum=8),
+        ],
+    )
+
+    dt_last, sum_values, _ = await async_get_last_infos(hass, items, before=second)
+    assert dt_last == dt_util.as_local(first)
+    assert sum_values[energy_item["note"]] == 5
+
+
+# ---------------------------------------------------------------------------
+# StatisticsCache
+# ---------------------------------------------------------------------------
+
+
+async def test_statistics_cache_seeds_once_then_serves_from_memory(hass):
+    """Only ids never seen before are looked up in the recorder."""
+    statistic_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    cache = StatisticsCache(hass)
+    with patch(
+        "custom_components.myelectricaldata.helpers.async_get_many_db_infos",
+        new=AsyncMock(return_value={statistic_id: (5.0, None)}),
+    ) as mock_db:
+        assert await cache.async_get([statistic_id]) == {statistic_id: (5.0, None)}
+        assert await cache.async_get([statistic_id]) == {statistic_id: (5.0, None)}
+    mock_db.assert_awaited_once()
+
+
+async def test_statistics_cache_update_only_advances_high_water_mark(hass):
+    """Rows older than the cached last date don't move it backwards."""
+    statistic_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    last = dt_util.utc_from_timestamp(10 * 86400)
+    cache = StatisticsCache(hass)
+    with patch(
+        "custom_components.myelectricaldata.helpers.async_get_many_db_infos",
+        new=AsyncMock(return_value={statistic_id: (5.0, last)}),
+    ):
+        await cache.async_get([statistic_id])
+
+        cache.update(
+            statistic_id,
+            [StatisticData(start=last - timedelta(hours=1), state=1, sum=1)],
+        )
+        assert (await cache.async_get([statistic_id]))[statistic_id][0] == 5.0
+
+        cache.update(
+            statistic_id,
+            [StatisticData(start=last + timedelta(hours=1), state=2, sum=7)],
+        )
+        summary, last_dt = (await cache.async_get([statistic_id]))[statistic_id]
+    assert summary == 7
+    assert dt_util.as_utc(last_dt) == last + timedelta(hours=1)
+
+
+async def test_statistics_cache_invalidate_forces_a_new_lookup(hass):
+    """An invalidated id is read again from the recorder."""
+    statistic_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    cache = StatisticsCache(hass)
+    with patch(
+        "custom_components.myelectricaldata.helpers.async_get_many_db_infos",
+        new=AsyncMock(return_value={statistic_id: (0, None)}),
+    ) as mock_db:
+        await cache.async_get([statistic_id])
+        cache.invalidate([statistic_id])
+        await cache.async_get([statistic_id])
+    assert mock_db.await_count == 2
+
+
+# ---------------------------------------------------------------------------
+# async_gather_limited
+# ---------------------------------------------------------------------------
+
+
+async def test_async_gather_limited_bounds_concurrency_and_keeps_order():
+    """Jobs overlap up to the limit and results come back in order."""
+    running = peak = 0
+
+    async def job(value: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return value
+
+    assert await async_gather_limited((job(i) for i in range(5)), limit=2) == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+    assert peak == 2
+
+
+# ---------------------------------------------------------------------------
+# StatisticsImportQueue
+# ---------------------------------------------------------------------------
+
+
+async def test_statistics_import_queue_merges_a_cycle_into_one_job(recorder_mock, hass):
+    """Rows of several statistics go to the recorder in a single executor job."""
+    energy_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    cost_id = f"{energy_id}_cost"
+    start1 = dt_util.utc_from_timestamp(10 * 86400)
+    start2 = dt_util.utc_from_timestamp(10 * 86400 + 3600)
+    queue = StatisticsImportQueue(hass)
+
+    with patch(
+        "custom_components.myelectricaldata.helpers._import_many", new=MagicMock()
+    ) as mock_import:
+        await queue.async_add(
+            energy_id, "energy", [StatisticData(start=start1, state=1, sum=1)]
+        )
+        await queue.async_add(
+            energy_id, "energy", [StatisticData(start=start2, state=2, sum=3)]
+        )
+        await queue.async_add(
+            cost_id, "cost", [StatisticData(start=start1, state=1, sum=1)]
+        )
+        mock_import.assert_not_called()
+        await queue.async_flush()
+
+    mock_import.assert_called_once()
+    pending = mock_import.call_args.args[1]
+    assert [(meta["statistic_id"], len(rows)) for meta, rows in pending] == [
+        (energy_id, 2),
+        (cost_id, 1),
+    ]
+    assert pending[1][0]["unit_of_measurement"] == "EUR"
+
+
+async def test_statistics_import_queue_concurrent_flush_waits_for_rows(
+    recorder_mock, hass
+):
+    """A flush returns only once rows a concurrent flush picked up are written."""
+    statistic_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    cache = StatisticsCache(hass)
+    await cache.async_get([statistic_id])
+    queue = StatisticsImportQueue(hass, cache)
+    start = dt_util.utc_from_timestamp(10 * 86400)
+
+    await queue.async_add(
+        statistic_id, "energy", [StatisticData(start=start, state=2, sum=2)]
+    )
+    first = hass.async_create_task(queue.async_flush())
+    await asyncio.sleep(0)  # the first flush takes the rows and hits the executor
+    await queue.async_flush()
+
+    assert first.done()
+    assert cache.peek(statistic_id)[0] == 2
+
+
+async def test_statistics_import_queue_flush_advances_cache(recorder_mock, hass):
+    """Flushed rows are written and the write-through cache follows them."""
+    statistic_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    cache = StatisticsCache(hass)
+    await cache.async_get([statistic_id])
+    queue = StatisticsImportQueue(hass, cache)
+    start = dt_util.utc_from_timestamp(10 * 86400)
+
+    await queue.async_add(
+        statistic_id, "energy", [StatisticData(start=start, state=4, sum=4)]
+    )
+    await queue.async_flush()
+    await async_wait_recording_done(hass)
+
+    assert (await cache.async_get([statistic_id]))[statistic_id][0] == 4
+    summary, _ = await async_get_db_infos(hass, statistic_id)
+    assert summary == 4
+
+
 # ---------------------------------------------------------------------------
 # async_import_sensor_statistics
 # ---------------------------------------------------------------------------
@@ -322,6 +568,97 @@ async def test_async_import_sensor_statistics_writes_energy_and_cost(
     assert cost_summary == 3.0
 
 
+async def test_async_import_sensor_statistics_prices_from_tariff_history(
+    recorder_mock, hass
+):
+    """Cost rows are priced with the tariff in effect at their own start."""
+    items = build_sensor_items(
+        CONF_CONSUMPTION, PDL, CONSUMPTION_DAILY, [], has_price=True
+    )
+    cost_item = next(item for item in items if item["kind"] == "cost")
+    starts = [dt_util.utc_from_timestamp(10 * 86400 + i * 86400) for i in range(2)]
+    tariffs = TariffHistory(hass, "entry")
+    await tariffs.async_setdefault(cost_item, 0.1)
+    await tariffs.async_set(cost_item, 0.2, starts[1])
+
+    data_collected = {
+        CONF_CONSUMPTION: [
+            {
+                "notes": CONF_STD,
+                "date": start,
+                "value": value,
+                "sum_value": total,
+                "price": value * 0.5,
+                "sum_price": total * 0.5,
+            }
+            for start, value, total in zip(
+                starts, (10.0, 5.0), (10.0, 15.0), strict=True
+            )
+        ]
+    }
+
+    await async_import_sensor_statistics(hass, items, data_collected, None, tariffs)
+    await async_wait_recording_done(hass)
+
+    stored = await get_instance(hass).async_add_executor_job(
+        _get_statistics_window,
+        hass,
+        {cost_item["entity_id"]},
+        starts[0].timestamp(),
+        starts[1].timestamp() + 1,
+    )
+    assert list(stored[cost_item["entity_id"]].values()) == pytest.approx(
+        [(1.0, 1.0), (1.0, 2.0)]
+    )
+
+
+def test_group_collected_buckets_rows_by_mode_and_note():
+    """Every collected row lands in exactly one (mode, note) bucket, in order."""
+    data_collected = {
+        CONF_CONSUMPTION: [
+            {"notes": CONF_STD, "value": 1},
+            {"notes": CONF_OFFPEAK, "value": 2},
+            {"notes": CONF_STD, "value": 3},
+        ],
+        "production": [{"notes": CONF_STD, "value": 4}],
+    }
+
+    buckets = _group_collected(data_collected)
+
+    assert [row["value"] for row in buckets[(CONF_CONSUMPTION, CONF_STD)]] == [1, 3]
+    assert [row["value"] for row in buckets[(CONF_CONSUMPTION, CONF_OFFPEAK)]] == [2]
+    assert [row["value"] for row in buckets[("production", CONF_STD)]] == [4]
+
+
+async def test_async_import_sensor_statistics_skips_unchanged_rows(recorder_mock, hass):
+    """Re-importing an already stored range only imports what changed."""
+    items = build_sensor_items(
+        CONF_CONSUMPTION, PDL, CONSUMPTION_DAILY, [], has_price=False
+    )
+    start1 = dt_util.utc_from_timestamp(10 * 86400)
+    start2 = dt_util.utc_from_timestamp(11 * 86400)
+    rows = [
+        {"notes": CONF_STD, "date": start1, "value": 1.0, "sum_value": 1.0},
+        {"notes": CONF_STD, "date": start2, "value": 2.0, "sum_value": 3.0},
+    ]
+    await async_import_sensor_statistics(hass, items, {CONF_CONSUMPTION: rows})
+    await async_wait_recording_done(hass)
+
+    assert (
+        await async_import_sensor_statistics(hass, items, {CONF_CONSUMPTION: rows})
+        is None
+    )
+
+    rows[1] = {**rows[1], "value": 5.0, "sum_value": 6.0}
+    dirty_from = await async_import_sensor_statistics(
+        hass, items, {CONF_CONSUMPTION: rows}
+    )
+    await async_wait_recording_done(hass)
+
+    assert dirty_from == start2
+    assert (await async_get_db_infos(hass, items[0]["entity_id"]))[0] == 6
+
+
 async def test_async_import_sensor_statistics_skips_items_without_rows(
     recorder_mock, hass
 ):
@@ -336,6 +673,84 @@ async def test_async_import_sensor_statistics_skips_items_without_rows(
     assert last_dt is None
 
 
+# ---------------------------------------------------------------------------
+# async_reassert_statistics
+# ---------------------------------------------------------------------------
+
+
+async def test_async_reassert_statistics_only_rewrites_diverged_sums(
+    recorder_mock, hass
+):
+    """Only a compiled sum that differs from our known-good one gets rewritten."""
+    diverged_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    agreeing_id = f"sensor.{DOMAIN}_{PDL}_production_full"
+    compiled_start = dt_util.utcnow().replace(
+        minute=0, second=0, microsecond=0
+    ) - timedelta(hours=1)
+    await _import_metadata(
+        hass, diverged_id, [StatisticData(start=compiled_start, state=0, sum=42)]
+    )
+    await _import_metadata(
+        hass, agreeing_id, [StatisticData(start=compiled_start, state=0, sum=8)]
+    )
+    known_sums = {
+        diverged_id: (None, 10.0, "energy"),
+        agreeing_id: (None, 8.0, "energy"),
+    }
+
+    corrections = await async_reassert_statistics(hass, known_sums)
+    await async_wait_recording_done(hass)
+
+    assert corrections == 1
+    assert (await async_get_db_infos(hass, diverged_id))[0] == 10
+    assert (await async_get_db_infos(hass, agreeing_id))[0] == 8
+
+
+async def test_async_reassert_statistics_waits_for_the_compile_to_commit(
+    recorder_mock, hass
+):
+    """A compiled row still queued in the recorder is read, not missed."""
+    statistic_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    compiled_start = dt_util.utcnow().replace(
+        minute=0, second=0, microsecond=0
+    ) - timedelta(hours=1)
+    metadata = {
+        "has_sum": True,
+        "name": None,
+        "source": "recorder",
+        "statistic_id": statistic_id,
+        "unit_of_measurement": UnitOfEnergy.KILO_WATT_HOUR,
+        "mean_type": StatisticMeanType.NONE,
+        "unit_class": None,
+    }
+    # Queued like the compile the event is fired from, not waited for
+    async_import_statistics(
+        hass, metadata, [StatisticData(start=compiled_start, state=0, sum=42)]
+    )
+
+    corrections = await async_reassert_statistics(
+        hass, {statistic_id: (None, 10.0, "energy")}
+    )
+    await async_wait_recording_done(hass)
+
+    assert corrections == 1
+    assert (await async_get_db_infos(hass, statistic_id))[0] == 10
+
+
+async def test_async_reassert_statistics_skips_hours_we_wrote(recorder_mock, hass):
+    """An entity with real data for the compiled hour isn't even queried."""
+    statistic_id = f"sensor.{DOMAIN}_{PDL}_consumption_full"
+    known_sums = {statistic_id: (dt_util.utcnow(), 10.0, "energy")}
+
+    with patch(
+        "custom_components.myelectricaldata.helpers._get_statistics_sums_at"
+    ) as mock_query:
+        corrections = await async_reassert_statistics(hass, known_sums)
+
+    assert corrections == 0
+    mock_query.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # async_migrate_legacy_statistics
 # ---------------------------------------------------------------------------
@@ -442,6 +857,85 @@ async def test_async_rebuild_statistics_recomputes_running_total(recorder_mock,
     assert summary == 10  # 4 + 6, recomputed as a clean running total
 
 
+async def test_async_rebuild_statistics_from_dirty_point_keeps_prefix(
+    recorder_mock, hass
+):
+    """An incremental rebuild restarts from the sum just before the dirty point."""
+    items = build_sensor_items(
+        CONF_CONSUMPTION, PDL, CONSUMPTION_DAILY, [], has_price=False
+    )
+    item = items[0]
+    start1 = dt_util.utc_from_timestamp(10 * 86400)
+    start2 = dt_util.utc_from_timestamp(10 * 86400 + 3600)
+    start3 = dt_util.utc_from_timestamp(10 * 86400 + 7200)
+
+    # The first row's sum is deliberately "wrong" but trusted as clean: only
+    # the suffix starting at start2 gets recomputed on top of it.
+    await _import_metadata(
+        hass,
+        item["entity_id"],
+        [
+            StatisticData(start=start1, state=4, sum=50),
+            StatisticData(start=start2, state=6, sum=6),
+            StatisticData(start=start3, state=1, sum=1),
+        ],
+    )
+
+    await async_rebuild_statistics(hass, items, dirty_from=start2)
+    await async_wait_recording_done(hass)
+
+    summary, _ = await async_get_db_infos(hass, item["entity_id"])
+    assert summary == 57  # 50 + 6 + 1
+
+
+async def test_async_import_sensor_statistics_returns_earliest_start(
+    recorder_mock, hass
+):
+    """The earliest imported start is returned as the rebuild's dirty point."""
+    items = build_sensor_items(
+        CONF_CONSUMPTION, PDL, CONSUMPTION_DAILY, [], has_price=False
+    )
+    start1 = dt_util.utc_from_timestamp(10 * 86400)
+    start2 = dt_util.utc_from_timestamp(11 * 86400)
+    data_collected = {
+        CONF_CONSUMPTION: [
+            {"notes": CONF_STD, "date": start2, "value": 2.0, "sum_value": 3.0},
+            {"notes": CONF_STD, "date": start1, "value": 1.0, "sum_value": 1.0},
+        ]
+    }
+
+    dirty_from = await async_import_sensor_statistics(hass, items, data_collected)
+    await async_wait_recording_done(hass)
+
+    assert dirty_from == start1
+
+
+async def test_async_rebuild_statistics_carries_sum_across_pages(recorder_mock, hass):
+    """The running total is carried over from one streamed page to the next."""
+    items = build_sensor_items(
+        CONF_CONSUMPTION, PDL, CONSUMPTION_DAILY, [], has_price=False
+    )
+    item = items[0]
+    base = 10 * 86400
+    await _import_metadata(
+        hass,
+        item["entity_id"],
+        [
+            StatisticData(
+                start=dt_util.utc_from_timestamp(base + hour * 3600), state=1, sum=0
+            )
+            for hour in range(5)
+        ],
+    )
+
+    with patch("custom_components.myelectricaldata.helpers.STATISTICS_PAGE_SIZE", 2):
+        await async_rebuild_statistics(hass, items)
+        await async_wait_recording_done(hass)
+
+    summary, _ = await async_get_db_infos(hass, item["entity_id"])
+    assert summary == 5
+
+
 async def test_async_rebuild_statistics_no_data_is_noop(recorder_mock, hass):
     """Rebuilding an entity with no history at all does not raise."""
     items = build_sensor_items(
@@ -449,3 +943,212 @@ async def test_async_rebuild_statistics_no_data_is_noop(recorder_mock, hass):
     )
     await async_rebuild_statistics(hass, items)
     await async_wait_recording_done(hass)
+
+
+# ---------------------------------------------------------------------------
+# async_reprice_statistics
+# ---------------------------------------------------------------------------
+
+
+async def test_async_reprice_statistics_rewrites_cost_from_energy(recorder_mock, hass):
+    """Cost rows in range are priced again from the stored energy."""
+    energy, cost = build_sensor_items(
+        CONF_CONSUMPTION, PDL, CONSUMPTION_DAILY, [], has_price=True
+    )
+    starts = [dt_util.utc_from_timestamp(10 * 86400 + i * 3600) for i in range(3)]
+    await _import_metadata(
+        hass,
+        energy["entity_id"],
+        [
+            StatisticData(start=starts[0], state=2, sum=2),
+            StatisticData(start=starts[1], state=3, sum=5),
+            StatisticData(start=starts[2], state=1, sum=6),
+        ],
+    )
+    await _import_metadata(
+        hass,
+        cost["entity_id"],
+        [
+            StatisticData(start=starts[0], state=0.2, sum=0.2),
+            StatisticData(start=starts[1], state=0.3, sum=0.5),
+            StatisticData(start=starts[2], state=0.1, sum=0.6),
+        ],
+    )
+
+    dirty_from = await async_reprice_statistics(
+        hass,
+        [energy, cost],
+        {CONF_STD: {CONF_PRICE: 0.5}},
+        start=starts[0],
+        end=starts[2],
+    )
+    await async_wait_recording_done(hass)
+
+    # Only the rows in range are repriced, the later sum is left to a rebuild
+    assert dirty_from == starts[1] + timedelta(seconds=1)
+    stored = await get_instance(hass).async_add_executor_job(
+        _get_statistics_window,
+        hass,
+        {cost["entity_id"]},
+        starts[0].timestamp(),
+        starts[2].timestamp(),
+    )
+    assert list(stored[cost["entity_id"]].values()) == [
+        (1.0, 1.0),
+        (1.5, 2.5),
+        (0.1, 0.6),
+    ]
+
+    # Nothing changes the second time around
+    assert (
+        await async_reprice_statistics(
+            hass, [energy, cost], {CONF_STD: {CONF_PRICE: 0.5}}, end=starts[2]
+        )
+        is None
+    )
+
+
+async def test_async_reprice_statistics_prices_tempo_rows_by_colour(
+    recorder_mock, hass
+):
+    """Tempo rows get their day's colour price, unknown days keep their cost."""
+    energy, cost = build_sensor_items(
+        CONF_CONSUMPTION, PDL, CONSUMPTION_DAILY, [], has_price=True
+    )
+    days = [date(2025, 1, 6) + timedelta(days=i) for i in range(3)]
+    starts = [dt_util.as_utc(dt_util.start_of_local_day(day)) for day in days]
+    await _import_metadata(
+        hass,
+        energy["entity_id"],
+        [
+            StatisticData(start=starts[0], state=2, sum=2),
+            StatisticData(start=starts[1], state=3, sum=5),
+            StatisticData(start=starts[2], state=1, sum=6),
+        ],
+    )
+    await _import_metadata(
+        hass,
+        cost["entity_id"],
+        [
+            StatisticData(start=starts[0], state=0.3, sum=0.3),
+            StatisticData(start=starts[1], state=0.3, sum=0.6),
+            StatisticData(start=starts[2], state=0.4, sum=1.0),
+        ],
+    )
+    tempo = TempoCalendar(hass)
+    await tempo.async_update({days[0].isoformat(): "blue", days[1].isoformat(): "red"})
+
+    await async_reprice_statistics(
+        hass,
+        [energy, cost],
+        {CONF_STD: {"blue": 0.1, "white": 0.2, "red": 0.5}},
+        tempo=tempo,
+    )
+    await async_wait_recording_done(hass)
+
+    stored = await get_instance(hass).async_add_executor_job(
+        _get_statistics_window,
+        hass,
+        {cost["entity_id"]},
+        starts[0].timestamp(),
+        starts[2].timestamp() + 1,
+    )
+    assert list(stored[cost["entity_id"]].values()) == pytest.approx(
+        [(0.2, 0.2), (1.5, 1.7), (0.4, 2.1)]
+    )
+
+
+# ---------------------------------------------------------------------------
+# StatisticsRebuilder
+# ---------------------------------------------------------------------------
+
+
+async def test_statistics_rebuilder_merges_concurrent_requests(hass):
+    """Overlapping requests rebuild each statistic once, from its earliest point."""
+    energy = {"entity_id": "sensor.energy", "kind": "energy"}
+    cost = {"entity_id": "sensor.energy_cost", "kind": "cost"}
+    early = dt_util.utc_from_timestamp(10 * 86400)
+    late = early + timedelta(days=1)
+    lock = asyncio.Lock()
+    on_rebuilt = MagicMock()
+    rebuilder = StatisticsRebuilder(hass, "entry", lock, on_rebuilt)
+
+    with patch(
+        "custom_components.myelectricaldata.helpers.async_rebuild_statistics",
+        new=AsyncMock(),
+    ) as mock_rebuild:
+        # Held lock: the first pass can't start before every request is in
+        async with lock:
+            requests = [
+                hass.async_create_task(rebuilder.async_rebuild([energy], late)),
+                hass.async_create_task(rebuilder.async_rebuild([energy], early)),
+                hass.async_create_task(rebuilder.async_rebuild([energy, cost])),
+                hass.async_create_task(rebuilder.async_rebuild([energy], late)),
+            ]
+            await asyncio.sleep(0)
+        await asyncio.gather(*requests)
+
+    mock_rebuild.assert_awaited_once_with(hass, [energy, cost], None)
+    on_rebuilt.assert_called_once_with(["sensor.energy", "sensor.energy_cost"])
+
+
+async def test_statistics_rebuilder_queues_requests_made_during_a_run(hass):
+    """A request coming in mid-rebuild gets a second pass of its own."""
+    item = {"entity_id": "sensor.energy", "kind": "energy"}
+    dirty_from = dt_util.utc_from_timestamp(10 * 86400)
+    rebuilder = StatisticsRebuilder(hass, "entry", asyncio.Lock())
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_rebuild(*_):
+        started.set()
+        await release.wait()
+
+    with patch(
+        "custom_components.myelectricaldata.helpers.async_rebuild_statistics",
+        new=AsyncMock(side_effect=slow_rebuild),
+    ) as mock_rebuild:
+        first = hass.async_create_task(rebuilder.async_rebuild([item]))
+        await started.wait()
+        second = hass.async_create_task(rebuilder.async_rebuild([item], dirty_from))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, second)
+
+    assert [call.args[2] for call in mock_rebuild.await_args_list] == [
+        None,
+        dirty_from,
+    ]
+
+
+async def test_statistics_rebuilder_waits_for_a_quiet_period(hass):
+    """Dirty ranges are rebuilt together once none came in for a while."""
+    item = {"entity_id": "sensor.energy", "kind": "energy"}
+    early = dt_util.utc_from_timestamp(10 * 86400)
+    rebuilder = StatisticsRebuilder(hass, "entry", asyncio.Lock())
+
+    with patch(
+        "custom_components.myelectricaldata.helpers.async_rebuild_statistics",
+        new=AsyncMock(),
+    ) as mock_rebuild:
+        await rebuilder.async_mark_dirty([item], early + timedelta(days=7))
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + REBUILD_QUIET_PERIOD - timedelta(seconds=1)
+        )
+        await hass.async_block_till_done()
+        await rebuilder.async_mark_dirty([item], early)
+        mock_rebuild.assert_not_called()
+
+        # A restart in between keeps what's dirty
+        restored = StatisticsRebuilder(hass, "entry", asyncio.Lock())
+        await restored.async_load()
+        assert restored.pending == ["sensor.energy"]
+        restored.async_stop()
+
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + 2 * REBUILD_QUIET_PERIOD + timedelta(seconds=1)
+        )
+        await hass.async_block_till_done()
+
+    mock_rebuild.assert_awaited_once_with(hass, [item], early)
+    assert rebuilder.pending == []
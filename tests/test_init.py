@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from unittest.mock import AsyncMock, patch
 
-from custom_components.myelectricaldata import async_unload_entry
+from custom_components.myelectricaldata import async_remove_entry, async_unload_entry
 from custom_components.myelectricaldata.const import PLATFORMS
 
 
@@ -21,13 +21,6 @@ async def test_async_setup_entry_forwards_platforms_and_registers_services(
         patch(
             "custom_components.myelectricaldata.async_services", new=AsyncMock()
         ) as mock_services,
-        # OffpeakSensor schedules its own periodic local-refresh timer (see
-        # binary_sensor.py) instead of using async_on_remove, so it wouldn't
-        # get cleaned up here; not what this test is about, so keep it inert.
-        patch(
-            "custom_components.myelectricaldata.binary_sensor.async_track_time_interval",
-            return_value=lambda: None,
-        ),
     ):
         coordinator = mock_coordinator_cls.return_value
         coordinator.async_config_entry_first_refresh = AsyncMock()
@@ -64,3 +57,41 @@ async def test_async_unload_entry_unloads_platforms(hass, config_entry):
 
     assert result is True
     mock_unload.assert_awaited_once_with(config_entry, PLATFORMS)
+
+
+async def test_async_remove_entry_drops_persisted_state(hass, config_entry):
+    """Removing an entry deletes its persisted migration state."""
+    config_entry.add_to_hass(hass)
+
+    with (
+        patch("custom_components.myelectricaldata.migration_store") as mock_store,
+        patch(
+            "custom_components.myelectricaldata.scheduler_store"
+        ) as mock_scheduler_store,
+        patch(
+            "custom_components.myelectricaldata.backfill_store"
+        ) as mock_backfill_store,
+        patch("custom_components.myelectricaldata.crawler_store") as mock_crawler_store,
+        patch("custom_components.myelectricaldata.rebuild_store") as mock_rebuild_store,
+        patch("custom_components.myelectricaldata.tariff_store") as mock_tariff_store,
+        patch(
+            "custom_components.myelectricaldata.endpoint_store"
+        ) as mock_endpoint_store,
+    ):
+        mock_store.return_value.async_remove = AsyncMock()
+        mock_scheduler_store.return_value.async_remove = AsyncMock()
+        mock_backfill_store.return_value.async_remove = AsyncMock()
+        mock_crawler_store.return_value.async_remove = AsyncMock()
+        mock_rebuild_store.return_value.async_remove = AsyncMock()
+        mock_tariff_store.return_value.async_remove = AsyncMock()
+        mock_endpoint_store.return_value.async_remove = AsyncMock()
+        await async_remove_entry(hass, config_entry)
+
+    mock_store.assert_called_once_with(hass, config_entry.entry_id)
+    mock_store.return_value.async_remove.assert_awaited_once()
+    mock_scheduler_store.return_value.async_remove.assert_awaited_once()
+    mock_backfill_store.return_value.async_remove.assert_awaited_once()
+    mock_crawler_store.return_value.async_remove.assert_awaited_once()
+    mock_rebuild_store.return_value.async_remove.assert_awaited_once()
+    mock_tariff_store.return_value.async_remove.assert_awaited_once()
+    mock_endpoint_store.return_value.async_remove.assert_awaited_once()
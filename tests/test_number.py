@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from types import SimpleNamespace
+from unittest.mock import AsyncMock
 
 from custom_components.myelectricaldata.number import TariffNumber, async_setup_entry
 
@@ -16,7 +17,11 @@ PRICE_ITEM = {
 
 def _fake_coordinator(**overrides):
     """Build a minimal stand-in for EnedisDataUpdateCoordinator."""
-    defaults = dict(pdl="12345", price_items=[PRICE_ITEM])
+    defaults = dict(
+        pdl="12345",
+        price_items=[PRICE_ITEM],
+        tariffs=SimpleNamespace(async_set=AsyncMock(), async_setdefault=AsyncMock()),
+    )
     defaults.update(overrides)
     return SimpleNamespace(**defaults)
 
@@ -46,6 +51,8 @@ async def test_async_set_native_value_updates_state(hass):
     state = hass.states.get(PRICE_ITEM["entity_id"])
     assert state is not None
     assert float(state.state) == 0.25
+    coordinator.tariffs.async_set.assert_awaited_once()
+    assert coordinator.tariffs.async_set.await_args.args[:2] == (PRICE_ITEM, 0.25)
 
 
 async def test_async_added_to_hass_restores_previous_value(hass):
@@ -62,6 +69,7 @@ async def test_async_added_to_hass_restores_previous_value(hass):
     await number.async_added_to_hass()
 
     assert number._attr_native_value == 0.42
+    coordinator.tariffs.async_setdefault.assert_awaited_once_with(PRICE_ITEM, 0.42)
 
 
 async def test_async_setup_entry_adds_one_number_per_price_item():
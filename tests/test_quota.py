@@ -0,0 +1,82 @@
+"""Tests for custom_components.myelectricaldata.quota."""
+
+from __future__ import annotations
+
+from datetime import datetime as dt
+
+from custom_components.myelectricaldata.const import (
+    CONSUMPTION_DAILY,
+    CONSUMPTION_DETAIL,
+)
+from custom_components.myelectricaldata.quota import (
+    QuotaBudget,
+    estimate_calls,
+    quota_budget,
+)
+
+
+def test_estimate_calls_counts_load_curve_windows():
+    """Daily data is one call, load curves one call per 7-day window."""
+    start = dt(2026, 1, 1)
+    assert estimate_calls(CONSUMPTION_DAILY, start, dt(2026, 6, 1)) == 1
+    assert estimate_calls(CONSUMPTION_DETAIL, start, dt(2026, 1, 8)) == 1
+    assert estimate_calls(CONSUMPTION_DETAIL, start, dt(2026, 1, 9)) == 2
+
+
+def test_unknown_quota_does_not_block():
+    """Until the access payload came in, nothing is refused."""
+    budget = QuotaBudget()
+    assert budget.remaining is None
+    assert budget.can_spend(100)
+
+
+def test_reservations_are_kept_for_their_owner():
+    """Others can only spend what's left beyond every reservation."""
+    budget = QuotaBudget()
+    budget.update_from_access({"quota_limit": 10, "call_number": 4})
+    budget.reserve("entry", 4)
+
+    assert budget.can_spend(2)
+    assert not budget.can_spend(3)
+    assert budget.can_spend(6, "entry")
+    assert budget.projected == 8
+
+    budget.release("entry")
+    assert budget.can_spend(6)
+
+
+def test_access_count_never_lowers_local_count():
+    """Calls counted locally since the last access refresh are kept."""
+    budget = QuotaBudget()
+    budget.update_from_access({"quota_limit": 10, "call_number": 2})
+    budget.spend(5)
+    budget.update_from_access({"quota_limit": 10, "call_number": 3})
+
+    assert budget.used == 7
+    assert budget.remaining == 3
+
+
+def test_quota_reached_or_ban_blocks_everything():
+    """A reached quota or a ban leaves nothing to spend."""
+    budget = QuotaBudget()
+    budget.update_from_access({"quota_limit": 10, "call_number": 0, "ban": True})
+
+    assert budget.remaining == 0
+    assert not budget.can_spend(1)
+
+
+def test_day_change_resets_the_count():
+    """The local count starts over with the new day."""
+    budget = QuotaBudget()
+    budget.update_from_access({"quota_limit": 10, "call_number": 9})
+    budget.day = dt(2000, 1, 1).date()
+
+    assert budget.used == 9
+    assert budget.remaining == 10
+    assert budget.used == 0
+
+
+async def test_quota_budget_is_shared_per_token(hass):
+    """Entries sharing a token share one budget."""
+    assert quota_budget(hass, "a") is quota_budget(hass, "a")
+    assert quota_budget(hass, "a") is not quota_budget(hass, "b")
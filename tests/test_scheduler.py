@@ -0,0 +1,82 @@
+"""Tests for custom_components.myelectricaldata.scheduler."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+from homeassistant.util import dt as dt_util
+
+from custom_components.myelectricaldata.scheduler import (
+    DEFAULT_WINDOW,
+    DENSE_INTERVAL,
+    IDLE_INTERVAL,
+    LATE_INTERVAL,
+    RefreshScheduler,
+)
+
+DAY = date(2024, 3, 12)
+
+
+def _at(hours: float, day: date = DAY):
+    """Return a local datetime on day at the given hour."""
+    return dt_util.start_of_local_day(day) + timedelta(hours=hours)
+
+
+@pytest.fixture
+def scheduler(hass):
+    """Return a scheduler with nothing learned yet."""
+    return RefreshScheduler(hass, "entry")
+
+
+async def test_default_window_polls_densely_then_late(scheduler):
+    """Without history, poll densely over the default window, hourly after."""
+    assert scheduler.window == DEFAULT_WINDOW
+    assert scheduler.next_interval(_at(1)) == timedelta(hours=4)
+    assert scheduler.next_interval(_at(6)) == DENSE_INTERVAL
+    assert scheduler.next_interval(_at(13)) == LATE_INTERVAL
+    assert not scheduler.expects_data(_at(1))
+    assert scheduler.expects_data(_at(6))
+
+
+async def test_backs_off_once_the_day_is_in(scheduler):
+    """Once yesterday is collected, wait for the next window, capped at idle."""
+    await scheduler.async_record(_at(6), _at(0, DAY - timedelta(days=2)), 0)
+    await scheduler.async_record(_at(7), _at(0, DAY - timedelta(days=1)), 24)
+
+    assert scheduler.fresh_day == DAY
+    assert not scheduler.expects_data(_at(7.5))
+    assert scheduler.next_interval(_at(7.5)) == IDLE_INTERVAL
+    assert scheduler.next_interval(_at(23)) == timedelta(hours=6)
+
+
+async def test_learns_publication_time(scheduler):
+    """The window narrows around the observed publication time."""
+    for offset in range(3):
+        day = DAY + timedelta(days=offset)
+        await scheduler.async_record(_at(6, day), _at(0, day - timedelta(days=2)), 0)
+        await scheduler.async_record(_at(8, day), _at(0, day - timedelta(days=1)), 24)
+
+    start, end = scheduler.window
+    assert start == timedelta(hours=7, minutes=15)
+    assert end == timedelta(hours=8, minutes=45)
+
+
+async def test_catch_up_after_setup_teaches_nothing(scheduler):
+    """Rows collected without having waited for them aren't a sample."""
+    await scheduler.async_record(_at(15), _at(0, DAY - timedelta(days=1)), 500)
+
+    assert scheduler.samples == []
+    assert scheduler.fresh_day == DAY
+
+
+async def test_learned_state_survives_a_restart(hass, scheduler):
+    """Samples and the completed day are restored from the store."""
+    await scheduler.async_record(_at(6), None, 0)
+    await scheduler.async_record(_at(7), _at(0, DAY - timedelta(days=1)), 24)
+
+    restored = RefreshScheduler(hass, "entry")
+    await restored.async_load()
+
+    assert restored.samples == scheduler.samples
+    assert restored.fresh_day == DAY
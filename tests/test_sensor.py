@@ -5,10 +5,13 @@ from __future__ import annotations
 from types import SimpleNamespace
 from unittest.mock import patch
 
+from custom_components.myelectricaldata.quota import QuotaBudget
 from custom_components.myelectricaldata.sensor import (
     DAY_VALUES,
+    BackfillSensor,
     EcoWattSensor,
     PowerSensor,
+    QuotaSensor,
     TempoSensor,
     async_setup_entry,
 )
@@ -27,6 +30,8 @@ def _fake_coordinator(**overrides):
         data={},
         tempo_day=None,
         ecowatt_day=None,
+        quota=QuotaBudget(),
+        backfill=SimpleNamespace(jobs=[], progress=100.0),
     )
     defaults.update(overrides)
     return SimpleNamespace(**defaults)
@@ -130,15 +135,18 @@ def test_ecowatt_sensor_defaults_to_na_when_value_missing():
 
 
 async def test_async_setup_entry_adds_power_sensors_only():
-    """Without tempo/ecowatt data, only PowerSensor entities are added."""
+    """Without tempo/ecowatt data, only power and diagnostic sensors are added."""
     coordinator = _fake_coordinator(data={ENERGY_ITEM["entity_id"]: ENERGY_ITEM})
     entry = SimpleNamespace(runtime_data=coordinator)
     added: list = []
 
     await async_setup_entry(None, entry, lambda entities: added.extend(entities))
 
-    assert len(added) == 1
-    assert isinstance(added[0], PowerSensor)
+    assert [type(entity) for entity in added] == [
+        PowerSensor,
+        QuotaSensor,
+        BackfillSensor,
+    ]
 
 
 async def test_async_setup_entry_adds_tempo_and_ecowatt_sensors():
@@ -154,4 +162,45 @@ async def test_async_setup_entry_adds_tempo_and_ecowatt_sensors():
     await async_setup_entry(None, entry, lambda entities: added.extend(entities))
 
     kinds = {type(entity) for entity in added}
-    assert kinds == {PowerSensor, TempoSensor, EcoWattSensor}
+    assert kinds == {
+        PowerSensor,
+        QuotaSensor,
+        BackfillSensor,
+        TempoSensor,
+        EcoWattSensor,
+    }
+
+
+def test_quota_sensor_projects_used_and_reserved_calls():
+    """QuotaSensor shows today's used plus reserved calls on the token."""
+    coordinator = _fake_coordinator()
+    coordinator.quota.update_from_access({"quota_limit": 50, "call_number": 10})
+    coordinator.quota.reserve("entry", 5)
+    sensor = QuotaSensor(coordinator)
+
+    assert sensor._attr_unique_id == "12345_projected_calls"
+    assert sensor._attr_native_value == 15
+    assert sensor._attr_extra_state_attributes["remaining"] == 40
+
+    coordinator.quota.spend(3)
+    with patch.object(sensor, "async_write_ha_state"):
+        sensor._handle_coordinator_update()
+    assert sensor._attr_native_value == 18
+
+
+def test_backfill_sensor_reports_progress_of_the_queue():
+    """BackfillSensor shows the queue's progress and what it works on."""
+    job = {
+        "service": "consumption_load_curve",
+        "cursor": "2026-01-08T00:00:00",
+        "windows_done": 1,
+        "windows_total": 4,
+    }
+    coordinator = _fake_coordinator(backfill=SimpleNamespace(jobs=[job], progress=25.0))
+    sensor = BackfillSensor(coordinator)
+
+    assert sensor._attr_native_value == 25.0
+    assert sensor._attr_extra_state_attributes["windows left"] == 3
+    assert sensor._attr_extra_state_attributes["current"] == (
+        "consumption_load_curve from 2026-01-08T00:00:00"
+    )
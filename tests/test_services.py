@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+from datetime import UTC
 from datetime import datetime as dt
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from homeassistant.config_entries import ConfigEntryState
 from homeassistant.exceptions import ServiceValidationError
 
 from custom_components.myelectricaldata.const import (
@@ -16,27 +18,43 @@ from custom_components.myelectricaldata.const import (
     CONF_SERVICE,
     CONF_START_DATE,
     CONF_STATISTIC_ID,
+    CONF_TARIFF,
     CONSUMPTION_DAILY,
+    CONSUMPTION_DETAIL,
     DOMAIN,
     FETCH_SERVICE,
+    FLUSH_SERVICE,
+    MIGRATE_SERVICE,
+    REBUILD_SERVICE,
+    REPRICE_SERVICE,
+    TARIFF_SERVICE,
 )
 from custom_components.myelectricaldata.services import async_services
 
 
-def _make_api_mock() -> MagicMock:
-    api = MagicMock()
-    api.set_collects = MagicMock()
-    api.async_update_collects = AsyncMock()
-    api.has_collected = True
-    api.stats = {}
-    return api
-
-
 async def test_async_services_registers_both_services(hass):
     """Both fetch_data and clear_data services get registered."""
     await async_services(hass)
     assert hass.services.has_service(DOMAIN, FETCH_SERVICE)
     assert hass.services.has_service(DOMAIN, CLEAR_SERVICE)
+    assert hass.services.has_service(DOMAIN, REBUILD_SERVICE)
+    assert hass.services.has_service(DOMAIN, MIGRATE_SERVICE)
+    assert hass.services.has_service(DOMAIN, FLUSH_SERVICE)
+    assert hass.services.has_service(DOMAIN, REPRICE_SERVICE)
+    assert hass.services.has_service(DOMAIN, TARIFF_SERVICE)
+
+
+async def test_migrate_service_raises_when_entry_not_loaded(hass, config_entry):
+    """migrate_data needs a loaded entry to reset its migration state."""
+    config_entry.add_to_hass(hass)
+    await async_services(hass)
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            MIGRATE_SERVICE,
+            {CONF_ENTRY: config_entry.entry_id},
+            blocking=True,
+        )
 
 
 async def test_reload_history_raises_when_entry_missing(hass):
@@ -56,28 +74,11 @@ async def test_reload_history_raises_when_entry_missing(hass):
         )
 
 
-async def test_reload_history_uses_explicit_price_and_imports_statistics(
-    recorder_mock, hass, config_entry
-):
-    """An explicit price override is used and results get imported + rebuilt."""
+async def test_reload_history_raises_when_entry_not_loaded(hass, config_entry):
+    """fetch_data queues onto the entry's backfill, so it must be loaded."""
     config_entry.add_to_hass(hass)
     await async_services(hass)
-
-    api = _make_api_mock()
-    with (
-        patch(
-            "custom_components.myelectricaldata.services.EnedisByPDL",
-            return_value=api,
-        ),
-        patch(
-            "custom_components.myelectricaldata.services.async_import_sensor_statistics",
-            new=AsyncMock(),
-        ) as mock_import,
-        patch(
-            "custom_components.myelectricaldata.services.async_rebuild_statistics",
-            new=AsyncMock(),
-        ) as mock_rebuild,
-    ):
+    with pytest.raises(ServiceValidationError):
         await hass.services.async_call(
             DOMAIN,
             FETCH_SERVICE,
@@ -86,52 +87,57 @@ async def test_reload_history_uses_explicit_price_and_imports_statistics(
                 CONF_SERVICE: CONSUMPTION_DAILY,
                 CONF_START_DATE: dt(2026, 1, 1),
                 CONF_END_DATE: dt(2026, 1, 2),
-                CONF_PRICE: 0.2,
             },
             blocking=True,
         )
 
-    api.async_update_collects.assert_awaited_once()
-    mock_import.assert_awaited_once()
-    mock_rebuild.assert_awaited_once()
-    set_collects_kwargs = api.set_collects.call_args.kwargs
-    assert set_collects_kwargs["prices"]["standard"][CONF_PRICE] == 0.2
 
+async def test_reload_history_enqueues_a_backfill_job(hass, config_entry):
+    """The whole range and price overrides go to the entry's backfill queue."""
+    config_entry.add_to_hass(hass)
+    config_entry.mock_state(hass, ConfigEntryState.LOADED)
+    config_entry.runtime_data = MagicMock()
+    config_entry.runtime_data.backfill.async_enqueue = AsyncMock()
+    await async_services(hass)
+
+    await hass.services.async_call(
+        DOMAIN,
+        FETCH_SERVICE,
+        {
+            CONF_ENTRY: config_entry.entry_id,
+            CONF_SERVICE: CONSUMPTION_DETAIL,
+            CONF_START_DATE: dt(2024, 1, 1),
+            CONF_END_DATE: dt(2026, 1, 1),
+            CONF_PRICE: 0.2,
+        },
+        blocking=True,
+    )
 
-async def test_reload_history_skips_import_when_nothing_collected(
-    recorder_mock, hass, config_entry
-):
-    """When the API reports nothing collected, statistics aren't imported."""
+    config_entry.runtime_data.backfill.async_enqueue.assert_awaited_once_with(
+        CONSUMPTION_DETAIL, dt(2024, 1, 1), dt(2026, 1, 1), 0.2, None
+    )
+
+
+async def test_reload_history_rejects_an_empty_range(hass, config_entry):
+    """A start date that isn't before the end date is rejected."""
     config_entry.add_to_hass(hass)
+    config_entry.mock_state(hass, ConfigEntryState.LOADED)
+    config_entry.runtime_data = MagicMock()
     await async_services(hass)
 
-    api = _make_api_mock()
-    api.has_collected = False
-    with (
-        patch(
-            "custom_components.myelectricaldata.services.EnedisByPDL",
-            return_value=api,
-        ),
-        patch(
-            "custom_components.myelectricaldata.services.async_import_sensor_statistics",
-            new=AsyncMock(),
-        ) as mock_import,
-    ):
+    with pytest.raises(ServiceValidationError):
         await hass.services.async_call(
             DOMAIN,
             FETCH_SERVICE,
             {
                 CONF_ENTRY: config_entry.entry_id,
                 CONF_SERVICE: CONSUMPTION_DAILY,
-                CONF_START_DATE: dt(2026, 1, 1),
-                CONF_END_DATE: dt(2026, 1, 2),
-                CONF_PRICE: 0.2,
+                CONF_START_DATE: dt(2026, 1, 2),
+                CONF_END_DATE: dt(2026, 1, 1),
             },
             blocking=True,
         )
 
-    mock_import.assert_not_called()
-
 
 async def test_clear_service_rejects_foreign_statistic_id(hass):
     """A statistic_id that doesn't belong to this integration is rejected."""
@@ -164,3 +170,106 @@ async def test_clear_service_clears_matching_statistic_id(hass):
         mock_get_instance.return_value.async_clear_statistics.assert_called_once_with(
             [statistic_id]
         )
+
+
+async def test_rebuild_service_goes_through_the_entry_rebuilder(hass, config_entry):
+    """A statistic owned by a loaded entry is rebuilt by its coalescing rebuilder."""
+    config_entry.add_to_hass(hass)
+    config_entry.mock_state(hass, ConfigEntryState.LOADED)
+    config_entry.runtime_data = MagicMock(pdl="12345678901234")
+    config_entry.runtime_data.rebuilder.async_rebuild = AsyncMock()
+    await async_services(hass)
+    statistic_id = f"sensor.{DOMAIN}_12345678901234_consumption_full_cost"
+
+    with patch(
+        "custom_components.myelectricaldata.services.async_rebuild_statistics"
+    ) as mock_rebuild:
+        await hass.services.async_call(
+            DOMAIN,
+            REBUILD_SERVICE,
+            {CONF_STATISTIC_ID: statistic_id},
+            blocking=True,
+        )
+
+    config_entry.runtime_data.rebuilder.async_rebuild.assert_awaited_once_with(
+        [{"entity_id": statistic_id, "kind": "cost"}]
+    )
+    mock_rebuild.assert_not_called()
+
+
+async def test_flush_service_runs_pending_rebuilds(hass, config_entry):
+    """flush_data rebuilds what's dirty without waiting for the quiet period."""
+    config_entry.add_to_hass(hass)
+    config_entry.mock_state(hass, ConfigEntryState.LOADED)
+    config_entry.runtime_data = MagicMock()
+    config_entry.runtime_data.rebuilder.async_flush = AsyncMock()
+    await async_services(hass)
+
+    await hass.services.async_call(
+        DOMAIN, FLUSH_SERVICE, {CONF_ENTRY: config_entry.entry_id}, blocking=True
+    )
+
+    config_entry.runtime_data.rebuilder.async_flush.assert_awaited_once()
+
+
+async def test_reprice_service_forwards_the_range(hass, config_entry):
+    """reprice_data reprices the entry's cost statistics over the given range."""
+    config_entry.add_to_hass(hass)
+    config_entry.mock_state(hass, ConfigEntryState.LOADED)
+    config_entry.runtime_data = MagicMock()
+    config_entry.runtime_data.async_reprice = AsyncMock()
+    await async_services(hass)
+
+    await hass.services.async_call(
+        DOMAIN,
+        REPRICE_SERVICE,
+        {CONF_ENTRY: config_entry.entry_id, CONF_START_DATE: dt(2025, 1, 1)},
+        blocking=True,
+    )
+
+    config_entry.runtime_data.async_reprice.assert_awaited_once_with(
+        dt(2025, 1, 1), None
+    )
+
+
+async def test_set_tariff_service_dates_a_version(hass, config_entry):
+    """set_tariff records the price from the given date, then reprices."""
+    config_entry.add_to_hass(hass)
+    config_entry.mock_state(hass, ConfigEntryState.LOADED)
+    item = {"entity_id": "number.myelectricaldata_12345_consumption_standard_price"}
+    config_entry.runtime_data = MagicMock(price_items=[item])
+    config_entry.runtime_data.tariffs.async_set = AsyncMock(return_value=True)
+    config_entry.runtime_data.async_request_reprice = AsyncMock()
+    await async_services(hass)
+
+    await hass.services.async_call(
+        DOMAIN,
+        TARIFF_SERVICE,
+        {
+            CONF_ENTRY: config_entry.entry_id,
+            CONF_TARIFF: item["entity_id"],
+            CONF_START_DATE: dt(2025, 2, 1, tzinfo=UTC),
+            CONF_PRICE: 0.2016,
+        },
+        blocking=True,
+    )
+
+    config_entry.runtime_data.tariffs.async_set.assert_awaited_once_with(
+        item, 0.2016, dt(2025, 2, 1, tzinfo=UTC)
+    )
+    config_entry.runtime_data.async_request_reprice.assert_awaited_once_with(
+        dt(2025, 2, 1, tzinfo=UTC)
+    )
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            TARIFF_SERVICE,
+            {
+                CONF_ENTRY: config_entry.entry_id,
+                CONF_TARIFF: "number.unknown",
+                CONF_START_DATE: dt(2025, 2, 1, tzinfo=UTC),
+                CONF_PRICE: 0.2016,
+            },
+            blocking=True,
+        )
@@ -0,0 +1,75 @@
+"""Tests for custom_components.myelectricaldata.tariffs."""
+
+from __future__ import annotations
+
+from datetime import UTC
+from datetime import datetime as dt
+
+import numpy as np
+
+from custom_components.myelectricaldata.tariffs import TariffHistory
+
+ITEM = {"mode": "consumption", "note": "standard", "key": "price"}
+FEBRUARY = dt(2025, 2, 1, tzinfo=UTC)
+AUGUST = dt(2025, 8, 1, tzinfo=UTC)
+
+
+async def test_prices_follow_the_version_in_effect(hass):
+    """Each start gets the latest version starting at or before it."""
+    tariffs = TariffHistory(hass, "entry")
+    await tariffs.async_setdefault(ITEM, 0.25)
+    await tariffs.async_set(ITEM, 0.2016, FEBRUARY)
+    await tariffs.async_set(ITEM, 0.1952, AUGUST)
+
+    starts = np.array(
+        [
+            dt(2024, 6, 1, tzinfo=UTC).timestamp(),
+            FEBRUARY.timestamp(),
+            dt(2025, 5, 1, tzinfo=UTC).timestamp(),
+            dt(2025, 9, 1, tzinfo=UTC).timestamp(),
+        ]
+    )
+    assert tariffs.prices_at("consumption", "standard", starts).tolist() == [
+        0.25,
+        0.2016,
+        0.2016,
+        0.1952,
+    ]
+    assert tariffs.prices_at("consumption", "offpeak", starts) is None
+
+
+async def test_setdefault_keeps_an_existing_history(hass):
+    """The restored number value only seeds a tariff without history."""
+    tariffs = TariffHistory(hass, "entry")
+    await tariffs.async_set(ITEM, 0.2016, FEBRUARY)
+    await tariffs.async_setdefault(ITEM, 0.25)
+
+    assert tariffs.versions["consumption.standard.price"] == [
+        (FEBRUARY.timestamp(), 0.2016)
+    ]
+
+
+async def test_set_is_a_noop_for_the_price_in_effect(hass):
+    """Setting the price already in effect records nothing."""
+    tariffs = TariffHistory(hass, "entry")
+    await tariffs.async_setdefault(ITEM, 0.2016)
+
+    assert await tariffs.async_set(ITEM, 0.2016, AUGUST) is False
+    assert await tariffs.async_set(ITEM, 0.1952, AUGUST) is True
+    # Same effective date replaces the version rather than adding one
+    assert await tariffs.async_set(ITEM, 0.1940, AUGUST) is True
+    assert tariffs.versions["consumption.standard.price"] == [
+        (0.0, 0.2016),
+        (AUGUST.timestamp(), 0.1940),
+    ]
+
+
+async def test_history_is_restored(hass):
+    """Versions survive a restart."""
+    tariffs = TariffHistory(hass, "entry")
+    await tariffs.async_setdefault(ITEM, 0.25)
+    await tariffs.async_set(ITEM, 0.2016, FEBRUARY)
+
+    restored = TariffHistory(hass, "entry")
+    await restored.async_load()
+    assert restored.versions == tariffs.versions
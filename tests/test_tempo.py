@@ -0,0 +1,91 @@
+"""Tests for custom_components.myelectricaldata.tempo."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from datetime import datetime as dt
+from unittest.mock import MagicMock
+
+import numpy as np
+from homeassistant.util import dt as dt_util
+
+from custom_components.myelectricaldata.tempo import (
+    TempoCalendar,
+    async_subscribe_tempo,
+    tempo_calendar,
+)
+
+COLORS = {"2025-01-06": "blue", "2025-01-07": "white", "2025-01-08": "RED"}
+
+
+async def test_update_keeps_published_colours_only(hass):
+    """Colours are normalized, days without one yet are left out."""
+    calendar = TempoCalendar(hass)
+    await calendar.async_update({**COLORS, "2025-01-09": None})
+
+    assert calendar.days == {
+        "2025-01-06": "blue",
+        "2025-01-07": "white",
+        "2025-01-08": "red",
+    }
+    assert calendar.get(date(2025, 1, 8)) == "red"
+    assert calendar.get(date(2025, 1, 9)) is None
+
+
+async def test_between_needs_every_day(hass):
+    """A window is only served when all its days are known."""
+    calendar = TempoCalendar(hass)
+    await calendar.async_update(COLORS)
+
+    assert calendar.between(dt(2025, 1, 6), dt(2025, 1, 9)) == {
+        "2025-01-06": "blue",
+        "2025-01-07": "white",
+        "2025-01-08": "red",
+    }
+    assert calendar.between(dt(2025, 1, 7, 6), dt(2025, 1, 8, 6)) == {
+        "2025-01-07": "white",
+        "2025-01-08": "red",
+    }
+    assert calendar.between(dt(2025, 1, 6), dt(2025, 1, 10)) is None
+
+
+async def test_colors_at_follows_the_local_day(hass):
+    """Each start gets the colour of its local day, "" when unknown."""
+    calendar = TempoCalendar(hass)
+    await calendar.async_update(COLORS)
+    midnight = dt_util.start_of_local_day(date(2025, 1, 7))
+    starts = np.array(
+        [
+            (midnight - timedelta(hours=1)).timestamp(),
+            midnight.timestamp(),
+            (midnight + timedelta(hours=23)).timestamp(),
+            (midnight + timedelta(days=2)).timestamp(),
+            (midnight - timedelta(days=30)).timestamp(),
+        ]
+    )
+
+    assert calendar.colors_at(starts).tolist() == ["blue", "white", "white", "", ""]
+    assert TempoCalendar(hass).colors_at(starts[:1]).tolist() == [""]
+
+
+async def test_calendar_is_shared_and_restored(hass):
+    """Every entry gets the same calendar, which survives a restart."""
+    assert tempo_calendar(hass) is tempo_calendar(hass)
+    await tempo_calendar(hass).async_update(COLORS)
+
+    restored = TempoCalendar(hass)
+    await restored.async_load()
+    assert restored.days == tempo_calendar(hass).days
+
+
+def test_subscribe_serves_known_colours():
+    """A client only fetches the colours when they aren't known."""
+    client = MagicMock(tempo={})
+    async_subscribe_tempo(client, {"2025-01-06": "blue"})
+    client.tempo_subscription.assert_called_once_with(False)
+    assert client.tempo == {"2025-01-06": "blue"}
+
+    client = MagicMock(tempo={})
+    async_subscribe_tempo(client, None)
+    client.tempo_subscription.assert_called_once_with(True)
+    assert client.tempo == {}